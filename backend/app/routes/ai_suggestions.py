@@ -1,12 +1,17 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 import httpx
 import json
 import os
-import PyPDF2
-import io
+import time
+
+from incremental_json import IncrementalJSONParser, parse_json_object
+from pdf_extraction import extract_pdf_text, PDF_MAX_UPLOAD_BYTES
+from prompt_compaction import compact_text, estimate_tokens
+from response_cache import suggestion_cache
 
 router = APIRouter()
 
@@ -15,7 +20,212 @@ router = APIRouter()
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 # Use gemini-2.5-flash which is available for v1beta API
 GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.5-flash")
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent"
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta")
+GEMINI_API_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_API_BASE}/models/{GEMINI_MODEL}:streamGenerateContent"
+
+# Connection pool of the shared Gemini client
+GEMINI_MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", "50"))
+GEMINI_MAX_KEEPALIVE = int(os.environ.get("GEMINI_MAX_KEEPALIVE", "20"))
+GEMINI_KEEPALIVE_EXPIRY = float(os.environ.get("GEMINI_KEEPALIVE_EXPIRY", "60"))
+
+# Per-call timeouts: connect/pool waits stay short, reads allow for generation time
+GEMINI_CONNECT_TIMEOUT = 5.0
+TEXT_TIMEOUT = httpx.Timeout(30.0, connect=GEMINI_CONNECT_TIMEOUT)
+PDF_TIMEOUT = httpx.Timeout(60.0, connect=GEMINI_CONNECT_TIMEOUT)  # Longer timeout for PDF
+LIST_MODELS_TIMEOUT = httpx.Timeout(15.0, connect=GEMINI_CONNECT_TIMEOUT)
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 8192,
+}
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx (pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Application-lifetime client, opened and closed by the app lifespan in main.py
+_gemini_client: Optional[httpx.AsyncClient] = None
+
+
+def build_gemini_client(verify=True) -> httpx.AsyncClient:
+    """Pooled client for the Gemini API; reused connections skip the TCP/TLS handshake"""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        verify=verify,
+        limits=httpx.Limits(
+            max_connections=GEMINI_MAX_CONNECTIONS,
+            max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+            keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY,
+        ),
+        timeout=TEXT_TIMEOUT,
+        headers={"Content-Type": "application/json"},
+    )
+
+
+async def open_gemini_client():
+    global _gemini_client
+    if _gemini_client is None:
+        _gemini_client = build_gemini_client()
+
+
+async def close_gemini_client():
+    global _gemini_client
+    if _gemini_client is not None:
+        await _gemini_client.aclose()
+        _gemini_client = None
+
+
+def get_gemini_client() -> httpx.AsyncClient:
+    """The shared client, created on first use if the lifespan has not opened it"""
+    global _gemini_client
+    if _gemini_client is None:
+        _gemini_client = build_gemini_client()
+    return _gemini_client
+
+
+def generate_content_body(prompt: str) -> dict:
+    return {
+        "contents": [
+            {
+                "parts": [
+                    {"text": prompt}
+                ]
+            }
+        ],
+        "generationConfig": GENERATION_CONFIG,
+    }
+
+
+async def post_generate_content(prompt: str, timeout: httpx.Timeout) -> httpx.Response:
+    """Send one generateContent request over the shared client"""
+    return await get_gemini_client().post(
+        f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
+        json=generate_content_body(prompt),
+        timeout=timeout,
+    )
+
+
+async def open_content_stream(prompt: str, timeout: httpx.Timeout) -> httpx.Response:
+    """Start a streamGenerateContent request as Server-Sent Events; the caller must aclose() it"""
+    client = get_gemini_client()
+    request = client.build_request(
+        "POST",
+        f"{GEMINI_STREAM_URL}?alt=sse&key={GEMINI_API_KEY}",
+        json=generate_content_body(prompt),
+        timeout=timeout,
+    )
+    return await client.send(request, stream=True)
+
+
+# Response field -> keys the model may use for it (camelCase or PascalCase)
+SUGGESTION_FIELDS = {
+    "caption": ("caption", "Caption"),
+    "hashtags": ("hashtags", "Hashtags"),
+    "tagging_suggestions": ("taggingSuggestions", "TaggingSuggestions"),
+    "reach_tips": ("reachTips", "ReachTips"),
+    "media_recommendations": ("mediaRecommendations", "MediaRecommendations"),
+    "posting_strategy": ("postingStrategy", "PostingStrategy"),
+}
+SUGGESTION_DEFAULTS = {
+    "caption": "No caption generated",
+    "hashtags": [],
+    "tagging_suggestions": {},
+    "reach_tips": [],
+    "media_recommendations": {},
+    "posting_strategy": "No posting strategy generated",
+}
+SUGGESTION_KEYS = {key: field for field, keys in SUGGESTION_FIELDS.items() for key in keys}
+
+
+def normalize_suggestions(suggestions: dict) -> dict:
+    """Map the model's JSON keys to the AIResponse fields, filling in defaults"""
+    return {
+        field: next((suggestions[key] for key in keys if suggestions.get(key)), SUGGESTION_DEFAULTS[field])
+        for field, keys in SUGGESTION_FIELDS.items()
+    }
+
+
+async def request_suggestions(prompt: str, timeout: httpx.Timeout) -> dict:
+    """Call Gemini with a suggestions prompt and return the normalized AIResponse fields"""
+    # Make request to Gemini API
+    response = await post_generate_content(prompt, timeout)
+
+    if response.status_code != 200:
+        # Include status and body to make debugging easier
+        detail = f"Gemini API error: status={response.status_code} body={response.text}"
+        print(detail)
+        raise HTTPException(status_code=500, detail=detail)
+
+    # Parse Gemini response (be permissive about response shape)
+    data = response.json()
+    ai_response_text = None
+
+    # Debug: print response structure
+    print("Gemini API response structure:", json.dumps(data, indent=2)[:1000])
+
+    # Check for finish reason issues
+    candidates = data.get("candidates", [])
+    if candidates and len(candidates) > 0:
+        finish_reason = candidates[0].get("finishReason")
+        if finish_reason == "MAX_TOKENS":
+            raise HTTPException(
+                status_code=500,
+                detail="AI response was cut off due to token limit. Please try with a shorter project description."
+            )
+        elif finish_reason and finish_reason not in ["STOP", "FINISH_REASON_UNSPECIFIED"]:
+            print(f"Warning: Unexpected finish reason: {finish_reason}")
+
+    # Try multiple possible field names used by different GL API versions
+    try:
+        # common: candidates -> content -> parts -> text
+        if candidates and len(candidates) > 0:
+            print(f"Found {len(candidates)} candidates")
+            candidate = candidates[0]
+            print(f"First candidate keys: {list(candidate.keys())}")
+            content = candidate.get("content", {})
+            if content:
+                print(f"Content keys: {list(content.keys())}")
+                parts = content.get("parts", [])
+                if parts and len(parts) > 0:
+                    print(f"Found {len(parts)} parts, first part keys: {list(parts[0].keys())}")
+                    ai_response_text = parts[0].get("text")
+                    if ai_response_text:
+                        print(f"✓ Successfully extracted text (length: {len(ai_response_text)})")
+    except (IndexError, KeyError, TypeError) as e:
+        print(f"Error parsing standard response format: {e}")
+        ai_response_text = None
+
+    if not ai_response_text:
+        # another possible shape: candidates[0].output
+        try:
+            candidates = data.get("candidates", [])
+            if candidates and len(candidates) > 0:
+                ai_response_text = candidates[0].get("output")
+        except (IndexError, KeyError, TypeError):
+            ai_response_text = None
+
+    if not ai_response_text:
+        # fallback: try top-level 'output' or 'result'
+        ai_response_text = data.get("output") or data.get("result")
+
+    if not ai_response_text:
+        # Last resort: stringify full response for debugging
+        print("Unexpected Gemini response shape:", json.dumps(data, indent=2)[:2000])
+        raise HTTPException(status_code=500, detail=f"Unexpected Gemini response shape. Response keys: {list(data.keys())}")
+
+    # Parse the first JSON object, skipping markdown fences or surrounding text
+    try:
+        suggestions = parse_json_object(ai_response_text)
+    except ValueError as e:
+        print(f"AI response could not be parsed as JSON ({e}). Raw response:\n", ai_response_text[:2000])
+        raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
+
+    return normalize_suggestions(suggestions)
 
 
 class AIRequest(BaseModel):
@@ -32,33 +242,11 @@ class AIResponse(BaseModel):
     posting_strategy: str
 
 
-def extract_text_from_pdf(pdf_file: bytes) -> str:
-    """Extract text content from a PDF file"""
-    try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
-        text = ""
-        
-        # Extract text from all pages
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
-    except Exception as e:
-        raise Exception(f"Error reading PDF: {str(e)}")
-
-
-@router.post("/generate-linkedin-suggestions", response_model=AIResponse)
-async def generate_linkedin_suggestions(request: AIRequest):
-    """
-    Generate LinkedIn posting suggestions using Google Gemini API from text input
-    """
-    try:
-        # Construct the prompt
-        prompt = f"""You are a LinkedIn marketing expert. Analyze this student project and provide detailed LinkedIn posting suggestions.
+def build_text_prompt(project_title: str, project_description: str) -> str:
+    return f"""You are a LinkedIn marketing expert. Analyze this student project and provide detailed LinkedIn posting suggestions.
 
-Project Title: {request.project_title}
-Project Description: {request.project_description}
+Project Title: {project_title}
+Project Description: {project_description}
 
 Provide a comprehensive LinkedIn posting strategy in the following JSON format:
 {{
@@ -88,136 +276,222 @@ Make sure all suggestions are:
 
 Return ONLY valid JSON, no additional text."""
 
-        # Validate API key
-        if not GEMINI_API_KEY:
-            raise HTTPException(status_code=500, detail="Gemini API key is not configured. Set GEMINI_API_KEY in environment.")
 
-        # Make request to Gemini API
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "contents": [
-                        {
-                            "parts": [
-                                {"text": prompt}
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topK": 40,
-                        "topP": 0.95,
-                        "maxOutputTokens": 8192,
-                    },
-                },
+def build_pdf_prompt(pdf_text: str) -> str:
+    return f"""You are a LinkedIn marketing expert. I have extracted project details from a PDF document. Analyze this content and provide detailed LinkedIn posting suggestions.
+
+PROJECT CONTENT FROM PDF:
+{pdf_text}
+
+Based on the content above, provide a comprehensive LinkedIn posting strategy in the following JSON format:
+{{
+  "caption": "An engaging, professional LinkedIn post caption (3-4 sentences) that highlights the key achievements and impact of this project",
+  "hashtags": ["10-15 relevant hashtags including trending tech hashtags, project-specific tags, and general professional hashtags"],
+  "taggingSuggestions": {{
+    "companies": ["5-8 relevant companies that work in this domain or might be interested in this project"],
+    "ministries": ["2-3 relevant government ministries or organizations if applicable"],
+    "influencers": ["3-5 tech influencers or thought leaders in this field"]
+  }},
+  "reachTips": [
+    "5-7 specific, actionable tips to maximize post reach and engagement on LinkedIn"
+  ],
+  "mediaRecommendations": {{
+    "images": ["3-4 specific types of images/screenshots to include with descriptions"],
+    "videos": ["2-3 specific video content suggestions with duration and content details"]
+  }},
+  "postingStrategy": "A detailed paragraph about the best time to post, how to structure the post, engagement strategies, and follow-up actions"
+}}
+
+Make sure all suggestions are:
+- Specific to this project based on the PDF content
+- Actionable and practical
+- Professional and appropriate for LinkedIn
+- Optimized for maximum reach and engagement
+- Relevant to the tech/education industry
+
+Return ONLY valid JSON, no additional text."""
+
+
+async def read_pdf_text(file: UploadFile) -> str:
+    """
+    Text of an uploaded PDF, compacted to PDF_PROMPT_TOKEN_BUDGET;
+    HTTPException 413 if it is over PDF_MAX_UPLOAD_BYTES, 400 if it has too
+    little readable text
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"PDF is too large. The maximum size is {PDF_MAX_UPLOAD_BYTES // (1024 * 1024)} MB.",
+    )
+    if file.size is not None and file.size > PDF_MAX_UPLOAD_BYTES:
+        raise too_large
+    # Read at most one byte past the limit in case the size was not reported
+    pdf_content = await file.read(PDF_MAX_UPLOAD_BYTES + 1)
+    if len(pdf_content) > PDF_MAX_UPLOAD_BYTES:
+        raise too_large
+    # Parsed off the event loop, within page, size and time budgets
+    pdf_text = await extract_pdf_text(pdf_content)
+    
+    if not pdf_text or len(pdf_text) < 50:
+        raise HTTPException(
+            status_code=400, 
+            detail="Could not extract enough text from PDF. Please ensure the PDF contains readable text."
+        )
+    
+    # Keep the most relevant sections so prompt size is bounded regardless of PDF length
+    compacted = await run_in_threadpool(compact_text, pdf_text)
+    print(f"PDF text compacted from ~{estimate_tokens(pdf_text)} to ~{estimate_tokens(compacted)} tokens")
+    return compacted
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def iter_stream_text(response: httpx.Response):
+    """Text fragments of a streamGenerateContent response sent as Server-Sent Events"""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        candidates = json.loads(line[5:]).get("candidates") or []
+        if not candidates:
+            continue
+        if candidates[0].get("finishReason") == "MAX_TOKENS":
+            raise HTTPException(
+                status_code=500,
+                detail="AI response was cut off due to token limit. Please try with a shorter project description."
             )
+        for part in (candidates[0].get("content") or {}).get("parts") or []:
+            if part.get("text"):
+                yield part["text"]
 
-        if response.status_code != 200:
-            # Include status and body to make debugging easier
-            detail = f"Gemini API error: status={response.status_code} body={response.text}"
-            print(detail)
-            raise HTTPException(status_code=500, detail=detail)
 
-        # Parse Gemini response (be permissive about response shape)
-        data = response.json()
-        ai_response_text = None
-        
-        # Debug: print response structure
-        print("Gemini API response structure:", json.dumps(data, indent=2)[:1000])
+async def replay_suggestions(suggestions: dict):
+    for field, value in suggestions.items():
+        yield sse_event("field", {"field": field, "value": value})
+    yield sse_event("done", suggestions)
+
+
+def stream_error_detail(error: Exception) -> str:
+    """Message for an "error" event, matching the non-streaming endpoints"""
+    if isinstance(error, HTTPException):
+        return error.detail
+    if isinstance(error, httpx.TimeoutException):
+        return "Request to Gemini API timed out"
+    if isinstance(error, httpx.HTTPError):
+        return "Connection to Gemini API was interrupted"
+    if isinstance(error, ValueError):
+        return "Failed to parse AI response as JSON"
+    return f"Failed to generate suggestions: {str(error) or type(error).__name__}"
+
+
+async def relay_suggestions(response: httpx.Response, prompt: str, started: float, future):
+    """
+    Parse the streamed model output incrementally and send a "field" event
+    for each AIResponse field as soon as it is complete, then "done" with
+    the full normalized response (or "error"). The result, or the error, is
+    handed to requests that joined this generation through `future`.
+    """
+    parser = IncrementalJSONParser()
+    suggestions = None
+    error = None
+    try:
+        async for text in iter_stream_text(response):
+            for key, value in parser.feed(text):
+                field = SUGGESTION_KEYS.get(key)
+                if field and value:
+                    yield sse_event("field", {"field": field, "value": value})
+        suggestions = normalize_suggestions(parser.close())
+    except (HTTPException, httpx.HTTPError, ValueError) as e:
+        if not isinstance(e, HTTPException):
+            print(f"Streaming AI suggestions failed: {type(e).__name__}: {e}")
+        error = e
+    finally:
+        await response.aclose()
+        if suggestions is None:
+            # Followers get the same error, or retry if this client went away
+            await suggestion_cache.settle(GEMINI_MODEL, prompt, future, error=error)
+
+    if error is not None:
+        yield sse_event("error", {"detail": stream_error_detail(error)})
+        return
+
+    await suggestion_cache.settle(GEMINI_MODEL, prompt, future, value=suggestions, latency=time.perf_counter() - started)
+    print(f"✓ Successfully streamed AI suggestions with {len(suggestions['hashtags'])} hashtags")
+    yield sse_event("done", suggestions)
+
+
+async def follow_suggestions(future, prompt: str, timeout: httpx.Timeout):
+    """Events for a request that joined a generation already in flight for the same prompt"""
+    try:
+        suggestions = await suggestion_cache.follow(future)
+        if suggestions is None:
+            # The request generating it went away; fetch the result without streaming
+            suggestions = await suggestion_cache.get_or_create(
+                GEMINI_MODEL, prompt, lambda: request_suggestions(prompt, timeout)
+            )
+    except Exception as e:
+        yield sse_event("error", {"detail": stream_error_detail(e)})
+        return
+
+    async for event in replay_suggestions(suggestions):
+        yield event
 
-        # Check for finish reason issues
-        candidates = data.get("candidates", [])
-        if candidates and len(candidates) > 0:
-            finish_reason = candidates[0].get("finishReason")
-            if finish_reason == "MAX_TOKENS":
-                raise HTTPException(
-                    status_code=500,
-                    detail="AI response was cut off due to token limit. Please try with a shorter project description."
-                )
-            elif finish_reason and finish_reason not in ["STOP", "FINISH_REASON_UNSPECIFIED"]:
-                print(f"Warning: Unexpected finish reason: {finish_reason}")
-
-        # Try multiple possible field names used by different GL API versions
-        try:
-            # common: candidates -> content -> parts -> text
-            if candidates and len(candidates) > 0:
-                print(f"Found {len(candidates)} candidates")
-                candidate = candidates[0]
-                print(f"First candidate keys: {list(candidate.keys())}")
-                content = candidate.get("content", {})
-                if content:
-                    print(f"Content keys: {list(content.keys())}")
-                    parts = content.get("parts", [])
-                    if parts and len(parts) > 0:
-                        print(f"Found {len(parts)} parts, first part keys: {list(parts[0].keys())}")
-                        ai_response_text = parts[0].get("text")
-                        if ai_response_text:
-                            print(f"✓ Successfully extracted text (length: {len(ai_response_text)})")
-        except (IndexError, KeyError, TypeError) as e:
-            print(f"Error parsing standard response format: {e}")
-            ai_response_text = None
 
-        if not ai_response_text:
-            # another possible shape: candidates[0].output
+async def suggestions_event_stream(prompt: str, timeout: httpx.Timeout) -> StreamingResponse:
+    """
+    SSE response for a suggestions prompt: replayed from the cache, streamed
+    from Gemini, or replayed once an identical request in flight finishes
+    """
+    cached = await suggestion_cache.lookup(GEMINI_MODEL, prompt)
+    if cached is not None:
+        events = replay_suggestions(cached)
+    else:
+        future, leader = suggestion_cache.claim(GEMINI_MODEL, prompt)
+        if leader:
+            # Open the upstream stream first so API errors still map to an HTTP status
+            started = time.perf_counter()
             try:
-                candidates = data.get("candidates", [])
-                if candidates and len(candidates) > 0:
-                    ai_response_text = candidates[0].get("output")
-            except (IndexError, KeyError, TypeError):
-                ai_response_text = None
-
-        if not ai_response_text:
-            # fallback: try top-level 'output' or 'result'
-            ai_response_text = data.get("output") or data.get("result")
-
-        if not ai_response_text:
-            # Last resort: stringify full response for debugging
-            print("Unexpected Gemini response shape:", json.dumps(data, indent=2)[:2000])
-            raise HTTPException(status_code=500, detail=f"Unexpected Gemini response shape. Response keys: {list(data.keys())}")
-
-        # Extract JSON from response (handle markdown code blocks)
-        ai_response_text = ai_response_text.strip()
-        
-        # Remove markdown code blocks if present
-        if ai_response_text.startswith("```json"):
-            ai_response_text = ai_response_text[7:]
-        elif ai_response_text.startswith("```"):
-            ai_response_text = ai_response_text[3:]
-        
-        if ai_response_text.endswith("```"):
-            ai_response_text = ai_response_text[:-3]
-        
-        ai_response_text = ai_response_text.strip()
+                response = await open_content_stream(prompt, timeout)
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    await response.aclose()
+                    detail = f"Gemini API error: status={response.status_code} body={body}"
+                    print(detail)
+                    raise HTTPException(status_code=500, detail=detail)
+            except Exception as e:
+                await suggestion_cache.settle(GEMINI_MODEL, prompt, future, error=e)
+                raise
+            except BaseException:
+                await suggestion_cache.settle(GEMINI_MODEL, prompt, future)
+                raise
+            events = relay_suggestions(response, prompt, started, future)
+        else:
+            events = follow_suggestions(future, prompt, timeout)
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        # Parse JSON
-        try:
-            suggestions = json.loads(ai_response_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON object from text
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', ai_response_text)
-            if json_match:
-                try:
-                    suggestions = json.loads(json_match.group(0))
-                except json.JSONDecodeError:
-                    print("Failed to decode extracted JSON fragment:", json_match.group(0)[:400])
-                    raise HTTPException(status_code=500, detail="Failed to parse AI response JSON fragment")
-            else:
-                print("AI response could not be parsed as JSON. Raw response:\n", ai_response_text[:2000])
-                raise HTTPException(status_code=500, detail="Failed to parse AI response as JSON")
-
-        # Normalize keys to match response model (camelCase to snake_case)
-        # Support both camelCase and PascalCase from different AI response formats
-        normalized_response = {
-            "caption": suggestions.get("caption") or suggestions.get("Caption") or "No caption generated",
-            "hashtags": suggestions.get("hashtags") or suggestions.get("Hashtags") or [],
-            "tagging_suggestions": suggestions.get("taggingSuggestions") or suggestions.get("TaggingSuggestions") or {},
-            "reach_tips": suggestions.get("reachTips") or suggestions.get("ReachTips") or [],
-            "media_recommendations": suggestions.get("mediaRecommendations") or suggestions.get("MediaRecommendations") or {},
-            "posting_strategy": suggestions.get("postingStrategy") or suggestions.get("PostingStrategy") or "No posting strategy generated",
-        }
+
+@router.post("/generate-linkedin-suggestions", response_model=AIResponse)
+async def generate_linkedin_suggestions(request: AIRequest):
+    """
+    Generate LinkedIn posting suggestions using Google Gemini API from text input
+    """
+    try:
+        # Construct the prompt
+        prompt = build_text_prompt(request.project_title, request.project_description)
+
+        # Validate API key
+        if not GEMINI_API_KEY:
+            raise HTTPException(status_code=500, detail="Gemini API key is not configured. Set GEMINI_API_KEY in environment.")
+
+        # Identical prompts are answered from the cache or share one in-flight call
+        normalized_response = await suggestion_cache.get_or_create(
+            GEMINI_MODEL, prompt, lambda: request_suggestions(prompt, TEXT_TIMEOUT)
+        )
 
         print(f"✓ Successfully generated AI suggestions with {len(normalized_response['hashtags'])} hashtags")
         return normalized_response
@@ -249,8 +523,7 @@ async def list_gemini_models():
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            resp = await client.get(f"https://generativelanguage.googleapis.com/v1beta/models?key={GEMINI_API_KEY}")
+        resp = await get_gemini_client().get(f"{GEMINI_API_BASE}/models?key={GEMINI_API_KEY}", timeout=LIST_MODELS_TIMEOUT)
 
         try:
             body = resp.json()
@@ -274,125 +547,16 @@ async def generate_linkedin_suggestions_from_pdf(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
     try:
-        # Read PDF file
-        pdf_content = await file.read()
-        
-        # Extract text from PDF
-        pdf_text = extract_text_from_pdf(pdf_content)
-        
-        if not pdf_text or len(pdf_text) < 50:
-            raise HTTPException(
-                status_code=400, 
-                detail="Could not extract enough text from PDF. Please ensure the PDF contains readable text."
-            )
+        # Read PDF file and extract its text
+        pdf_text = await read_pdf_text(file)
         
         # Construct the prompt with PDF content
-        prompt = f"""You are a LinkedIn marketing expert. I have extracted project details from a PDF document. Analyze this content and provide detailed LinkedIn posting suggestions.
-
-PROJECT CONTENT FROM PDF:
-{pdf_text}
-
-Based on the content above, provide a comprehensive LinkedIn posting strategy in the following JSON format:
-{{
-  "caption": "An engaging, professional LinkedIn post caption (3-4 sentences) that highlights the key achievements and impact of this project",
-  "hashtags": ["10-15 relevant hashtags including trending tech hashtags, project-specific tags, and general professional hashtags"],
-  "taggingSuggestions": {{
-    "companies": ["5-8 relevant companies that work in this domain or might be interested in this project"],
-    "ministries": ["2-3 relevant government ministries or organizations if applicable"],
-    "influencers": ["3-5 tech influencers or thought leaders in this field"]
-  }},
-  "reachTips": [
-    "5-7 specific, actionable tips to maximize post reach and engagement on LinkedIn"
-  ],
-  "mediaRecommendations": {{
-    "images": ["3-4 specific types of images/screenshots to include with descriptions"],
-    "videos": ["2-3 specific video content suggestions with duration and content details"]
-  }},
-  "postingStrategy": "A detailed paragraph about the best time to post, how to structure the post, engagement strategies, and follow-up actions"
-}}
-
-Make sure all suggestions are:
-- Specific to this project based on the PDF content
-- Actionable and practical
-- Professional and appropriate for LinkedIn
-- Optimized for maximum reach and engagement
-- Relevant to the tech/education industry
-
-Return ONLY valid JSON, no additional text."""
-
-        # Make request to Gemini API
-        async with httpx.AsyncClient(timeout=60.0) as client:  # Longer timeout for PDF
-            response = await client.post(
-                f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "contents": [
-                        {
-                            "parts": [
-                                {
-                                    "text": prompt,
-                                }
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topK": 40,
-                        "topP": 0.95,
-                        "maxOutputTokens": 8192,
-                    },
-                },
-            )
+        prompt = build_pdf_prompt(pdf_text)
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Gemini API error: {response.text}"
-            )
-
-        # Parse Gemini response
-        data = response.json()
-        ai_response_text = data["candidates"][0]["content"]["parts"][0]["text"]
-
-        # Extract JSON from response (handle markdown code blocks)
-        ai_response_text = ai_response_text.strip()
-        
-        # Remove markdown code blocks if present
-        if ai_response_text.startswith("```json"):
-            ai_response_text = ai_response_text[7:]
-        elif ai_response_text.startswith("```"):
-            ai_response_text = ai_response_text[3:]
-        
-        if ai_response_text.endswith("```"):
-            ai_response_text = ai_response_text[:-3]
-        
-        ai_response_text = ai_response_text.strip()
-
-        # Parse JSON
-        try:
-            suggestions = json.loads(ai_response_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON object from text
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', ai_response_text)
-            if json_match:
-                suggestions = json.loads(json_match.group(0))
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response as JSON"
-                )
-
-        # Normalize keys to match response model
-        # Support both camelCase and PascalCase from different AI response formats
-        normalized_response = {
-            "caption": suggestions.get("caption") or suggestions.get("Caption") or "No caption generated",
-            "hashtags": suggestions.get("hashtags") or suggestions.get("Hashtags") or [],
-            "tagging_suggestions": suggestions.get("taggingSuggestions") or suggestions.get("TaggingSuggestions") or {},
-            "reach_tips": suggestions.get("reachTips") or suggestions.get("ReachTips") or [],
-            "media_recommendations": suggestions.get("mediaRecommendations") or suggestions.get("MediaRecommendations") or {},
-            "posting_strategy": suggestions.get("postingStrategy") or suggestions.get("PostingStrategy") or "No posting strategy generated",
-        }
+        # Same PDF text -> same prompt, so repeated uploads hit the cache
+        normalized_response = await suggestion_cache.get_or_create(
+            GEMINI_MODEL, prompt, lambda: request_suggestions(prompt, PDF_TIMEOUT)
+        )
 
         print(f"✓ Successfully generated AI suggestions from PDF with {len(normalized_response['hashtags'])} hashtags")
         return normalized_response
@@ -414,127 +578,43 @@ Return ONLY valid JSON, no additional text."""
             detail=f"Failed to process PDF: {str(e) or type(e).__name__}"
         )
 
+
+@router.post("/generate-linkedin-suggestions/stream")
+async def stream_linkedin_suggestions(request: AIRequest):
     """
-    Generate LinkedIn posting suggestions using Google Gemini API
+    Streaming variant of generate-linkedin-suggestions: sends each field as a
+    Server-Sent Event ("field", then "done" or "error") as Gemini generates it
     """
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="Gemini API key is not configured. Set GEMINI_API_KEY in environment.")
+    
     try:
-        # Construct the prompt
-        prompt = f"""You are a LinkedIn marketing expert. Analyze this student project and provide detailed LinkedIn posting suggestions.
-
-Project Title: {request.project_title}
-Project Description: {request.project_description}
-
-Provide a comprehensive LinkedIn posting strategy in the following JSON format:
-{{
-  "caption": "An engaging, professional LinkedIn post caption (3-4 sentences) that highlights the key achievements and impact of this project",
-  "hashtags": ["10-15 relevant hashtags including trending tech hashtags, project-specific tags, and general professional hashtags"],
-  "taggingSuggestions": {{
-    "companies": ["5-8 relevant companies that work in this domain or might be interested in this project"],
-    "ministries": ["2-3 relevant government ministries or organizations if applicable"],
-    "influencers": ["3-5 tech influencers or thought leaders in this field"]
-  }},
-  "reachTips": [
-    "5-7 specific, actionable tips to maximize post reach and engagement on LinkedIn"
-  ],
-  "mediaRecommendations": {{
-    "images": ["3-4 specific types of images/screenshots to include with descriptions"],
-    "videos": ["2-3 specific video content suggestions with duration and content details"]
-  }},
-  "postingStrategy": "A detailed paragraph about the best time to post, how to structure the post, engagement strategies, and follow-up actions"
-}}
-
-Make sure all suggestions are:
-- Specific to this project
-- Actionable and practical
-- Professional and appropriate for LinkedIn
-- Optimized for maximum reach and engagement
-- Relevant to the tech/education industry
-
-Return ONLY valid JSON, no additional text."""
-
-        # Make request to Gemini API
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{GEMINI_API_URL}?key={GEMINI_API_KEY}",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "contents": [
-                        {
-                            "parts": [
-                                {
-                                    "text": prompt,
-                                }
-                            ]
-                        }
-                    ],
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topK": 40,
-                        "topP": 0.95,
-                        "maxOutputTokens": 2048,
-                    },
-                },
-            )
-
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Gemini API error: {response.text}"
-            )
-
-        # Parse Gemini response
-        data = response.json()
-        ai_response_text = data["candidates"][0]["content"]["parts"][0]["text"]
-
-        # Extract JSON from response (handle markdown code blocks)
-        ai_response_text = ai_response_text.strip()
-        
-        # Remove markdown code blocks if present
-        if ai_response_text.startswith("```json"):
-            ai_response_text = ai_response_text[7:]
-        elif ai_response_text.startswith("```"):
-            ai_response_text = ai_response_text[3:]
-        
-        if ai_response_text.endswith("```"):
-            ai_response_text = ai_response_text[:-3]
-        
-        ai_response_text = ai_response_text.strip()
-
-        # Parse JSON
-        try:
-            suggestions = json.loads(ai_response_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON object from text
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', ai_response_text)
-            if json_match:
-                suggestions = json.loads(json_match.group(0))
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail="Failed to parse AI response as JSON"
-                )
-
-        # Normalize keys to match response model (camelCase to snake_case)
-        normalized_response = {
-            "caption": suggestions.get("caption", ""),
-            "hashtags": suggestions.get("hashtags", []),
-            "tagging_suggestions": suggestions.get("taggingSuggestions", {}),
-            "reach_tips": suggestions.get("reachTips", []),
-            "media_recommendations": suggestions.get("mediaRecommendations", {}),
-            "posting_strategy": suggestions.get("postingStrategy", ""),
-        }
+        prompt = build_text_prompt(request.project_title, request.project_description)
+        return await suggestions_event_stream(prompt, TEXT_TIMEOUT)
+    except HTTPException:
+        raise
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Request to Gemini API timed out")
+    except Exception as e:
+        print(f"Error generating AI suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate AI suggestions: {str(e) or type(e).__name__}")
 
-        return normalized_response
 
+@router.post("/generate-linkedin-suggestions-from-pdf/stream")
+async def stream_linkedin_suggestions_from_pdf(file: UploadFile = File(...)):
+    """Streaming variant of generate-linkedin-suggestions-from-pdf"""
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    if not GEMINI_API_KEY:
+        raise HTTPException(status_code=500, detail="Gemini API key is not configured. Set GEMINI_API_KEY in environment.")
+    
+    try:
+        pdf_text = await read_pdf_text(file)
+        return await suggestions_event_stream(build_pdf_prompt(pdf_text), PDF_TIMEOUT)
+    except HTTPException:
+        raise
     except httpx.TimeoutException:
-        raise HTTPException(
-            status_code=504,
-            detail="Request to Gemini API timed out"
-        )
+        raise HTTPException(status_code=504, detail="Request to Gemini API timed out. Please try again.")
     except Exception as e:
-        print(f"Error generating AI suggestions: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate AI suggestions: {str(e)}"
-        )
+        print(f"Error processing PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to process PDF: {str(e) or type(e).__name__}")
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from database import get_db
+from snapshots import SNAPSHOT_METRICS, BUCKET_SIZES, MAX_BUCKETS, bucket_count, metric_series
+
+router = APIRouter()
+
+
+@router.get("/{platform}/{metric}")
+def get_metric_history(
+    platform: str,
+    metric: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = "week",
+    agg: str = "sum",
+    usernames: Optional[list[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Downsampled history of one profile metric, for the whole cohort or the
+    given students. Defaults to the last 6 months in weekly buckets.
+    """
+    if platform not in SNAPSHOT_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown platform '{platform}'")
+    if metric not in SNAPSHOT_METRICS[platform]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown metric '{metric}'. Available: {', '.join(SNAPSHOT_METRICS[platform])}"
+        )
+    if bucket not in BUCKET_SIZES:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of: {', '.join(BUCKET_SIZES)}")
+    if agg not in ("sum", "avg", "count"):
+        raise HTTPException(status_code=400, detail="agg must be one of: sum, avg, count")
+
+    # Snapshots are stored as naive UTC
+    if start is not None and start.tzinfo is not None:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=182)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if bucket_count(start, end, bucket) > MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range spans more than {MAX_BUCKETS} {bucket} buckets; use a shorter range or a larger bucket"
+        )
+
+    return {
+        "platform": platform,
+        "metric": metric,
+        "bucket": bucket,
+        "agg": agg,
+        "series": metric_series(db, platform, metric, start, end, bucket=bucket, agg=agg, usernames=usernames),
+    }
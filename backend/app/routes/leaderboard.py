@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, List
+
+from database import get_db
+from leaderboard import PLATFORM_METRICS, COMBINED_METRICS, leaderboard_page, set_batch
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 200
+
+
+class BatchAssignment(BaseModel):
+    batch: str
+    usernames: List[str]
+
+
+def _check_order(order: str):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+
+
+@router.get("/combined")
+def get_combined_leaderboard(
+    sort: str = "combined_score",
+    order: str = "desc",
+    batch: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Cross-platform leaderboard. Sort by combined_score or any platform
+    metric, e.g. leetcode_total_solved or github_total_stars.
+    """
+    if sort not in COMBINED_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(COMBINED_METRICS)}")
+    _check_order(order)
+
+    result = leaderboard_page(db, sort=sort, order=order, batch=batch, page=page, page_size=page_size)
+    return {"sort": sort, "order": order, "batch": batch, "page": page, "page_size": page_size, **result}
+
+
+@router.get("/{platform}")
+def get_platform_leaderboard(
+    platform: str,
+    sort: Optional[str] = None,
+    order: str = "desc",
+    batch: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """Leaderboard of the students who connected one platform"""
+    if platform not in PLATFORM_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown platform '{platform}'")
+    sort = sort or PLATFORM_METRICS[platform][0]
+    if sort not in PLATFORM_METRICS[platform]:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(PLATFORM_METRICS[platform])}")
+    _check_order(order)
+
+    result = leaderboard_page(db, platform=platform, sort=sort, order=order, batch=batch, page=page, page_size=page_size)
+    return {"platform": platform, "sort": sort, "order": order, "batch": batch, "page": page, "page_size": page_size, **result}
+
+
+@router.put("/batches")
+def assign_batch(request: BatchAssignment, db: Session = Depends(get_db)):
+    """Assign students to a batch so leaderboards can be filtered by it"""
+    usernames = list(dict.fromkeys(request.usernames))
+    set_batch(db, usernames, request.batch)
+    return {"message": f"Assigned {len(usernames)} students to batch {request.batch}"}
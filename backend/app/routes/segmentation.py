@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import pandas as pd
+import numpy as np
+import hashlib
+import json
 import os
+import threading
 from pathlib import Path
 
 router = APIRouter()
@@ -10,93 +15,155 @@ router = APIRouter()
 BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
 DEFAULT_CSV = BACKEND_DIR / "student_data_with_segments_20251005_223612.csv"
 
-def analyze_csv_data(df: pd.DataFrame):
-    """Analyze the segmented CSV data and return insights"""
-    
-    total_students = len(df)
-    
-    # Geographic Distribution
-    geo_dist = df['geographic_segment'].value_counts()
-    geographic_segments = [
-        {
-            "name": name,
-            "count": int(count),
-            "percentage": round((count / total_students) * 100, 1)
-        }
-        for name, count in geo_dist.items()
-    ]
-    
-    # Academic Performance
-    acad_dist = df['academic_segment'].value_counts()
-    academic_segments = [
-        {
-            "name": name,
-            "count": int(count),
-            "percentage": round((count / total_students) * 100, 1)
-        }
-        for name, count in acad_dist.items()
-    ]
-    
-    # Socio-Economic Status
-    socio_dist = df['socioeconomic_segment'].value_counts()
-    socioeconomic_segments = [
-        {
-            "name": name,
-            "count": int(count),
-            "percentage": round((count / total_students) * 100, 1)
-        }
-        for name, count in socio_dist.items()
-    ]
-    
-    # Marketing Channels
-    marketing_dist = df['marketing_channel_type'].value_counts()
-    marketing_channels = [
-        {
-            "name": name,
-            "count": int(count),
-            "percentage": round((count / total_students) * 100, 1)
-        }
-        for name, count in marketing_dist.items()
-    ]
-    
-    # Accommodation preferences
-    accom_dist = df['accommodation'].value_counts()
-    accommodation_segments = [
-        {
-            "name": name,
-            "count": int(count),
-            "percentage": round((count / total_students) * 100, 1)
-        }
-        for name, count in accom_dist.items()
-    ]
-    
-    # Parent sentiment
-    sentiment_dist = df['parents_sentiment'].value_counts()
-    parent_sentiments = [
+# Serialized analysis of DEFAULT_CSV as (file key, JSON bytes, ETag); the
+# file key is (mtime, size), so replacing the file invalidates it
+_initial_analysis = (None, None, None)
+_initial_analysis_lock = threading.Lock()
+
+# Result key -> CSV column for every segment distribution
+SEGMENT_COLUMNS = {
+    "geographic_segments": "geographic_segment",
+    "academic_segments": "academic_segment",
+    "socioeconomic_segments": "socioeconomic_segment",
+    "marketing_channels": "marketing_channel_type",
+    "accommodation_segments": "accommodation",
+    "parent_sentiments": "parents_sentiment",
+}
+REQUIRED_COLUMNS = list(SEGMENT_COLUMNS.values())
+
+# Rows parsed per chunk when analyzing an upload
+CSV_CHUNK_ROWS = int(os.environ.get("SEGMENTATION_CSV_CHUNK_ROWS", "100000"))
+
+# Cross-tabulations returned when requested (rows column, columns column)
+DEFAULT_CROSSTABS = [
+    ("geographic_segment", "marketing_channel_type"),
+    ("academic_segment", "marketing_channel_type"),
+]
+
+def _value_counts(series: pd.Series):
+    """Occurrences of each value (missing values excluded) with a plain object index"""
+    counts = series.value_counts(sort=False)
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(object)
+    return counts
+
+def _column_codes(series: pd.Series):
+    """Integer codes (-1 for missing) and distinct values of one column"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, sort=False)
+
+def _pair_counts(df: pd.DataFrame, rows, columns):
+    """
+    Occurrences of each (rows value, columns value) pair, missing values
+    excluded, with a plain object index. The two columns' codes are packed
+    into one integer per row and counted with np.bincount.
+    """
+    row_codes, row_values = _column_codes(df[rows])
+    column_codes, column_values = _column_codes(df[columns])
+    present = (row_codes >= 0) & (column_codes >= 0)
+    keys = row_codes[present].astype(np.int64) * len(column_values) + column_codes[present]
+    counts = np.bincount(keys, minlength=len(row_values) * len(column_values))
+    occurring = np.flatnonzero(counts)
+    row_index, column_index = np.divmod(occurring, len(column_values))
+    index = pd.MultiIndex.from_arrays(
+        [
+            np.asarray(row_values, dtype=object)[row_index],
+            np.asarray(column_values, dtype=object)[column_index],
+        ],
+        names=[rows, columns],
+    )
+    return pd.Series(counts[occurring].astype(np.int64), index=index)
+
+def segment_counts(df: pd.DataFrame, crosstabs=()):
+    """
+    Per-column value counts of every segment column plus the pair counts of
+    the requested cross-tabs. Counts from separate chunks can be combined
+    with merge_segment_counts.
+    """
+    return {
+        "columns": {column: _value_counts(df[column]) for column in REQUIRED_COLUMNS},
+        "crosstabs": {pair: _pair_counts(df, *pair) for pair in crosstabs},
+    }
+
+def _add_counts(total, counts):
+    return total.add(counts, fill_value=0).astype("int64")
+
+def merge_segment_counts(total, counts):
+    """Add one chunk's segment_counts into a running total"""
+    if total is None:
+        return counts
+    return {
+        group: {key: _add_counts(total[group][key], counts[group][key]) for key in total[group]}
+        for group in ("columns", "crosstabs")
+    }
+
+def _distribution(counts, total_students):
+    """Count and percentage per value of one column, most common first"""
+    counts = counts.sort_values(ascending=False, kind="stable")
+    return [
         {
             "name": name,
             "count": int(count),
             "percentage": round((count / total_students) * 100, 1)
         }
-        for name, count in sentiment_dist.items()
+        for name, count in counts.items()
     ]
+
+def _crosstab(counts, rows, columns):
+    """Counts of rows-column values broken down by columns-column values"""
+    result = {}
+    for (row_value, column_value), count in counts.items():
+        result.setdefault(row_value, {})[column_value] = int(count)
+    return {"rows": rows, "columns": columns, "counts": result}
+
+def analyze_segment_counts(counts, total_students, crosstabs=()):
+    """Build the analysis response from segment_counts output"""
+    analysis = {
+        "total_students": int(total_students),
+        "segments_created": 7,
+    }
+    for key, column in SEGMENT_COLUMNS.items():
+        analysis[key] = _distribution(counts["columns"][column], total_students)
     
     # Generate insights
-    insights = generate_insights(df, geographic_segments, marketing_channels, academic_segments)
+    analysis["insights"] = generate_insights(
+        analysis["geographic_segments"], analysis["marketing_channels"], analysis["academic_segments"]
+    )
     
-    return {
-        "total_students": total_students,
-        "segments_created": 7,
-        "geographic_segments": geographic_segments,
-        "academic_segments": academic_segments,
-        "socioeconomic_segments": socioeconomic_segments,
-        "marketing_channels": marketing_channels,
-        "accommodation_segments": accommodation_segments,
-        "parent_sentiments": parent_sentiments,
-        "insights": insights
-    }
+    if crosstabs:
+        analysis["crosstabs"] = [
+            _crosstab(counts["crosstabs"][(rows, columns)], rows, columns) for rows, columns in crosstabs
+        ]
+    return analysis
+
+def analyze_csv_data(df: pd.DataFrame, crosstabs=()):
+    """Analyze the segmented CSV data and return insights"""
+    return analyze_segment_counts(segment_counts(df, crosstabs), len(df), crosstabs)
+
+def read_csv_header(file):
+    """Column names from the first line of a CSV file object, rewinding it afterwards"""
+    columns = list(pd.read_csv(file, nrows=0).columns)
+    file.seek(0)
+    return columns
+
+def analyze_csv_stream(file, crosstabs=(), chunksize=CSV_CHUNK_ROWS):
+    """
+    Analyze a CSV file object chunk by chunk, parsing only the segment
+    columns as categoricals and merging each chunk's counts, so memory use
+    stays bounded by the chunk size rather than the file size
+    """
+    counts = None
+    total_students = 0
+    for chunk in pd.read_csv(file, usecols=REQUIRED_COLUMNS, dtype="category", chunksize=chunksize):
+        counts = merge_segment_counts(counts, segment_counts(chunk, crosstabs))
+        total_students += len(chunk)
+    
+    if counts is None:
+        counts = segment_counts(pd.DataFrame(columns=REQUIRED_COLUMNS), crosstabs)
+    return analyze_segment_counts(counts, total_students, crosstabs)
 
-def generate_insights(df, geo_segments, marketing_channels, academic_segments):
+def generate_insights(geo_segments, marketing_channels, academic_segments):
     """Generate marketing insights from the data"""
     
     insights = []
@@ -147,44 +214,61 @@ def generate_insights(df, geo_segments, marketing_channels, academic_segments):
     
     return insights[:4]  # Return top 4 insights
 
+def _default_csv_key():
+    stat = DEFAULT_CSV.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _build_initial_analysis(key):
+    """Analyze DEFAULT_CSV once per file version and keep the JSON bytes"""
+    global _initial_analysis
+    with _initial_analysis_lock:
+        if _initial_analysis[0] == key:
+            return _initial_analysis
+        
+        analysis = analyze_csv_data(pd.read_csv(DEFAULT_CSV))
+        # Same encoding as JSONResponse
+        body = json.dumps(analysis, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+        _initial_analysis = (key, body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+        return _initial_analysis
+
 @router.get("/initial-analysis")
-async def get_initial_analysis():
+async def get_initial_analysis(request: Request):
     """Get initial analysis from the default segmented CSV file"""
     try:
         if not DEFAULT_CSV.exists():
             raise HTTPException(status_code=404, detail="Default segmentation data not found")
         
-        # Read CSV
-        df = pd.read_csv(DEFAULT_CSV)
+        # Recomputed only when the file changes
+        key = _default_csv_key()
+        cached = _initial_analysis
+        if cached[0] != key:
+            cached = await run_in_threadpool(_build_initial_analysis, key)
+        _, body, etag = cached
         
-        # Analyze data
-        analysis = analyze_csv_data(df)
-        
-        return JSONResponse(content=analysis)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
     
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error loading initial analysis: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to load initial analysis: {str(e)}")
 
 @router.post("/analyze-new-data")
-async def analyze_new_data(file: UploadFile = File(...)):
-    """Analyze a newly uploaded CSV file"""
+async def analyze_new_data(file: UploadFile = File(...), crosstabs: bool = False):
+    """Analyze a newly uploaded CSV file; crosstabs=true adds DEFAULT_CROSSTABS"""
     try:
         # Validate file type
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="Only CSV files are allowed")
         
-        # Read uploaded CSV
-        contents = await file.read()
-        
-        # Save temporarily and analyze
-        import io
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        # Check if required columns exist
-        required_columns = ['geographic_segment', 'academic_segment', 'socioeconomic_segment', 
-                          'marketing_channel_type', 'accommodation', 'parents_sentiment']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        # The upload is spooled to a temporary file; check the header
+        # before parsing any rows
+        columns = await run_in_threadpool(read_csv_header, file.file)
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
         
         if missing_columns:
             raise HTTPException(
@@ -192,8 +276,10 @@ async def analyze_new_data(file: UploadFile = File(...)):
                 detail=f"CSV missing required columns: {', '.join(missing_columns)}"
             )
         
-        # Analyze data
-        analysis = analyze_csv_data(df)
+        # Analyze data in chunks
+        analysis = await run_in_threadpool(
+            analyze_csv_stream, file.file, DEFAULT_CROSSTABS if crosstabs else ()
+        )
         
         return JSONResponse(content=analysis)
     
@@ -0,0 +1,142 @@
+# Benchmark - Read Latency While Connects Are In Flight
+# Polls GET /api/leetcode/profile/{username} while a burst of
+# POST /api/leetcode/connect requests is running, with the LeetCode scrape
+# replaced by a blocking sleep of SCRAPE_SECONDS (no network). Compares the
+# previous behaviour (scrape called inline on the event loop) with the
+# current one (scrape offloaded with run_in_threadpool) and an idle baseline.
+# Uses a throwaway SQLite database; the scheduler is not started.
+# Run: python benchmark_api_latency.py [connects] [scrape_seconds]
+
+import sys
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp.name}/benchmark.db"
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+
+import main
+from database import Base, engine, SessionLocal
+from migrations import run_migrations
+from profile_store import upsert_profile
+
+CONNECTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+SCRAPE_SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+READ_INTERVAL = 0.01  # Pause between profile reads, seconds
+READ_USERNAME = "reader"
+
+
+def fake_leetcode_profile(username):
+    """Scraped LeetCode data shaped like LeetCodeScraper.scrape_profile output"""
+    return {
+        'username': username,
+        'profile_url': f'https://leetcode.com/u/{username}/',
+        'profile': {'real_name': username, 'avatar': None, 'ranking': 123456, 'reputation': 0, 'country': 'India'},
+        'statistics': {
+            'problems_solved': {'easy': 120, 'medium': 80, 'hard': 12, 'total': 212},
+            'total_active_days': 120,
+            'current_streak': 3,
+            'max_streak': 21,
+        },
+        'contests': {'attended_contests': 7, 'rating': 1542.37, 'global_ranking': 123456},
+        'scraped_at': datetime.now().isoformat(),
+    }
+
+
+def slow_scrape(profile_url, max_wait=None):
+    """Stand-in for LeetCodeScraper.scrape_profile: blocks like a slow upstream would"""
+    time.sleep(SCRAPE_SECONDS)
+    return fake_leetcode_profile(profile_url.rstrip("/").rsplit("/", 1)[-1])
+
+
+async def inline(func, *args, **kwargs):
+    """The previous behaviour: the blocking call runs on the event loop"""
+    return func(*args, **kwargs)
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def measure(client, connects, prefix):
+    """Poll the profile endpoint until `connects` connect requests finish; return read latencies in ms"""
+    latencies = []
+    running = True
+
+    async def reader():
+        while running:
+            started = time.perf_counter()
+            response = await client.get(f"/api/leetcode/profile/{READ_USERNAME}")
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.text
+            await asyncio.sleep(READ_INTERVAL)
+
+    async def connect(i):
+        username = f"{prefix}_{i}"
+        response = await client.post(
+            "/api/leetcode/connect",
+            json={"username": username, "profile_url": f"https://leetcode.com/u/{username}/"},
+        )
+        assert response.status_code == 200, response.text
+
+    task = asyncio.create_task(reader())
+    started = time.perf_counter()
+    if connects:
+        await asyncio.gather(*(connect(i) for i in range(connects)))
+    else:
+        await asyncio.sleep(SCRAPE_SECONDS * 2)
+    elapsed = time.perf_counter() - started
+    running = False
+    await task
+    latencies.sort()
+    return elapsed, latencies
+
+
+async def benchmark():
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Warm up routing, the session pool and the profile cache
+        for _ in range(5):
+            await client.get(f"/api/leetcode/profile/{READ_USERNAME}")
+        results["idle"] = await measure(client, 0, "idle")
+
+        main.run_in_threadpool = inline
+        results["inline scrape"] = await measure(client, CONNECTS, "inline")
+
+        main.run_in_threadpool = run_in_threadpool
+        results["run_in_threadpool"] = await measure(client, CONNECTS, "pooled")
+    return results
+
+
+def run_benchmark():
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        upsert_profile(db, 'leetcode', READ_USERNAME, fake_leetcode_profile(READ_USERNAME))
+    finally:
+        db.close()
+    main.scraper.scrape_profile = slow_scrape
+
+    results = asyncio.run(benchmark())
+
+    print("\n" + "=" * 78)
+    print(f"{CONNECTS} concurrent connects, scrape time {SCRAPE_SECONDS * 1000:.0f} ms each")
+    print(f"{'mode':<20}{'connects took':>15}{'reads':>8}{'p50':>11}{'p99':>11}{'max':>11}")
+    print("-" * 78)
+    for mode, (elapsed, latencies) in results.items():
+        print(f"{mode:<20}{elapsed:>14.2f}s{len(latencies):>8}{percentile(latencies, 0.5):>9.1f}ms"
+              f"{percentile(latencies, 0.99):>9.1f}ms{latencies[-1]:>9.1f}ms")
+    print("=" * 78 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
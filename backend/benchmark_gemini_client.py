@@ -0,0 +1,170 @@
+# Benchmark - Gemini Client Connection Reuse
+# Fires rounds of concurrent generateContent calls at a local HTTPS stub of
+# the Gemini API, once with a new httpx.AsyncClient per request (the old
+# behaviour) and once with the shared pooled client, and reports latency and
+# how many TLS connections the stub had to accept.
+# Needs the openssl CLI to create a throwaway certificate.
+# Run: python benchmark_gemini_client.py [concurrency] [rounds]
+
+import sys
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx
+
+from app.routes.ai_suggestions import build_gemini_client, GENERATION_CONFIG
+
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+STUB_LATENCY = 0.05  # Simulated generation time per call, seconds
+
+STUB_BODY = json.dumps({
+    "candidates": [{
+        "content": {"parts": [{"text": json.dumps({"caption": "stub", "hashtags": ["#stub"]})}]},
+        "finishReason": "STOP",
+    }]
+}).encode()
+
+
+class StubGeminiServer:
+    """Minimal HTTP/1.1 keep-alive server over TLS, run on its own thread and loop"""
+
+    def __init__(self, certfile, keyfile):
+        self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        self.ssl_context.load_cert_chain(certfile, keyfile)
+        self.connections = 0
+        self.port = None
+        self._ready = threading.Event()
+        self._loop = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(STUB_LATENCY)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(STUB_BODY)}\r\n\r\n".encode()
+                    + STUB_BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(
+            asyncio.start_server(self._handle, "127.0.0.1", 0, ssl=self.ssl_context, backlog=1024)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def make_certificate(directory):
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-keyout", keyfile, "-out", certfile, "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def payload():
+    return {"contents": [{"parts": [{"text": "Project Title: benchmark"}]}], "generationConfig": GENERATION_CONFIG}
+
+
+async def per_request_client(url, verify):
+    async with httpx.AsyncClient(timeout=30.0, verify=verify) as client:
+        response = await client.post(url, json=payload())
+    response.raise_for_status()
+
+
+async def run_rounds(call):
+    latencies = []
+
+    async def timed():
+        started = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(timed() for _ in range(CONCURRENCY)))
+    total = time.perf_counter() - started
+    latencies.sort()
+    return total, statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def benchmark(server, certfile):
+    url = f"https://localhost:{server.port}/v1beta/models/stub:generateContent"
+    verify = ssl.create_default_context(cafile=certfile)
+    results = {}
+
+    server.connections = 0
+    results["client per request"] = (*await run_rounds(lambda: per_request_client(url, verify)), server.connections)
+
+    server.connections = 0
+    client = build_gemini_client(verify=verify)
+
+    async def shared_client():
+        response = await client.post(url, json=payload())
+        response.raise_for_status()
+
+    try:
+        results["shared client"] = (*await run_rounds(shared_client), server.connections)
+    finally:
+        await client.aclose()
+    return results
+
+
+def run_benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        certfile, keyfile = make_certificate(tmp)
+        server = StubGeminiServer(certfile, keyfile)
+        server.start()
+        try:
+            results = asyncio.run(benchmark(server, certfile))
+        finally:
+            server.stop()
+
+    calls = CONCURRENCY * ROUNDS
+    print("\n" + "=" * 78)
+    print(f"{calls} calls, {CONCURRENCY} concurrent, stub latency {STUB_LATENCY * 1000:.0f} ms")
+    print(f"{'mode':<22}{'total':>10}{'mean':>12}{'p95':>12}{'TLS handshakes':>18}")
+    print("-" * 78)
+    for mode, (total, mean_ms, p95_ms, connections) in results.items():
+        print(f"{mode:<22}{total:>9.2f}s{mean_ms:>10.1f}ms{p95_ms:>10.1f}ms{connections:>18}")
+    print("=" * 78 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,160 @@
+# Benchmark - HackerRank Profile Fan-out
+# Scrapes profiles through hackerrank_scraper.scrape_profile against a local
+# HTTP stub of /rest/hackers/{u}, /scores_elo and /badges that answers each
+# call after STUB_LATENCY, once with the three calls made one after another
+# (the old behaviour) and once fanned out concurrently on the shared pool.
+# Also scrapes with the badges endpoint failing to show partial results.
+# Run: python benchmark_hackerrank_fanout.py [profiles] [stub_latency_ms]
+
+import sys
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from scrapers import hackerrank_scraper, http_client, rate_limit
+
+PROFILES = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+STUB_LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+HACKERRANK_BASE = "https://www.hackerrank.com"
+
+PROFILE_BODY = {"model": {"name": "Stub Student", "country": "India", "level": 5}}
+SCORES_BODY = [{"category": "Python", "score": 120.0}, {"category": "Problem Solving", "score": 340.0}]
+BADGES_BODY = {"models": [{"badge_type": "python", "stars": 4, "current_points": 120}]}
+
+
+class StubHackerRankServer:
+    """Minimal HTTP/1.1 keep-alive server for the three REST endpoints, run on its own thread and loop"""
+
+    def __init__(self):
+        self.requests = 0
+        self.fail_badges = False
+        self.port = None
+        self._ready = threading.Event()
+        self._loop = None
+
+    def _route(self, path):
+        if path.endswith("/scores_elo"):
+            return 200, SCORES_BODY
+        if path.endswith("/badges"):
+            return (500, {"error": "stub failure"}) if self.fail_badges else (200, BADGES_BODY)
+        return 200, PROFILE_BODY
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                self.requests += 1
+                path = head.split(b" ", 2)[1].decode()
+                await asyncio.sleep(STUB_LATENCY)
+                status, data = self._route(path)
+                body = json.dumps(data).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Cancelled by stop(): end the connection quietly
+            pass
+        finally:
+            writer.close()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0, backlog=1024))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    async def _close_connections(self):
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._close_connections(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class InlineExecutor:
+    """Runs each submitted call immediately, reproducing the sequential scrape"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def run_profiles(label):
+    latencies = []
+    failed = 0
+    for i in range(PROFILES):
+        started = time.perf_counter()
+        result = hackerrank_scraper.scrape_profile(f"{label}_{i}")
+        latencies.append((time.perf_counter() - started) * 1000)
+        failed += bool(result['full_data']['failed_endpoints'])
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.95) - 1], failed
+
+
+def run_benchmark():
+    server = StubHackerRankServer()
+    server.start()
+    stub_base = f"http://127.0.0.1:{server.port}"
+
+    # Send the scraper's requests to the stub, without the production rate limit
+    get_json = hackerrank_scraper._get_json
+    hackerrank_scraper._get_json = lambda url, headers, max_wait=None: get_json(
+        url.replace(HACKERRANK_BASE, stub_base), headers, max_wait
+    )
+    rate_limit._buckets["127.0.0.1"] = rate_limit.TokenBucket(10 ** 6, 1, 10 ** 6)
+    # Retrying the failing endpoint would only measure the backoff
+    rate_limit.MAX_RETRIES = 0
+
+    get_pool = hackerrank_scraper._get_fanout_pool
+    results = {}
+    try:
+        hackerrank_scraper.scrape_profile("warmup")
+
+        hackerrank_scraper._get_fanout_pool = InlineExecutor
+        server.requests = 0
+        results["sequential"] = (*run_profiles("sequential"), server.requests)
+
+        hackerrank_scraper._get_fanout_pool = get_pool
+        server.requests = 0
+        results["concurrent"] = (*run_profiles("concurrent"), server.requests)
+
+        server.fail_badges = True
+        server.requests = 0
+        results["concurrent, badges 500"] = (*run_profiles("partial"), server.requests)
+    finally:
+        hackerrank_scraper._get_fanout_pool = get_pool
+        hackerrank_scraper._get_json = get_json
+        http_client.close()
+        server.stop()
+
+    print("\n" + "=" * 78)
+    print(f"{PROFILES} profiles scraped one at a time, stub latency {STUB_LATENCY * 1000:.0f} ms per call")
+    print(f"{'mode':<26}{'mean':>12}{'p95':>12}{'stub calls':>12}{'partial':>10}")
+    print("-" * 78)
+    for mode, (mean_ms, p95_ms, failed, calls) in results.items():
+        print(f"{mode:<26}{mean_ms:>10.1f}ms{p95_ms:>10.1f}ms{calls:>12}{failed:>10}")
+    print("=" * 78 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,152 @@
+# Benchmark - PDF Text Extraction
+# Compares the previous inline extraction (every page, text += ..., on the
+# event loop) with pdf_extraction.extract_pdf_text on synthetic text PDFs.
+# Reports wall time, characters returned and the worst event-loop stall seen
+# by a 10 ms ticker running alongside, then the estimated prompt tokens before
+# and after prompt_compaction.compact_text.
+# Run: python benchmark_pdf_extraction.py [pages,pages,...]
+
+import sys
+import asyncio
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import PyPDF2
+
+import pdf_extraction
+from prompt_compaction import compact_text, estimate_tokens, PDF_PROMPT_TOKEN_BUDGET
+
+SIZES = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [5, 50, 200, 1000]
+LINES_PER_PAGE = 50
+TICK_SECONDS = 0.01
+
+BODY_WORDS = (
+    "the system students attendance camera model accuracy database module records college "
+    "recognition dataset results latency users deployed cloud interface faculty report"
+).split()
+SECTION_TITLES = ["Introduction", "Methodology", "Implementation", "Results", "Evaluation", "Conclusion", "References"]
+
+
+def page_lines(page, pages, rng):
+    """Running header and footer around varied body text, with a section heading every 10 pages"""
+    lines = ["Smart Campus Attendance System - Final Project Report"]
+    if page == 0:
+        lines += ["Abstract", "We built a face-recognition attendance system with Python, FastAPI and React."]
+    elif page % 10 == 0:
+        lines.append(f"{page // 10}. {SECTION_TITLES[(page // 10) % len(SECTION_TITLES)]}")
+    while len(lines) < LINES_PER_PAGE - 1:
+        lines.append(" ".join(rng.choice(BODY_WORDS) for _ in range(12)) + ".")
+    lines.append(f"Page {page + 1} of {pages}")
+    return lines
+
+
+def synthetic_pdf(pages):
+    """Minimal PDF with LINES_PER_PAGE lines of Helvetica text on every page"""
+    rng = random.Random(7)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        lines = [f"({line}) Tj T*" for line in page_lines(page, pages, rng)]
+        stream = ("BT /F1 10 Tf 12 TL 40 800 Td\n" + "\n".join(lines) + "\nET").encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def previous_extract_text_from_pdf(pdf_file):
+    """The previous implementation, called directly from the async handler"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
+    text = ""
+    for page_num in range(len(pdf_reader.pages)):
+        page = pdf_reader.pages[page_num]
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+async def measure(coroutine):
+    """Run coroutine next to a ticker; return (seconds, result, worst stall in ms)"""
+    stalls = []
+    running = True
+
+    async def ticker():
+        loop = asyncio.get_running_loop()
+        while running:
+            expected = loop.time() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            stalls.append(max(0.0, loop.time() - expected))
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    result = await coroutine
+    elapsed = time.perf_counter() - started
+    running = False
+    await task
+    return elapsed, result, max(stalls, default=0.0) * 1000
+
+
+async def previous(pdf_bytes):
+    return previous_extract_text_from_pdf(pdf_bytes)
+
+
+async def run_benchmark():
+    executor = pdf_extraction.get_executor()
+    # Start the worker processes before timing anything
+    with tempfile.TemporaryDirectory() as tmp:
+        warmup_path = Path(tmp) / "warmup.pdf"
+        warmup_path.write_bytes(synthetic_pdf(1))
+        await asyncio.gather(*(
+            asyncio.get_running_loop().run_in_executor(executor, pdf_extraction.extract_page_range, str(warmup_path), 0, 1, 1)
+            for _ in range(pdf_extraction.PDF_EXTRACT_WORKERS)
+        ))
+
+    print("\n" + "=" * 118)
+    print(f"workers={pdf_extraction.PDF_EXTRACT_WORKERS} max_pages={pdf_extraction.PDF_MAX_PAGES} "
+          f"char_limit={pdf_extraction.PDF_TEXT_CHAR_LIMIT} pages_per_task={pdf_extraction.PDF_PAGES_PER_TASK} "
+          f"token_budget={PDF_PROMPT_TOKEN_BUDGET}")
+    print(f"{'pages':>7}{'size':>10}{'previous':>12}{'stall':>10}{'chars':>10}"
+          f"{'pooled':>12}{'stall':>10}{'chars':>10}{'tokens before':>15}{'after':>9}{'compact':>12}")
+    print("-" * 118)
+    for pages in SIZES:
+        pdf_bytes = synthetic_pdf(pages)
+        old_seconds, old_text, old_stall = await measure(previous(pdf_bytes))
+        new_seconds, new_text, new_stall = await measure(pdf_extraction.extract_pdf_text(pdf_bytes))
+        assert old_text.startswith(new_text[:1000].replace("\f", "\n"))
+        started = time.perf_counter()
+        compacted = compact_text(new_text)
+        compact_ms = (time.perf_counter() - started) * 1000
+        print(f"{pages:>7}{len(pdf_bytes) / 1024:>8.0f}KB{old_seconds * 1000:>10.0f}ms{old_stall:>8.0f}ms{len(old_text):>10,}"
+              f"{new_seconds * 1000:>10.0f}ms{new_stall:>8.0f}ms{len(new_text):>10,}"
+              f"{estimate_tokens(old_text):>15,}{estimate_tokens(compacted):>9,}{compact_ms:>10.0f}ms")
+    print("=" * 118 + "\n")
+    pdf_extraction.shutdown_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
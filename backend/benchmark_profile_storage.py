@@ -0,0 +1,129 @@
+# Benchmark - Profile Row Size and Read Latency
+# Compares the old layout (full_data JSON inline in the profile row) with the
+# current one (full_data compressed in profile_payloads) on a synthetic
+# database. Run: python benchmark_profile_storage.py [students]
+
+import sys
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, select, text, MetaData, Column, JSON
+
+from models import LeetCodeProfile, ProfilePayload
+from profile_store import profile_row
+
+STUDENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+READS = 2000
+
+
+def fake_leetcode_profile(i):
+    """Scraped LeetCode data shaped like LeetCodeScraper.scrape_profile output"""
+    return {
+        'username': f'lc_user_{i}',
+        'profile_url': f'https://leetcode.com/u/lc_user_{i}/',
+        'profile': {
+            'real_name': f'Student {i}',
+            'avatar': f'https://assets.leetcode.com/users/avatars/avatar_{i}.png',
+            'ranking': random.randint(1000, 5000000),
+            'reputation': random.randint(0, 200),
+            'country': 'India',
+        },
+        'statistics': {
+            'problems_solved': {'easy': 120, 'medium': 80, 'hard': 12, 'total': 212},
+            'total_active_days': 120,
+            'current_streak': 3,
+            'max_streak': 21,
+        },
+        'contests': {'attended_contests': 7, 'rating': 1542.37, 'global_ranking': 123456},
+        'last_active_at': (datetime(2025, 1, 1) + timedelta(days=random.randrange(365))).isoformat(),
+        'scraped_at': datetime.now().isoformat(),
+    }
+
+
+def legacy_table():
+    """leetcode_profiles as it was before full_data moved out"""
+    table = LeetCodeProfile.__table__.to_metadata(MetaData())
+    table.append_column(Column('full_data', JSON, nullable=True))
+    return table
+
+
+def table_bytes(engine, name):
+    """On-disk bytes used by a table, from SQLite's dbstat virtual table"""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT SUM(pgsize) FROM dbstat WHERE name = :name"), {'name': name}).scalar()
+        except Exception:
+            return None
+
+
+def build(engine, rows, inline):
+    """Create and fill one layout"""
+    if inline:
+        table = legacy_table()
+        table.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(table.insert(), rows)
+        return table
+
+    LeetCodeProfile.__table__.create(engine)
+    ProfilePayload.__table__.create(engine)
+    profiles = [{k: v for k, v in row.items() if k != 'full_data'} for row in rows]
+    payloads = [
+        {'platform': 'leetcode', 'username': row['username'], 'data': row['full_data'], 'updated_at': row['last_updated']}
+        for row in rows
+    ]
+    with engine.begin() as conn:
+        conn.execute(LeetCodeProfile.__table__.insert(), profiles)
+        conn.execute(ProfilePayload.__table__.insert(), payloads)
+    return LeetCodeProfile.__table__
+
+
+def time_reads(engine, table, usernames):
+    """Latency of single-profile lookups, as done by GET /api/leetcode/profile/{username}"""
+    timings = []
+    with engine.connect() as conn:
+        for username in usernames:
+            started = time.perf_counter()
+            conn.execute(select(table).where(table.c.username == username)).first()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.mean(timings), statistics.median(timings)
+
+
+def run_benchmark():
+    random.seed(7)
+    print(f"\nBuilding {STUDENTS} LeetCode profiles...")
+    rows = [profile_row('leetcode', f'student{i}', fake_leetcode_profile(i)) for i in range(STUDENTS)]
+    lookups = [f'student{random.randrange(STUDENTS)}' for _ in range(READS)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, inline in (('inline full_data', True), ('profile_payloads', False)):
+            path = os.path.join(tmp, f"{'inline' if inline else 'split'}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            table = build(engine, rows, inline)
+            time_reads(engine, table, lookups[:200])  # warm the page cache
+            mean_us, median_us = time_reads(engine, table, lookups)
+            profile_bytes = table_bytes(engine, 'leetcode_profiles')
+            payload_bytes = table_bytes(engine, 'profile_payloads') if not inline else 0
+            results[label] = (profile_bytes, payload_bytes, os.path.getsize(path), mean_us, median_us)
+            engine.dispose()
+
+    print("\n" + "=" * 82)
+    print(f"{'layout':<20}{'profile B/row':>15}{'payload B/row':>15}{'db size':>12}{'read mean':>11}{'p50':>9}")
+    print("-" * 82)
+    for label, (profile_bytes, payload_bytes, db_size, mean_us, median_us) in results.items():
+        per_row = f"{profile_bytes / STUDENTS:.0f}" if profile_bytes else "n/a"
+        per_payload = f"{payload_bytes / STUDENTS:.0f}" if payload_bytes else "-"
+        print(f"{label:<20}{per_row:>15}{per_payload:>15}{db_size / 1024 / 1024:>10.1f}MB"
+              f"{mean_us:>9.0f}us{median_us:>7.0f}us")
+    print("=" * 82 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
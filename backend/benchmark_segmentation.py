@@ -0,0 +1,79 @@
+# Benchmark - Segment Aggregation
+# Times analyze_csv_data (per-column value_counts, optionally with the pair
+# counts of the cross-tabs) against the original six value_counts() calls
+# on synthetic admissions data.
+# Run: python benchmark_segmentation.py [rows,rows,...]
+
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import pandas as pd
+
+from app.routes.segmentation import SEGMENT_COLUMNS, DEFAULT_CROSSTABS, analyze_csv_data
+
+SIZES = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1_000_000, 10_000_000]
+
+# Values and weights roughly matching the bundled segmented CSV
+SEGMENT_VALUES = {
+    "geographic_segment": (["Local", "Regional", "Metro"], [0.7, 0.24, 0.06]),
+    "academic_segment": (["Average Performer", "High Performer", "Low Performer"], [0.5, 0.3, 0.2]),
+    "socioeconomic_segment": (["Middle Class", "Lower Middle", "Upper Middle", "Economically Weaker"], [0.4, 0.3, 0.2, 0.1]),
+    "marketing_channel_type": (["Digital", "Other", "Traditional", "Referral"], [0.35, 0.28, 0.19, 0.18]),
+    "accommodation": (["Day Scholar", "Hostel"], [0.6, 0.4]),
+    "parents_sentiment": (["Positive", "Neutral", "Concerned"], [0.5, 0.3, 0.2]),
+}
+
+
+def synthetic_frame(rows, categorical):
+    """Segment columns only, as read from an admissions export"""
+    rng = np.random.default_rng(7)
+    data = {}
+    for column, (values, weights) in SEGMENT_VALUES.items():
+        codes = rng.choice(len(values), size=rows, p=weights).astype(np.int8)
+        series = pd.Series(pd.Categorical.from_codes(codes, values))
+        data[column] = series if categorical else series.astype(object)
+    return pd.DataFrame(data)
+
+
+def value_counts_baseline(df):
+    """The previous implementation: one value_counts() and list build per column"""
+    total_students = len(df)
+    result = {}
+    for key, column in SEGMENT_COLUMNS.items():
+        result[key] = [
+            {"name": name, "count": int(count), "percentage": round((count / total_students) * 100, 1)}
+            for name, count in df[column].value_counts().items()
+        ]
+    return result
+
+
+def best_of(function, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def run_benchmark():
+    print("\n" + "=" * 78)
+    print(f"{'rows':>12}{'dtype':>12}{'value_counts x6':>18}{'analysis':>16}{'+ crosstabs':>16}")
+    print("-" * 78)
+    for rows in SIZES:
+        for categorical in (True, False):
+            df = synthetic_frame(rows, categorical)
+            baseline = best_of(lambda: value_counts_baseline(df))
+            analysis = best_of(lambda: analyze_csv_data(df))
+            with_crosstabs = best_of(lambda: analyze_csv_data(df, DEFAULT_CROSSTABS))
+            dtype = "category" if categorical else "object"
+            print(f"{rows:>12,}{dtype:>12}{baseline:>16.0f}ms{analysis:>14.0f}ms{with_crosstabs:>14.0f}ms")
+            del df
+    print("=" * 78 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
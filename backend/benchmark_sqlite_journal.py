@@ -0,0 +1,159 @@
+# Benchmark - SQLite Journal Modes Under Concurrent Reads and Writes
+# One writer process updates batches of leetcode_profiles rows (as the
+# scheduler does) while reader processes look up single profiles (as API
+# workers do), first with the previous defaults (rollback journal,
+# synchronous=FULL) and then with the settings database.py now applies
+# (WAL, synchronous=NORMAL, mmap). Reports throughput, read latency and
+# "database is locked" errors for each mode on a throwaway database file.
+# Run: python benchmark_sqlite_journal.py [readers] [seconds]
+
+import sys
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.exc import OperationalError
+
+import database
+from models import LeetCodeProfile
+
+READERS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+STUDENTS = 5000
+WRITE_BATCH = 200  # Rows updated per write transaction
+
+MODES = {
+    "rollback (previous)": {"journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0},
+    "WAL (database.py)": {
+        "journal_mode": database.SQLITE_JOURNAL_MODE,
+        "synchronous": database.SQLITE_SYNCHRONOUS,
+        "mmap_size": database.SQLITE_MMAP_SIZE,
+    },
+}
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": database.SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
+
+def seed(engine):
+    LeetCodeProfile.__table__.create(engine)
+    now = datetime.now()
+    rows = [
+        {'username': f'student_{i}', 'leetcode_username': f'lc_{i}', 'profile_url': f'https://leetcode.com/u/lc_{i}/',
+         'real_name': f'Student {i}', 'ranking': random.randint(1000, 5000000), 'total_solved': random.randint(0, 900),
+         'last_updated': now}
+        for i in range(STUDENTS)
+    ]
+    with engine.begin() as conn:
+        conn.execute(LeetCodeProfile.__table__.insert(), rows)
+
+
+def writer(path, pragmas, stop, results):
+    engine = make_engine(path, pragmas)
+    table = LeetCodeProfile.__table__
+    rng = random.Random(1)
+    writes = locked = 0
+    while not stop.is_set():
+        start = rng.randrange(STUDENTS - WRITE_BATCH)
+        try:
+            with engine.begin() as conn:
+                for i in range(start, start + WRITE_BATCH):
+                    conn.execute(
+                        update(table).where(table.c.username == f'student_{i}')
+                        .values(total_solved=rng.randint(0, 900), last_updated=datetime.now())
+                    )
+            writes += 1
+        except OperationalError:
+            locked += 1
+    results.put(('writer', writes, locked))
+
+
+def reader(path, pragmas, stop, results, seed):
+    engine = make_engine(path, pragmas)
+    table = LeetCodeProfile.__table__
+    rng = random.Random(seed)
+    latencies = []
+    locked = 0
+    while not stop.is_set():
+        username = f'student_{rng.randrange(STUDENTS)}'
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(table).where(table.c.username == username)).first()
+        except OperationalError:
+            locked += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+    results.put(('reader', latencies, locked))
+
+
+def run_mode(path, pragmas):
+    """One writer and READERS reader processes, as separate API workers and the scheduler would be"""
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=writer, args=(path, pragmas, stop, results))] + [
+        multiprocessing.Process(target=reader, args=(path, pragmas, stop, results, i)) for i in range(READERS)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(SECONDS)
+    stop.set()
+
+    read_latencies = []
+    writes = locked = 0
+    for _ in processes:
+        role, value, errors = results.get()
+        locked += errors
+        if role == 'writer':
+            writes = value
+        else:
+            read_latencies.extend(value)
+    for process in processes:
+        process.join()
+
+    read_latencies.sort()
+    p99 = read_latencies[int(len(read_latencies) * 0.99) - 1] if read_latencies else float('nan')
+    worst = read_latencies[-1] if read_latencies else float('nan')
+    return len(read_latencies) / SECONDS, writes * WRITE_BATCH / SECONDS, p99, worst, locked
+
+
+def run_benchmark():
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, pragmas in MODES.items():
+            path = os.path.join(tmp, f"{pragmas['journal_mode'].lower()}.db")
+            engine = make_engine(path, pragmas)
+            seed(engine)
+            engine.dispose()
+            results[mode] = run_mode(path, pragmas)
+
+    print("\n" + "=" * 86)
+    print(f"{READERS} readers + 1 writer for {SECONDS:.0f}s, {STUDENTS} profiles, {WRITE_BATCH} rows per write")
+    print(f"{'mode':<22}{'reads/s':>10}{'rows written/s':>16}{'read p99':>12}{'read max':>12}{'locked':>9}")
+    print("-" * 86)
+    for mode, (reads, writes, p99, worst, locked) in results.items():
+        print(f"{mode:<22}{reads:>10.0f}{writes:>16.0f}{p99:>10.1f}ms{worst:>10.1f}ms{locked:>9}")
+    print("=" * 86 + "\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
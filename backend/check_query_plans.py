@@ -0,0 +1,149 @@
+# Query Plan Check - Leaderboard and Staleness Queries
+# Runs the real leaderboard_page and RefreshQueue.next_batch queries against
+# a throwaway SQLite database, captures the SQL they send, and checks with
+# EXPLAIN QUERY PLAN that each one is served by its ix_* index instead of a
+# full table scan. Exits non-zero if any query misses its index.
+# Run: python check_query_plans.py [profiles]
+
+import sys
+import random
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import LeetCodeProfile, GitHubProfile, HackerRankProfile, LeaderboardEntry
+from leaderboard import PLATFORM_COLUMNS, PLATFORM_METRICS, COMBINED_METRICS, leaderboard_page
+from refresh_queue import RefreshQueue
+
+PROFILES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+def seed(db):
+    """PROFILES students on every platform, with leaderboard entries and spread-out refresh times"""
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    profiles = {LeetCodeProfile: [], GitHubProfile: [], HackerRankProfile: []}
+    entries = []
+    for i in range(PROFILES):
+        username = f'student_{i}'
+        last_updated = now - timedelta(minutes=rng.randrange(3 * 24 * 60))
+        profiles[LeetCodeProfile].append({
+            'username': username, 'leetcode_username': f'lc_{i}', 'profile_url': f'https://leetcode.com/u/lc_{i}/',
+            'total_solved': rng.randrange(900), 'contest_rating': rng.uniform(1200, 2500), 'last_updated': last_updated,
+        })
+        profiles[GitHubProfile].append({
+            'username': username, 'github_username': f'gh_{i}', 'profile_url': f'https://github.com/gh_{i}',
+            'total_stars': rng.randrange(300), 'last_updated': last_updated,
+        })
+        profiles[HackerRankProfile].append({
+            'username': username, 'hackerrank_username': f'hr_{i}', 'profile_url': f'https://www.hackerrank.com/hr_{i}',
+            'total_score': rng.uniform(0, 3000), 'last_updated': last_updated,
+        })
+        entry = {'username': username, 'batch': f'20{20 + i % 6}', 'combined_score': rng.uniform(0, 2000)}
+        for columns in PLATFORM_COLUMNS.values():
+            for column in columns.values():
+                entry[column] = f'{column}_{i}' if column.endswith('_username') else rng.randrange(1000)
+        entries.append(entry)
+
+    for model, rows in profiles.items():
+        db.bulk_insert_mappings(model, rows)
+    db.bulk_insert_mappings(LeaderboardEntry, entries)
+    db.commit()
+
+
+def capture_statements(engine, run):
+    """SQL and parameters of every SELECT issued while run() executes"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def query_plan(engine, statement, parameters):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def checks():
+    """(description, callable that runs the query against a session, index that must serve it)"""
+    for platform, metrics in PLATFORM_METRICS.items():
+        for metric in metrics:
+            column = PLATFORM_COLUMNS[platform][metric]
+            yield (
+                f"{platform} leaderboard by {metric}",
+                lambda db, platform=platform, metric=metric: leaderboard_page(db, platform=platform, sort=metric),
+                f"ix_leaderboard_entries_{column}",
+            )
+    for metric in COMBINED_METRICS:
+        yield (
+            f"combined leaderboard by {metric}",
+            lambda db, metric=metric: leaderboard_page(db, sort=metric),
+            f"ix_leaderboard_entries_{metric}",
+        )
+    yield (
+        "combined leaderboard for one batch",
+        lambda db: leaderboard_page(db, batch='2021'),
+        "ix_leaderboard_batch_combined",
+    )
+    for model in (LeetCodeProfile, GitHubProfile, HackerRankProfile):
+        yield (
+            f"{model.__tablename__} staleness",
+            lambda db, model=model: RefreshQueue(model).next_batch(db, 50),
+            f"ix_{model.__tablename__}_last_updated",
+        )
+
+
+def run_check():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/query_plans.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        try:
+            seed(db)
+            with engine.connect() as conn:
+                sqlite_version = conn.execute(text("SELECT sqlite_version()")).scalar()
+
+            print("\n" + "=" * 108)
+            print(f"{PROFILES} students, SQLite {sqlite_version}")
+            print(f"{'query':<50}{'expected index':<50}{'result':>8}")
+            print("-" * 108)
+            for description, run, index in checks():
+                statements = capture_statements(engine, lambda: run(db))
+                # For leaderboard pages it is the ORDER BY ... LIMIT query that must use the index
+                statements = [item for item in statements if "ORDER BY" in item[0]] or statements
+                plans = [query_plan(engine, statement, parameters) for statement, parameters in statements]
+                used = any(index in detail for plan in plans for detail in plan)
+                failures += not used
+                print(f"{description:<50}{index:<50}{'ok' if used else 'MISSING':>8}")
+                if not used:
+                    for plan in plans:
+                        for detail in plan:
+                            print(f"    {detail}")
+            print("=" * 108 + "\n")
+        finally:
+            db.close()
+            engine.dispose()
+
+    if failures:
+        print(f"{failures} queries do not use their index")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_check()
@@ -0,0 +1,102 @@
+"""
+Incremental parser for a JSON object that arrives in pieces.
+
+Model output is streamed as text fragments, sometimes wrapped in markdown
+fences or prose. The parser skips everything before the first '{', then
+reports each top-level member as soon as its value is complete, so a
+caption can be shown while the hashtags are still being generated. Every
+character is scanned once; only the member being received is buffered.
+"""
+
+import json
+
+
+class IncrementalJSONParser:
+    """Feed text with feed(); completed top-level members are returned as (key, value) pairs"""
+
+    def __init__(self):
+        self.fields = {}
+        self.done = False
+        self._started = False
+        self._buffer = ""  # Text of the current member, from after '{' or ','
+        self._scanned = 0  # Characters of _buffer already scanned
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str):
+        if self.done or not text:
+            return []
+        if not self._started:
+            start = text.find("{")
+            if start < 0:
+                return []
+            self._started = True
+            self._depth = 1
+            text = text[start + 1:]
+
+        self._buffer += text
+        members = []
+        buffer = self._buffer
+        i = self._scanned
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+
+            # A ',' or the closing '}' at the top level ends one member
+            if not self._in_string and (self._depth == 0 or (self._depth == 1 and char == ",")):
+                member = self._member(buffer[:i])
+                if member is not None:
+                    self.fields[member[0]] = member[1]
+                    members.append(member)
+                buffer = buffer[i + 1:]
+                i = 0
+                if self._depth == 0:
+                    self.done = True
+                    buffer = ""
+                    break
+                continue
+            i += 1
+
+        self._buffer = buffer
+        self._scanned = i
+        return members
+
+    @staticmethod
+    def _member(text):
+        if not text.strip():
+            return None
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON member: {text.strip()[:200]}") from e
+        if len(member) != 1:
+            raise ValueError(f"Invalid JSON member: {text.strip()[:200]}")
+        return next(iter(member.items()))
+
+    def close(self) -> dict:
+        """The complete object; raises ValueError if none was found or it was cut off"""
+        if not self._started:
+            raise ValueError("No JSON object found")
+        if not self.done:
+            raise ValueError("JSON object is incomplete")
+        return self.fields
+
+
+def parse_json_object(text: str) -> dict:
+    """Parse the first JSON object in text, ignoring any surrounding prose or markdown fences"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,230 @@
+"""
+Precomputed cohort leaderboard.
+
+leaderboard_entries holds one row per student with the ranking metrics of
+every connected platform and a weighted combined score. profile_store keeps
+it in sync on each profile write and disconnect, so leaderboard pages are
+read straight off the per-metric indexes (ORDER BY ... LIMIT) instead of
+sorting the profile tables on every request.
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+
+from models import User, LeaderboardEntry, LeetCodeProfile, GitHubProfile, HackerRankProfile
+
+# Profile column -> leaderboard column, per platform. The first entry is the
+# platform username, which is NULL exactly when the platform is not connected.
+PLATFORM_COLUMNS = {
+    'leetcode': {
+        'leetcode_username': 'leetcode_username',
+        'total_solved': 'leetcode_total_solved',
+        'hard_solved': 'leetcode_hard_solved',
+        'contest_rating': 'leetcode_contest_rating',
+        'max_streak': 'leetcode_max_streak',
+    },
+    'github': {
+        'github_username': 'github_username',
+        'total_stars': 'github_total_stars',
+        'followers': 'github_followers',
+        'public_repos': 'github_public_repos',
+    },
+    'hackerrank': {
+        'hackerrank_username': 'hackerrank_username',
+        'total_score': 'hackerrank_total_score',
+        'total_badges': 'hackerrank_total_badges',
+        'level': 'hackerrank_level',
+    },
+}
+
+PLATFORM_MODELS = {
+    'leetcode': LeetCodeProfile,
+    'github': GitHubProfile,
+    'hackerrank': HackerRankProfile,
+}
+
+# Sortable metrics per platform leaderboard, default first
+PLATFORM_METRICS = {
+    platform: [column for column in columns if not column.endswith('_username')]
+    for platform, columns in PLATFORM_COLUMNS.items()
+}
+
+# Points per unit of each metric in the combined score
+COMBINED_SCORE_WEIGHTS = {
+    'leetcode_total_solved': 1.0,
+    'leetcode_hard_solved': 2.0,
+    'leetcode_contest_rating': 0.05,
+    'github_total_stars': 0.5,
+    'github_public_repos': 0.5,
+    'hackerrank_total_score': 0.05,
+    'hackerrank_total_badges': 2.0,
+}
+
+# Sortable columns on the combined leaderboard, default first
+COMBINED_METRICS = ['combined_score'] + [
+    column
+    for columns in PLATFORM_COLUMNS.values()
+    for column in columns.values()
+    if not column.endswith('_username')
+]
+
+_IN_CHUNK = 500
+
+
+def _combined_score_expression():
+    """SQL expression computing combined_score from the stored metrics"""
+    return sum(
+        func.coalesce(getattr(LeaderboardEntry, column), 0) * weight
+        for column, weight in COMBINED_SCORE_WEIGHTS.items()
+    )
+
+
+def _user_batches(db: Session, usernames):
+    batches = {}
+    for start in range(0, len(usernames), _IN_CHUNK):
+        chunk = usernames[start:start + _IN_CHUNK]
+        batches.update(db.query(User.username, User.batch).filter(User.username.in_(chunk)))
+    return batches
+
+
+def entry_rows(db: Session, platform, rows):
+    """
+    Leaderboard column dicts for one platform's profile rows (profile_store
+    rows). Metrics missing from the rows are left out.
+    """
+    columns = PLATFORM_COLUMNS[platform]
+    batches = _user_batches(db, [row['username'] for row in rows])
+    now = datetime.utcnow()
+    return [
+        {
+            'username': row['username'],
+            'batch': batches.get(row['username']),
+            **{entry_column: row[column] for column, entry_column in columns.items() if column in row},
+            'updated_at': now,
+        }
+        for row in rows
+    ]
+
+
+def update_combined_scores(db: Session, usernames=None):
+    """Recompute combined_score for the given students (all when None). Does not commit."""
+    expression = _combined_score_expression()
+    if usernames is None:
+        db.query(LeaderboardEntry).update({LeaderboardEntry.combined_score: expression}, synchronize_session=False)
+        return
+
+    for start in range(0, len(usernames), _IN_CHUNK):
+        chunk = usernames[start:start + _IN_CHUNK]
+        db.query(LeaderboardEntry).filter(LeaderboardEntry.username.in_(chunk)).update(
+            {LeaderboardEntry.combined_score: expression}, synchronize_session=False
+        )
+
+
+def clear_platform(db: Session, platform, username):
+    """
+    Drop one platform's metrics from a student's entry after a disconnect,
+    removing the entry once no platform is left. Does not commit.
+    """
+    entries = db.query(LeaderboardEntry).filter(LeaderboardEntry.username == username)
+    entries.update(
+        {column: None for column in PLATFORM_COLUMNS[platform].values()},
+        synchronize_session=False,
+    )
+    entries.filter(
+        LeaderboardEntry.leetcode_username == None,  # noqa: E711
+        LeaderboardEntry.github_username == None,  # noqa: E711
+        LeaderboardEntry.hackerrank_username == None,  # noqa: E711
+    ).delete(synchronize_session=False)
+    update_combined_scores(db, [username])
+
+
+def set_batch(db: Session, usernames, batch):
+    """Assign students to a batch, creating their user records if needed"""
+    existing = set(_user_batches(db, usernames))
+    db.bulk_insert_mappings(User, [{'username': username, 'batch': batch} for username in usernames if username not in existing])
+    for start in range(0, len(usernames), _IN_CHUNK):
+        chunk = usernames[start:start + _IN_CHUNK]
+        db.query(User).filter(User.username.in_(chunk)).update({User.batch: batch}, synchronize_session=False)
+        db.query(LeaderboardEntry).filter(LeaderboardEntry.username.in_(chunk)).update(
+            {LeaderboardEntry.batch: batch}, synchronize_session=False
+        )
+    db.commit()
+
+
+def rebuild_leaderboard(db: Session):
+    """Recompute every leaderboard entry from the profile tables"""
+    entries = {}
+    for platform, columns in PLATFORM_COLUMNS.items():
+        model = PLATFORM_MODELS[platform]
+        query = db.query(model.username, *[getattr(model, column) for column in columns])
+        for username, *values in query:
+            entry = entries.setdefault(username, {'username': username})
+            entry.update(zip(columns.values(), values))
+
+    batches = dict(db.query(User.username, User.batch))
+    now = datetime.utcnow()
+    for username, entry in entries.items():
+        entry['batch'] = batches.get(username)
+        entry['updated_at'] = now
+
+    try:
+        db.query(LeaderboardEntry).delete(synchronize_session=False)
+        db.bulk_insert_mappings(LeaderboardEntry, list(entries.values()))
+        update_combined_scores(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(entries)
+
+
+def _serialize(entry, rank, platform=None):
+    """Leaderboard entry as a response dict; platform limits it to one platform's columns"""
+    if platform is not None:
+        item = {'rank': rank, 'username': entry.username, 'batch': entry.batch}
+        for column, entry_column in PLATFORM_COLUMNS[platform].items():
+            item[column] = getattr(entry, entry_column)
+        return item
+
+    item = {
+        'rank': rank,
+        'username': entry.username,
+        'batch': entry.batch,
+        'combined_score': round(entry.combined_score or 0, 2),
+    }
+    for name, columns in PLATFORM_COLUMNS.items():
+        values = {column: getattr(entry, entry_column) for column, entry_column in columns.items()}
+        item[name] = values if values[f'{name}_username'] is not None else None
+    return item
+
+
+def leaderboard_page(db: Session, platform=None, sort=None, order='desc', batch=None, page=1, page_size=50):
+    """
+    One page of the leaderboard for a platform (only students who connected
+    it) or, with platform=None, the combined cross-platform board.
+    Ties are broken by username so pages are stable.
+    """
+    if platform is None:
+        sort_column = getattr(LeaderboardEntry, sort or 'combined_score')
+        query = db.query(LeaderboardEntry)
+    else:
+        columns = PLATFORM_COLUMNS[platform]
+        sort_column = getattr(LeaderboardEntry, columns[sort or PLATFORM_METRICS[platform][0]])
+        username_column = getattr(LeaderboardEntry, f'{platform}_username')
+        query = db.query(LeaderboardEntry).filter(username_column != None)  # noqa: E711
+
+    if batch is not None:
+        query = query.filter(LeaderboardEntry.batch == batch)
+
+    total = query.count()
+    # Missing metrics (e.g. no contest rating) rank last in either direction;
+    # databases disagree on where NULLs sort by default
+    ordering = (sort_column.desc() if order == 'desc' else sort_column.asc()).nullslast()
+    offset = (page - 1) * page_size
+    entries = query.order_by(ordering, LeaderboardEntry.username).offset(offset).limit(page_size).all()
+
+    return {
+        'total': total,
+        'entries': [_serialize(entry, offset + i + 1, platform) for i, entry in enumerate(entries)],
+    }
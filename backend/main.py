@@ -1,33 +1,57 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-
-from database import engine, get_db, Base
-from models import User, LeetCodeProfile, GitHubProfile, HackerRankProfile
-from scrapers.leetcode_scraper import LeetCodeScraper
-from scrapers import github_scraper, hackerrank_scraper
-from scheduler import start_scheduler
+from typing import Optional, List
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+import calendar
+import hashlib
+import json
+import math
+import os
 import pathlib
 
 # Load environment variables from backend/.env if present
 _env_path = pathlib.Path(__file__).resolve().parent / '.env'
 load_dotenv(dotenv_path=str(_env_path))
 
-# Import routers after loading env so modules can read env vars at import time
-from app.routes import ai_suggestions, segmentation
+# Import app modules after loading env so they can read env vars (DATABASE_URL,
+# scraper and scheduler settings, Gemini key) at import time
+from database import engine, get_db, Base, SessionLocal
+from migrations import run_migrations
+from models import User, LeetCodeProfile, GitHubProfile, HackerRankProfile
+from scrapers.leetcode_scraper import LeetCodeScraper
+from scrapers import github_scraper, hackerrank_scraper, http_client, rate_limit
+from scheduler import start_scheduler
+from profile_store import upsert_profile, delete_profile
+from profile_cache import profile_cache, CachedResponse
+from response_cache import suggestion_cache
+import pdf_extraction
+from app.routes import ai_suggestions, segmentation, history, leaderboard
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Migrate the database, then run the background scheduler and shared outbound HTTP clients for the app's lifetime"""
+    # Done here rather than at import: PDF extraction workers are spawned
+    # processes that re-import the launching script (python main.py), and
+    # must not create tables, migrate or schedule jobs
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    scheduler = start_scheduler()
+    await ai_suggestions.open_gemini_client()
+    yield
+    await ai_suggestions.close_gemini_client()
+    http_client.close()
+    pdf_extraction.shutdown_executor()
+    scheduler.shutdown(wait=False)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
-app = FastAPI(title="College Marketing Platform API")
-
-# Start background scheduler
-scheduler = start_scheduler()
+app = FastAPI(title="College Marketing Platform API", lifespan=lifespan)
 
 # CORS Configuration
 app.add_middleware(
@@ -38,12 +62,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(rate_limit.RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: rate_limit.RateLimitExceeded):
+    """An upstream's rate limit could not be waited out within the request: ask the client to retry"""
+    retry_after = max(1, math.ceil(exc.retry_after or 0))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{exc} - please try again in {retry_after} seconds"},
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
 # Include AI suggestions router
 app.include_router(ai_suggestions.router, prefix="/api/ai", tags=["AI Suggestions"])
 
 # Include segmentation router
 app.include_router(segmentation.router, prefix="/api/segmentation", tags=["Student Segmentation"])
 
+# Include metric history router
+app.include_router(history.router, prefix="/api/history", tags=["Metric History"])
+
+# Include leaderboard router
+app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["Leaderboard"])
+
 # Pydantic models for request/response
 class LeetCodeConnectRequest(BaseModel):
     username: str
@@ -113,6 +155,122 @@ class HackerRankProfileResponse(BaseModel):
     last_updated: str
 
 
+def leetcode_response(profile):
+    """Build the API response for a stored LeetCode profile"""
+    return LeetCodeProfileResponse(
+        leetcode_username=profile.leetcode_username,
+        profile_url=profile.profile_url,
+        real_name=profile.real_name,
+        avatar=profile.avatar,
+        ranking=profile.ranking,
+        total_solved=profile.total_solved,
+        easy_solved=profile.easy_solved,
+        medium_solved=profile.medium_solved,
+        hard_solved=profile.hard_solved,
+        current_streak=profile.current_streak,
+        max_streak=profile.max_streak,
+        total_active_days=profile.total_active_days,
+        contest_rating=profile.contest_rating,
+        contest_ranking=profile.contest_ranking,
+        contests_attended=profile.contests_attended,
+        last_updated=profile.last_updated.isoformat()
+    )
+
+
+def github_response(profile):
+    """Build the API response for a stored GitHub profile"""
+    return GitHubProfileResponse(
+        github_username=profile.github_username,
+        profile_url=profile.profile_url,
+        name=profile.name,
+        bio=profile.bio,
+        avatar_url=profile.avatar_url,
+        company=profile.company,
+        location=profile.location,
+        public_repos=profile.public_repos,
+        public_gists=profile.public_gists,
+        followers=profile.followers,
+        following=profile.following,
+        total_stars=profile.total_stars,
+        total_forks=profile.total_forks,
+        top_languages=profile.top_languages or [],
+        last_updated=profile.last_updated.isoformat()
+    )
+
+
+def hackerrank_response(profile):
+    """Build the API response for a stored HackerRank profile"""
+    return HackerRankProfileResponse(
+        hackerrank_username=profile.hackerrank_username,
+        profile_url=profile.profile_url,
+        name=profile.name,
+        country=profile.country,
+        avatar=profile.avatar,
+        level=profile.level,
+        total_score=profile.total_score,
+        total_badges=profile.total_badges,
+        python_score=profile.python_score,
+        java_score=profile.java_score,
+        problem_solving_score=profile.problem_solving_score,
+        python_stars=profile.python_stars,
+        java_stars=profile.java_stars,
+        problem_solving_stars=profile.problem_solving_stars,
+        sql_stars=profile.sql_stars,
+        last_updated=profile.last_updated.isoformat()
+    )
+
+
+PROFILE_RESPONSES = {
+    'leetcode': (LeetCodeProfile, leetcode_response),
+    'github': (GitHubProfile, github_response),
+    'hackerrank': (HackerRankProfile, hackerrank_response),
+}
+
+
+def _not_modified(request: Request, cached: CachedResponse):
+    """Whether the client's conditional headers still match the cached response"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return cached.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(cached.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_profile_response(request: Request, db: Session, platform, username, not_found_detail):
+    """
+    Serve a profile GET from the read-through cache, answering 304 when the
+    client's ETag / Last-Modified (derived from last_updated) still match
+    """
+    cached = profile_cache.get(platform, username)
+    if cached is None:
+        generation = profile_cache.generation
+        model, build_response = PROFILE_RESPONSES[platform]
+        profile = db.query(model).filter(model.username == username).first()
+        
+        if not profile:
+            raise HTTPException(status_code=404, detail=not_found_detail)
+        
+        version = f"{platform}:{username}:{profile.last_updated.isoformat()}"
+        cached = CachedResponse(
+            body=build_response(profile).model_dump_json().encode("utf-8"),
+            etag='"' + hashlib.sha1(version.encode("utf-8")).hexdigest()[:20] + '"',
+            last_modified=formatdate(calendar.timegm(profile.last_updated.utctimetuple()), usegmt=True),
+        )
+        profile_cache.set(platform, username, cached, generation)
+    
+    # no-cache: browsers may store the response but must revalidate it
+    headers = {"ETag": cached.etag, "Last-Modified": cached.last_modified, "Cache-Control": "no-cache"}
+    if _not_modified(request, cached):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
 # Initialize scraper
 scraper = LeetCodeScraper()
 
@@ -126,119 +284,27 @@ def read_root():
 async def connect_leetcode(request: LeetCodeConnectRequest, db: Session = Depends(get_db)):
     """Connect LeetCode account and scrape profile data"""
     try:
-        # Scrape LeetCode profile
-        scraped_data = scraper.scrape_profile(request.profile_url)
+        # Scrape LeetCode profile in a worker thread so a slow upstream never blocks the event loop
+        scraped_data = await run_in_threadpool(scraper.scrape_profile, request.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
         if "error" in scraped_data:
             raise HTTPException(status_code=400, detail=scraped_data["error"])
         
-        # Check if profile already exists
-        existing_profile = db.query(LeetCodeProfile).filter(
-            LeetCodeProfile.username == request.username
-        ).first()
-        
-        if existing_profile:
-            # Update existing profile
-            existing_profile.leetcode_username = scraped_data['username']
-            existing_profile.profile_url = request.profile_url
-            existing_profile.real_name = scraped_data['profile']['real_name']
-            existing_profile.avatar = scraped_data['profile']['avatar']
-            existing_profile.ranking = scraped_data['profile']['ranking']
-            existing_profile.reputation = scraped_data['profile']['reputation']
-            existing_profile.country = scraped_data['profile']['country']
-            existing_profile.total_solved = scraped_data['statistics']['problems_solved']['total']
-            existing_profile.easy_solved = scraped_data['statistics']['problems_solved']['easy']
-            existing_profile.medium_solved = scraped_data['statistics']['problems_solved']['medium']
-            existing_profile.hard_solved = scraped_data['statistics']['problems_solved']['hard']
-            existing_profile.current_streak = scraped_data['statistics']['current_streak']
-            existing_profile.max_streak = scraped_data['statistics']['max_streak']
-            existing_profile.total_active_days = scraped_data['statistics']['total_active_days']
-            
-            if scraped_data.get('contests'):
-                existing_profile.contest_rating = scraped_data['contests'].get('rating')
-                existing_profile.contest_ranking = str(scraped_data['contests'].get('global_ranking', 'N/A'))
-                existing_profile.contests_attended = scraped_data['contests'].get('attended_contests', 0)
-            
-            existing_profile.full_data = scraped_data
-            existing_profile.last_updated = datetime.utcnow()
-            profile = existing_profile
-        else:
-            # Create new profile
-            profile = LeetCodeProfile(
-                username=request.username,
-                leetcode_username=scraped_data['username'],
-                profile_url=request.profile_url,
-                real_name=scraped_data['profile']['real_name'],
-                avatar=scraped_data['profile']['avatar'],
-                ranking=scraped_data['profile']['ranking'],
-                reputation=scraped_data['profile']['reputation'],
-                country=scraped_data['profile']['country'],
-                total_solved=scraped_data['statistics']['problems_solved']['total'],
-                easy_solved=scraped_data['statistics']['problems_solved']['easy'],
-                medium_solved=scraped_data['statistics']['problems_solved']['medium'],
-                hard_solved=scraped_data['statistics']['problems_solved']['hard'],
-                current_streak=scraped_data['statistics']['current_streak'],
-                max_streak=scraped_data['statistics']['max_streak'],
-                total_active_days=scraped_data['statistics']['total_active_days'],
-                contest_rating=scraped_data.get('contests', {}).get('rating'),
-                contest_ranking=str(scraped_data.get('contests', {}).get('global_ranking', 'N/A')),
-                contests_attended=scraped_data.get('contests', {}).get('attended_contests', 0),
-                full_data=scraped_data
-            )
-            db.add(profile)
-        
-        db.commit()
-        db.refresh(profile)
+        # Insert or update the student's profile
+        profile = await run_in_threadpool(upsert_profile, db, 'leetcode', request.username, scraped_data)
         
-        return LeetCodeProfileResponse(
-            leetcode_username=profile.leetcode_username,
-            profile_url=profile.profile_url,
-            real_name=profile.real_name,
-            avatar=profile.avatar,
-            ranking=profile.ranking,
-            total_solved=profile.total_solved,
-            easy_solved=profile.easy_solved,
-            medium_solved=profile.medium_solved,
-            hard_solved=profile.hard_solved,
-            current_streak=profile.current_streak,
-            max_streak=profile.max_streak,
-            total_active_days=profile.total_active_days,
-            contest_rating=profile.contest_rating,
-            contest_ranking=profile.contest_ranking,
-            contests_attended=profile.contests_attended,
-            last_updated=profile.last_updated.isoformat()
-        )
+        return leetcode_response(profile)
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/leetcode/profile/{username}", response_model=LeetCodeProfileResponse)
-async def get_leetcode_profile(username: str, db: Session = Depends(get_db)):
+async def get_leetcode_profile(username: str, request: Request, db: Session = Depends(get_db)):
     """Get LeetCode profile data for a student"""
-    profile = db.query(LeetCodeProfile).filter(LeetCodeProfile.username == username).first()
-    
-    if not profile:
-        raise HTTPException(status_code=404, detail="LeetCode profile not connected")
-    
-    return LeetCodeProfileResponse(
-        leetcode_username=profile.leetcode_username,
-        profile_url=profile.profile_url,
-        real_name=profile.real_name,
-        avatar=profile.avatar,
-        ranking=profile.ranking,
-        total_solved=profile.total_solved,
-        easy_solved=profile.easy_solved,
-        medium_solved=profile.medium_solved,
-        hard_solved=profile.hard_solved,
-        current_streak=profile.current_streak,
-        max_streak=profile.max_streak,
-        total_active_days=profile.total_active_days,
-        contest_rating=profile.contest_rating,
-        contest_ranking=profile.contest_ranking,
-        contests_attended=profile.contests_attended,
-        last_updated=profile.last_updated.isoformat()
-    )
+    return cached_profile_response(request, db, 'leetcode', username, "LeetCode profile not connected")
 
 
 @app.delete("/api/leetcode/disconnect/{username}")
@@ -249,8 +315,7 @@ async def disconnect_leetcode(username: str, db: Session = Depends(get_db)):
     if not profile:
         raise HTTPException(status_code=404, detail="LeetCode profile not found")
     
-    db.delete(profile)
-    db.commit()
+    delete_profile(db, 'leetcode', profile)
     
     return {"message": "LeetCode account disconnected successfully"}
 
@@ -265,37 +330,18 @@ async def update_leetcode_profile(username: str, db: Session = Depends(get_db)):
     
     try:
         # Scrape latest data
-        scraped_data = scraper.scrape_profile(profile.profile_url)
+        scraped_data = await run_in_threadpool(scraper.scrape_profile, profile.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
         if "error" in scraped_data:
             raise HTTPException(status_code=400, detail=scraped_data["error"])
         
         # Update profile
-        profile.real_name = scraped_data['profile']['real_name']
-        profile.avatar = scraped_data['profile']['avatar']
-        profile.ranking = scraped_data['profile']['ranking']
-        profile.reputation = scraped_data['profile']['reputation']
-        profile.total_solved = scraped_data['statistics']['problems_solved']['total']
-        profile.easy_solved = scraped_data['statistics']['problems_solved']['easy']
-        profile.medium_solved = scraped_data['statistics']['problems_solved']['medium']
-        profile.hard_solved = scraped_data['statistics']['problems_solved']['hard']
-        profile.current_streak = scraped_data['statistics']['current_streak']
-        profile.max_streak = scraped_data['statistics']['max_streak']
-        profile.total_active_days = scraped_data['statistics']['total_active_days']
-        
-        if scraped_data.get('contests'):
-            profile.contest_rating = scraped_data['contests'].get('rating')
-            profile.contest_ranking = str(scraped_data['contests'].get('global_ranking', 'N/A'))
-            profile.contests_attended = scraped_data['contests'].get('attended_contests', 0)
-        
-        profile.full_data = scraped_data
-        profile.last_updated = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(profile)
+        profile = await run_in_threadpool(upsert_profile, db, 'leetcode', username, scraped_data)
         
         return {"message": "Profile updated successfully", "last_updated": profile.last_updated.isoformat()}
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -307,110 +353,23 @@ async def connect_github(request: GitHubConnectRequest, db: Session = Depends(ge
     """Connect GitHub account and scrape profile data"""
     try:
         # Scrape GitHub profile
-        scraped_data = github_scraper.scrape_profile(request.profile_url)
-        
-        # Check if profile already exists
-        existing_profile = db.query(GitHubProfile).filter(
-            GitHubProfile.username == request.username
-        ).first()
+        scraped_data = await run_in_threadpool(github_scraper.scrape_profile, request.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
-        if existing_profile:
-            # Update existing profile
-            existing_profile.github_username = scraped_data['github_username']
-            existing_profile.profile_url = scraped_data['profile_url']
-            existing_profile.name = scraped_data.get('name')
-            existing_profile.bio = scraped_data.get('bio')
-            existing_profile.avatar_url = scraped_data.get('avatar_url')
-            existing_profile.company = scraped_data.get('company')
-            existing_profile.location = scraped_data.get('location')
-            existing_profile.email = scraped_data.get('email')
-            existing_profile.blog = scraped_data.get('blog')
-            existing_profile.twitter_username = scraped_data.get('twitter_username')
-            existing_profile.public_repos = scraped_data.get('public_repos', 0)
-            existing_profile.public_gists = scraped_data.get('public_gists', 0)
-            existing_profile.followers = scraped_data.get('followers', 0)
-            existing_profile.following = scraped_data.get('following', 0)
-            existing_profile.total_stars = scraped_data.get('total_stars', 0)
-            existing_profile.total_forks = scraped_data.get('total_forks', 0)
-            existing_profile.top_languages = scraped_data.get('top_languages', [])
-            existing_profile.full_data = scraped_data.get('full_data')
-            existing_profile.last_updated = datetime.utcnow()
-            profile = existing_profile
-        else:
-            # Create new profile
-            profile = GitHubProfile(
-                username=request.username,
-                github_username=scraped_data['github_username'],
-                profile_url=scraped_data['profile_url'],
-                name=scraped_data.get('name'),
-                bio=scraped_data.get('bio'),
-                avatar_url=scraped_data.get('avatar_url'),
-                company=scraped_data.get('company'),
-                location=scraped_data.get('location'),
-                email=scraped_data.get('email'),
-                blog=scraped_data.get('blog'),
-                twitter_username=scraped_data.get('twitter_username'),
-                public_repos=scraped_data.get('public_repos', 0),
-                public_gists=scraped_data.get('public_gists', 0),
-                followers=scraped_data.get('followers', 0),
-                following=scraped_data.get('following', 0),
-                total_stars=scraped_data.get('total_stars', 0),
-                total_forks=scraped_data.get('total_forks', 0),
-                top_languages=scraped_data.get('top_languages', []),
-                full_data=scraped_data.get('full_data')
-            )
-            db.add(profile)
+        # Insert or update the student's profile
+        profile = await run_in_threadpool(upsert_profile, db, 'github', request.username, scraped_data)
         
-        db.commit()
-        db.refresh(profile)
-        
-        return GitHubProfileResponse(
-            github_username=profile.github_username,
-            profile_url=profile.profile_url,
-            name=profile.name,
-            bio=profile.bio,
-            avatar_url=profile.avatar_url,
-            company=profile.company,
-            location=profile.location,
-            public_repos=profile.public_repos,
-            public_gists=profile.public_gists,
-            followers=profile.followers,
-            following=profile.following,
-            total_stars=profile.total_stars,
-            total_forks=profile.total_forks,
-            top_languages=profile.top_languages or [],
-            last_updated=profile.last_updated.isoformat()
-        )
+        return github_response(profile)
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/github/profile/{username}", response_model=GitHubProfileResponse)
-async def get_github_profile(username: str, db: Session = Depends(get_db)):
+async def get_github_profile(username: str, request: Request, db: Session = Depends(get_db)):
     """Get GitHub profile data for a student"""
-    profile = db.query(GitHubProfile).filter(GitHubProfile.username == username).first()
-    
-    if not profile:
-        raise HTTPException(status_code=404, detail="GitHub profile not connected")
-    
-    return GitHubProfileResponse(
-        github_username=profile.github_username,
-        profile_url=profile.profile_url,
-        name=profile.name,
-        bio=profile.bio,
-        avatar_url=profile.avatar_url,
-        company=profile.company,
-        location=profile.location,
-        public_repos=profile.public_repos,
-        public_gists=profile.public_gists,
-        followers=profile.followers,
-        following=profile.following,
-        total_stars=profile.total_stars,
-        total_forks=profile.total_forks,
-        top_languages=profile.top_languages or [],
-        last_updated=profile.last_updated.isoformat()
-    )
+    return cached_profile_response(request, db, 'github', username, "GitHub profile not connected")
 
 
 @app.delete("/api/github/disconnect/{username}")
@@ -421,8 +380,7 @@ async def disconnect_github(username: str, db: Session = Depends(get_db)):
     if not profile:
         raise HTTPException(status_code=404, detail="GitHub profile not found")
     
-    db.delete(profile)
-    db.commit()
+    delete_profile(db, 'github', profile)
     
     return {"message": "GitHub account disconnected successfully"}
 
@@ -437,19 +395,15 @@ async def update_github_profile(username: str, db: Session = Depends(get_db)):
     
     try:
         # Scrape latest data
-        scraped_data = github_scraper.scrape_profile(profile.profile_url)
+        scraped_data = await run_in_threadpool(github_scraper.scrape_profile, profile.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
         # Update profile
-        for key, value in scraped_data.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
-        profile.last_updated = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(profile)
+        profile = await run_in_threadpool(upsert_profile, db, 'github', username, scraped_data)
         
         return {"message": "Profile updated successfully", "last_updated": profile.last_updated.isoformat()}
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -461,116 +415,23 @@ async def connect_hackerrank(request: HackerRankConnectRequest, db: Session = De
     """Connect HackerRank account and scrape profile data"""
     try:
         # Scrape HackerRank profile
-        scraped_data = hackerrank_scraper.scrape_profile(request.profile_url)
-        
-        # Check if profile already exists
-        existing_profile = db.query(HackerRankProfile).filter(
-            HackerRankProfile.username == request.username
-        ).first()
-        
-        if existing_profile:
-            # Update existing profile
-            existing_profile.hackerrank_username = scraped_data['hackerrank_username']
-            existing_profile.profile_url = scraped_data['profile_url']
-            existing_profile.name = scraped_data.get('name')
-            existing_profile.country = scraped_data.get('country')
-            existing_profile.avatar = scraped_data.get('avatar')
-            existing_profile.school = scraped_data.get('school')
-            existing_profile.level = scraped_data.get('level', 0)
-            existing_profile.total_score = scraped_data.get('total_score', 0)
-            existing_profile.total_badges = scraped_data.get('total_badges', 0)
-            existing_profile.python_score = scraped_data.get('python_score', 0)
-            existing_profile.java_score = scraped_data.get('java_score', 0)
-            existing_profile.cpp_score = scraped_data.get('cpp_score', 0)
-            existing_profile.problem_solving_score = scraped_data.get('problem_solving_score', 0)
-            existing_profile.algorithms_score = scraped_data.get('algorithms_score', 0)
-            existing_profile.data_structures_score = scraped_data.get('data_structures_score', 0)
-            existing_profile.python_stars = scraped_data.get('python_stars', 0)
-            existing_profile.java_stars = scraped_data.get('java_stars', 0)
-            existing_profile.problem_solving_stars = scraped_data.get('problem_solving_stars', 0)
-            existing_profile.sql_stars = scraped_data.get('sql_stars', 0)
-            existing_profile.full_data = scraped_data.get('full_data')
-            existing_profile.last_updated = datetime.utcnow()
-            profile = existing_profile
-        else:
-            # Create new profile
-            profile = HackerRankProfile(
-                username=request.username,
-                hackerrank_username=scraped_data['hackerrank_username'],
-                profile_url=scraped_data['profile_url'],
-                name=scraped_data.get('name'),
-                country=scraped_data.get('country'),
-                avatar=scraped_data.get('avatar'),
-                school=scraped_data.get('school'),
-                level=scraped_data.get('level', 0),
-                total_score=scraped_data.get('total_score', 0),
-                total_badges=scraped_data.get('total_badges', 0),
-                python_score=scraped_data.get('python_score', 0),
-                java_score=scraped_data.get('java_score', 0),
-                cpp_score=scraped_data.get('cpp_score', 0),
-                problem_solving_score=scraped_data.get('problem_solving_score', 0),
-                algorithms_score=scraped_data.get('algorithms_score', 0),
-                data_structures_score=scraped_data.get('data_structures_score', 0),
-                python_stars=scraped_data.get('python_stars', 0),
-                java_stars=scraped_data.get('java_stars', 0),
-                problem_solving_stars=scraped_data.get('problem_solving_stars', 0),
-                sql_stars=scraped_data.get('sql_stars', 0),
-                full_data=scraped_data.get('full_data')
-            )
-            db.add(profile)
+        scraped_data = await run_in_threadpool(hackerrank_scraper.scrape_profile, request.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
-        db.commit()
-        db.refresh(profile)
+        # Insert or update the student's profile
+        profile = await run_in_threadpool(upsert_profile, db, 'hackerrank', request.username, scraped_data)
         
-        return HackerRankProfileResponse(
-            hackerrank_username=profile.hackerrank_username,
-            profile_url=profile.profile_url,
-            name=profile.name,
-            country=profile.country,
-            avatar=profile.avatar,
-            level=profile.level,
-            total_score=profile.total_score,
-            total_badges=profile.total_badges,
-            python_score=profile.python_score,
-            java_score=profile.java_score,
-            problem_solving_score=profile.problem_solving_score,
-            python_stars=profile.python_stars,
-            java_stars=profile.java_stars,
-            problem_solving_stars=profile.problem_solving_stars,
-            sql_stars=profile.sql_stars,
-            last_updated=profile.last_updated.isoformat()
-        )
+        return hackerrank_response(profile)
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/hackerrank/profile/{username}", response_model=HackerRankProfileResponse)
-async def get_hackerrank_profile(username: str, db: Session = Depends(get_db)):
+async def get_hackerrank_profile(username: str, request: Request, db: Session = Depends(get_db)):
     """Get HackerRank profile data for a student"""
-    profile = db.query(HackerRankProfile).filter(HackerRankProfile.username == username).first()
-    
-    if not profile:
-        raise HTTPException(status_code=404, detail="HackerRank profile not connected")
-    
-    return HackerRankProfileResponse(
-        hackerrank_username=profile.hackerrank_username,
-        profile_url=profile.profile_url,
-        name=profile.name,
-        country=profile.country,
-        avatar=profile.avatar,
-        level=profile.level,
-        total_score=profile.total_score,
-        total_badges=profile.total_badges,
-        python_score=profile.python_score,
-        java_score=profile.java_score,
-        problem_solving_score=profile.problem_solving_score,
-        python_stars=profile.python_stars,
-        java_stars=profile.java_stars,
-        problem_solving_stars=profile.problem_solving_stars,
-        sql_stars=profile.sql_stars,
-        last_updated=profile.last_updated.isoformat()
-    )
+    return cached_profile_response(request, db, 'hackerrank', username, "HackerRank profile not connected")
 
 
 @app.delete("/api/hackerrank/disconnect/{username}")
@@ -581,8 +442,7 @@ async def disconnect_hackerrank(username: str, db: Session = Depends(get_db)):
     if not profile:
         raise HTTPException(status_code=404, detail="HackerRank profile not found")
     
-    db.delete(profile)
-    db.commit()
+    delete_profile(db, 'hackerrank', profile)
     
     return {"message": "HackerRank account disconnected successfully"}
 
@@ -597,23 +457,85 @@ async def update_hackerrank_profile(username: str, db: Session = Depends(get_db)
     
     try:
         # Scrape latest data
-        scraped_data = hackerrank_scraper.scrape_profile(profile.profile_url)
+        scraped_data = await run_in_threadpool(hackerrank_scraper.scrape_profile, profile.profile_url, rate_limit.INTERACTIVE_MAX_WAIT_SECONDS)
         
         # Update profile
-        for key, value in scraped_data.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
-        profile.last_updated = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(profile)
+        profile = await run_in_threadpool(upsert_profile, db, 'hackerrank', username, scraped_data)
         
         return {"message": "Profile updated successfully", "last_updated": profile.last_updated.isoformat()}
     
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Hit/miss metrics of the in-process response caches"""
+    return {"profiles": profile_cache.stats(), "ai_suggestions": suggestion_cache.stats()}
+
+
+# Batch profile lookups
+BATCH_PROFILES_MAX = int(os.environ.get("BATCH_PROFILES_MAX", "10000"))
+# Above this many usernames the response is streamed chunk by chunk
+BATCH_PROFILES_STREAM_THRESHOLD = int(os.environ.get("BATCH_PROFILES_STREAM_THRESHOLD", "200"))
+# Usernames per IN (...) query, kept under SQLite's bound-parameter limit
+BATCH_PROFILES_CHUNK = 500
+
+class BatchProfilesRequest(BaseModel):
+    usernames: List[str]
+    platforms: List[str] = list(PROFILE_RESPONSES)
+
+
+def iter_batch_profiles(db: Session, usernames, platforms):
+    """
+    Yield (username, {platform: profile or None}) for each username, with one
+    IN query per platform table per chunk of usernames
+    """
+    for start in range(0, len(usernames), BATCH_PROFILES_CHUNK):
+        chunk = usernames[start:start + BATCH_PROFILES_CHUNK]
+        found = {}
+        for platform in platforms:
+            model, build_response = PROFILE_RESPONSES[platform]
+            found[platform] = {
+                profile.username: build_response(profile).model_dump()
+                for profile in db.query(model).filter(model.username.in_(chunk))
+            }
+        for username in chunk:
+            yield username, {platform: found[platform].get(username) for platform in platforms}
+
+
+def stream_batch_profiles(usernames, platforms):
+    """Write the batch response as a JSON stream; uses its own session since it outlives the request handler"""
+    db = SessionLocal()
+    try:
+        yield '{"profiles":{'
+        for i, (username, profiles) in enumerate(iter_batch_profiles(db, usernames, platforms)):
+            yield ('' if i == 0 else ',') + json.dumps(username) + ':' + json.dumps(profiles)
+        yield '}}'
+    finally:
+        db.close()
+
+
+@app.post("/api/profiles/batch")
+def get_profiles_batch(request: BatchProfilesRequest, db: Session = Depends(get_db)):
+    """Get the profiles of many students on several platforms in one call"""
+    platforms = list(dict.fromkeys(request.platforms))
+    unknown = [platform for platform in platforms if platform not in PROFILE_RESPONSES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown platforms: {', '.join(unknown)}")
+    
+    usernames = list(dict.fromkeys(request.usernames))
+    if len(usernames) > BATCH_PROFILES_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_PROFILES_MAX} usernames per request")
+    
+    if len(usernames) > BATCH_PROFILES_STREAM_THRESHOLD:
+        return StreamingResponse(stream_batch_profiles(usernames, platforms), media_type="application/json")
+    
+    return {"profiles": dict(iter_batch_profiles(db, usernames, platforms))}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
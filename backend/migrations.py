@@ -0,0 +1,220 @@
+"""
+Schema migrations for existing databases.
+
+Base.metadata.create_all only creates missing tables, so databases created
+by an older version of the app keep their old table layout. The steps here
+bring them up to date and are safe to run on every startup.
+"""
+
+from sqlalchemy import inspect, text, select, column
+from sqlalchemy.orm import Session
+import json
+import logging
+
+from models import User, LeetCodeProfile, GitHubProfile, HackerRankProfile, ProfilePayload, LeaderboardEntry
+from leaderboard import rebuild_leaderboard
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODELS = [LeetCodeProfile, GitHubProfile, HackerRankProfile]
+
+# Columns added to existing tables after their first release
+ADDED_COLUMNS = [
+    (User, 'batch'),
+    (LeetCodeProfile, 'last_active_at'),
+    (GitHubProfile, 'last_active_at'),
+    (HackerRankProfile, 'last_active_at'),
+]
+
+
+def add_missing_columns(engine):
+    """ALTER TABLE ... ADD COLUMN for every model column missing from its table"""
+    inspector = inspect(engine)
+    for model, column_name in ADDED_COLUMNS:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        if column_name in existing:
+            continue
+
+        column_type = table.c[column_name].type.compile(dialect=engine.dialect)
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}"))
+        logger.info(f"Added column {table.name}.{column_name}")
+
+
+def _drop_duplicate_profiles(conn, table):
+    """
+    Keep one row per username: the most recently updated one (lowest id on
+    ties, which is the row the old .first() lookups kept updating).
+    """
+    rows = conn.execute(text(f"SELECT id, username, last_updated FROM {table.name}")).fetchall()
+
+    keep = {}
+    for profile_id, username, last_updated in rows:
+        current = keep.get(username)
+        candidate = (str(last_updated) if last_updated else '', -profile_id)
+        if current is None or candidate > current[0]:
+            keep[username] = (candidate, profile_id)
+
+    keep_ids = {profile_id for _, profile_id in keep.values()}
+    duplicate_ids = [profile_id for profile_id, _, _ in rows if profile_id not in keep_ids]
+    for start in range(0, len(duplicate_ids), 500):
+        chunk = duplicate_ids[start:start + 500]
+        conn.execute(table.delete().where(table.c.id.in_(chunk)))
+    return len(duplicate_ids)
+
+
+def ensure_unique_usernames(engine):
+    """
+    Replace the old non-unique username index on each profile table with a
+    unique one (required by INSERT ... ON CONFLICT (username)), removing
+    duplicate rows first.
+    """
+    inspector = inspect(engine)
+    for model in PROFILE_MODELS:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+
+        indexes = inspector.get_indexes(table.name)
+        unique_constraints = inspector.get_unique_constraints(table.name)
+        if any(index['unique'] and index['column_names'] == ['username'] for index in indexes) or \
+                any(constraint['column_names'] == ['username'] for constraint in unique_constraints):
+            continue
+
+        unique_index = next(
+            index for index in table.indexes
+            if index.unique and [column.name for column in index.columns] == ['username']
+        )
+        with engine.begin() as conn:
+            removed = _drop_duplicate_profiles(conn, table)
+            if any(index['name'] == unique_index.name for index in indexes):
+                conn.execute(text(f"DROP INDEX {unique_index.name}"))
+            unique_index.create(bind=conn)
+        logger.info(f"Made {table.name}.username unique (removed {removed} duplicate rows)")
+
+
+# Per-metric profile indexes from before leaderboards moved to leaderboard_entries
+DROPPED_INDEXES = [
+    'ix_leetcode_profiles_total_solved',
+    'ix_leetcode_profiles_contest_rating',
+    'ix_github_profiles_total_stars',
+    'ix_hackerrank_profiles_total_score',
+]
+
+
+def drop_unused_indexes(engine):
+    """Drop profile indexes that no query reads, so profile writes stop maintaining them"""
+    inspector = inspect(engine)
+    existing = {
+        index['name']
+        for model in PROFILE_MODELS
+        if inspector.has_table(model.__tablename__)
+        for index in inspector.get_indexes(model.__tablename__)
+    }
+    for name in DROPPED_INDEXES:
+        if name in existing:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {name}"))
+            logger.info(f"Dropped index {name}")
+
+
+def create_missing_indexes(engine):
+    """Create staleness and batch indexes declared on the models but missing from the database"""
+    inspector = inspect(engine)
+    for model in [User, *PROFILE_MODELS]:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                logger.info(f"Created index {index.name}")
+
+
+# Profile tables whose old inline full_data column moved to profile_payloads
+PAYLOAD_PLATFORMS = {
+    'leetcode': LeetCodeProfile,
+    'github': GitHubProfile,
+    'hackerrank': HackerRankProfile,
+}
+
+
+def move_full_data_to_payloads(engine, chunk_size=500):
+    """
+    Copy the old inline full_data column of each profile table into the
+    compressed profile_payloads table and clear it. The emptied column is
+    left in place (SQLite cannot drop columns before 3.35); run VACUUM
+    afterwards to reclaim the space.
+    """
+    inspector = inspect(engine)
+    payloads = ProfilePayload.__table__
+    for platform, model in PAYLOAD_PLATFORMS.items():
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+        if 'full_data' not in {info['name'] for info in inspector.get_columns(table.name)}:
+            continue
+
+        moved = 0
+        with engine.begin() as conn:
+            existing = {
+                username for (username,) in conn.execute(
+                    text("SELECT username FROM profile_payloads WHERE platform = :platform"),
+                    {'platform': platform},
+                )
+            }
+            # full_data is no longer on the model; select it by name
+            full_data_column = column('full_data')
+            rows = conn.execute(
+                select(table.c.username, full_data_column, table.c.last_updated)
+                .select_from(table)
+                .where(full_data_column.isnot(None))
+            ).fetchall()
+
+            pending = []
+            for username, full_data, last_updated in rows:
+                if username in existing:
+                    continue
+                if isinstance(full_data, (str, bytes)):
+                    full_data = json.loads(full_data)
+                pending.append({
+                    'platform': platform,
+                    'username': username,
+                    'data': full_data,
+                    'updated_at': last_updated,
+                })
+            for start in range(0, len(pending), chunk_size):
+                conn.execute(payloads.insert(), pending[start:start + chunk_size])
+            moved = len(pending)
+
+            conn.execute(text(f"UPDATE {table.name} SET full_data = NULL WHERE full_data IS NOT NULL"))
+
+        if rows:
+            logger.info(f"Moved full_data of {moved} {table.name} rows to profile_payloads")
+
+
+def backfill_leaderboard(engine):
+    """Build leaderboard_entries for databases that have profiles but no leaderboard yet"""
+    with Session(bind=engine) as db:
+        if db.query(LeaderboardEntry.id).first() is not None:
+            return
+        if all(db.query(model.id).first() is None for model in PROFILE_MODELS):
+            return
+        count = rebuild_leaderboard(db)
+    logger.info(f"Built leaderboard entries for {count} students")
+
+
+def run_migrations(engine):
+    """Apply all migration steps in order"""
+    add_missing_columns(engine)
+    ensure_unique_usernames(engine)
+    drop_unused_indexes(engine)
+    create_missing_indexes(engine)
+    move_full_data_to_payloads(engine)
+    backfill_leaderboard(engine)
@@ -1,12 +1,32 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Float, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.types import TypeDecorator
 from database import Base
 from datetime import datetime
+import json
+import zlib
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON value stored as a zlib-compressed blob"""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 6)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
 
 class User(Base):
     __tablename__ = "users"
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
+    batch = Column(String, nullable=True, index=True)  # Cohort / graduation year, e.g. "2026"
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -14,7 +34,7 @@ class LeetCodeProfile(Base):
     __tablename__ = "leetcode_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, index=True)  # Student username
+    username = Column(String, unique=True, index=True)  # Student username
     leetcode_username = Column(String)
     profile_url = Column(String)
     
@@ -40,19 +60,17 @@ class LeetCodeProfile(Base):
     contest_ranking = Column(String, nullable=True)
     contests_attended = Column(Integer, default=0)
     
-    # Full data (JSON)
-    full_data = Column(JSON, nullable=True)
-    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    last_active_at = Column(DateTime, nullable=True)  # Latest upstream activity, drives refresh priority
 
 
 class GitHubProfile(Base):
     __tablename__ = "github_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, index=True)  # Student username
+    username = Column(String, unique=True, index=True)  # Student username
     github_username = Column(String)
     profile_url = Column(String)
     
@@ -75,19 +93,17 @@ class GitHubProfile(Base):
     total_forks = Column(Integer, default=0)
     top_languages = Column(JSON, nullable=True)  # Array of languages
     
-    # Full data (JSON)
-    full_data = Column(JSON, nullable=True)
-    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    last_active_at = Column(DateTime, nullable=True)  # Latest upstream activity, drives refresh priority
 
 
 class HackerRankProfile(Base):
     __tablename__ = "hackerrank_profiles"
     
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, index=True)  # Student username
+    username = Column(String, unique=True, index=True)  # Student username
     hackerrank_username = Column(String)
     profile_url = Column(String)
     
@@ -116,9 +132,81 @@ class HackerRankProfile(Base):
     problem_solving_stars = Column(Integer, default=0)
     sql_stars = Column(Integer, default=0)
     
-    # Full data (JSON)
-    full_data = Column(JSON, nullable=True)
-    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
-    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    last_active_at = Column(DateTime, nullable=True)  # Latest upstream activity, drives refresh priority
+
+
+class ProfileMetricSnapshot(Base):
+    """Append-only history of numeric profile metrics; a row is written only when a value changes"""
+    __tablename__ = "profile_metric_snapshots"
+    
+    id = Column(Integer, primary_key=True)
+    platform = Column(String, nullable=False)  # leetcode / github / hackerrank
+    username = Column(String, nullable=False)  # Student username
+    metric = Column(String, nullable=False)  # Profile column name, e.g. total_solved
+    value = Column(Float, nullable=False)
+    captured_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Cohort range scans: one metric over a time window
+        Index('ix_snapshots_platform_metric_time', 'platform', 'metric', 'captured_at'),
+        # Latest value per student, used for change detection
+        Index('ix_snapshots_platform_user_metric_time', 'platform', 'username', 'metric', 'captured_at'),
+    )
+
+
+class ProfilePayload(Base):
+    """Raw scraped payload (formerly full_data) kept out of the hot profile rows"""
+    __tablename__ = "profile_payloads"
+    
+    id = Column(Integer, primary_key=True)
+    platform = Column(String, nullable=False)  # leetcode / github / hackerrank
+    username = Column(String, nullable=False)  # Student username
+    data = Column(CompressedJSON, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('platform', 'username', name='uq_profile_payloads_platform_username'),
+    )
+
+
+class LeaderboardEntry(Base):
+    """
+    Precomputed per-student leaderboard row across all platforms, kept in
+    sync on every profile write so rankings are served from indexes instead
+    of sorting the profile tables per request
+    """
+    __tablename__ = "leaderboard_entries"
+    
+    id = Column(Integer, primary_key=True)
+    username = Column(String, unique=True, index=True)  # Student username
+    batch = Column(String, nullable=True)
+    
+    # LeetCode (NULL when not connected)
+    leetcode_username = Column(String, nullable=True)
+    leetcode_total_solved = Column(Integer, nullable=True, index=True)
+    leetcode_hard_solved = Column(Integer, nullable=True, index=True)
+    leetcode_contest_rating = Column(Float, nullable=True, index=True)
+    leetcode_max_streak = Column(Integer, nullable=True, index=True)
+    
+    # GitHub (NULL when not connected)
+    github_username = Column(String, nullable=True)
+    github_total_stars = Column(Integer, nullable=True, index=True)
+    github_followers = Column(Integer, nullable=True, index=True)
+    github_public_repos = Column(Integer, nullable=True, index=True)
+    
+    # HackerRank (NULL when not connected)
+    hackerrank_username = Column(String, nullable=True)
+    hackerrank_total_score = Column(Float, nullable=True, index=True)
+    hackerrank_total_badges = Column(Integer, nullable=True, index=True)
+    hackerrank_level = Column(Integer, nullable=True, index=True)
+    
+    combined_score = Column(Float, default=0, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Combined leaderboard filtered by batch
+        Index('ix_leaderboard_batch_combined', 'batch', 'combined_score'),
+    )
@@ -0,0 +1,192 @@
+"""
+PDF text extraction off the event loop.
+
+PyPDF2 is pure Python and CPU-bound, so a large upload is split into page
+ranges that are extracted in parallel in a process pool, while small
+documents are read in a worker thread under the same time budget. Pool workers get the path of a
+temporary copy of the upload rather than the bytes, so the document is not
+pickled into every task. Extraction stops at PDF_MAX_PAGES,
+after PDF_EXTRACT_TIMEOUT_SECONDS, or as soon as PDF_TEXT_CHAR_LIMIT
+characters (more than a prompt can use) have been collected.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import PyPDF2
+
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "100"))
+PDF_TEXT_CHAR_LIMIT = int(os.environ.get("PDF_TEXT_CHAR_LIMIT", "100000"))
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.environ.get("PDF_EXTRACT_TIMEOUT_SECONDS", "15"))
+# Largest PDF upload accepted, in bytes
+PDF_MAX_UPLOAD_BYTES = int(os.environ.get("PDF_MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Pages per process-pool task; documents up to this size stay in a thread
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "8"))
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Shared extraction pool, started on first use"""
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs the scheduler's threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=PDF_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_page_range(pdf_path: str, start: int, stop: int, char_limit: int) -> list[str]:
+    """Text of pages [start, stop) of the PDF file, stopping once char_limit characters are collected"""
+    # PdfReader parses objects lazily, so only these pages are read from the file
+    with open(pdf_path, "rb") as pdf_file:
+        reader = PyPDF2.PdfReader(pdf_file)
+        parts = []
+        collected = 0
+        for index in range(start, min(stop, len(reader.pages))):
+            text = reader.pages[index].extract_text() or ""
+            parts.append(text)
+            collected += len(text) + 1
+            if collected >= char_limit:
+                break
+    return parts
+
+
+def _write_temp_pdf(pdf_bytes: bytes) -> str:
+    with tempfile.NamedTemporaryFile(prefix="upload-", suffix=".pdf", delete=False) as pdf_file:
+        pdf_file.write(pdf_bytes)
+    return pdf_file.name
+
+
+def _remove_temp_pdf(pdf_path: str):
+    try:
+        os.remove(pdf_path)
+    except OSError as e:
+        # e.g. Windows, while a range abandoned at the time budget still has it open
+        print(f"Could not remove temporary PDF {pdf_path}: {e}")
+
+
+def _read_small_pdf(pdf_bytes: bytes, max_pages: int, char_limit: int, pages_per_task: int, deadline: float):
+    """
+    Page count, plus the page texts if the document is small enough to skip
+    the pool; stops between pages once the time.monotonic() deadline passes
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    page_count = min(len(reader.pages), max_pages)
+    if page_count > pages_per_task:
+        return page_count, None
+
+    parts = []
+    collected = 0
+    for index in range(page_count):
+        if time.monotonic() >= deadline:
+            print(f"PDF extraction time budget reached after {len(parts)} of {page_count} pages")
+            break
+        text = reader.pages[index].extract_text() or ""
+        parts.append(text)
+        collected += len(text) + 1
+        if collected >= char_limit:
+            break
+    return page_count, parts
+
+
+async def _extract_in_pool(executor, workers, pdf_path, page_count, char_limit, pages_per_task, deadline):
+    """
+    Extract page ranges in order with at most `workers` tasks in flight, so
+    no work is queued for pages past the character budget
+    """
+    loop = asyncio.get_running_loop()
+    ranges = iter(range(0, page_count, pages_per_task))
+    pending = deque()
+
+    def submit():
+        start = next(ranges, None)
+        if start is not None:
+            pending.append(loop.run_in_executor(
+                executor, extract_page_range, pdf_path, start, min(start + pages_per_task, page_count), char_limit
+            ))
+
+    for _ in range(workers):
+        submit()
+
+    parts = []
+    collected = 0
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                page_texts = await asyncio.wait_for(asyncio.shield(pending[0]), remaining)
+            except asyncio.TimeoutError:
+                print(f"PDF extraction time budget reached after {len(parts)} of {page_count} pages")
+                break
+            pending.popleft()
+            parts.extend(page_texts)
+            collected += sum(len(text) + 1 for text in page_texts)
+            if collected >= char_limit:
+                break
+            submit()
+    finally:
+        # Queued ranges are dropped; ranges already running finish in the background
+        for future in pending:
+            future.cancel()
+    return parts
+
+
+async def extract_pdf_text(
+    pdf_bytes: bytes,
+    max_pages: int = PDF_MAX_PAGES,
+    char_limit: int = PDF_TEXT_CHAR_LIMIT,
+    timeout: float = PDF_EXTRACT_TIMEOUT_SECONDS,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+    executor: Optional[ProcessPoolExecutor] = None,
+    workers: int = PDF_EXTRACT_WORKERS,
+) -> str:
+    """Extract up to char_limit characters of text from the first max_pages pages"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        # run_in_executor rather than run_in_threadpool: a page that never
+        # finishes parsing is abandoned at the deadline instead of awaited
+        try:
+            page_count, parts = await asyncio.wait_for(
+                loop.run_in_executor(
+                    None, _read_small_pdf, pdf_bytes, max_pages, char_limit, pages_per_task,
+                    time.monotonic() + timeout,
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            print("PDF extraction time budget reached while parsing the document")
+            return ""
+        if parts is None:
+            pdf_path = await run_in_threadpool(_write_temp_pdf, pdf_bytes)
+            try:
+                parts = await _extract_in_pool(
+                    executor or get_executor(), workers, pdf_path, page_count, char_limit, pages_per_task, deadline
+                )
+            finally:
+                await run_in_threadpool(_remove_temp_pdf, pdf_path)
+    except Exception as e:
+        raise Exception(f"Error reading PDF: {str(e)}")
+
+    # Pages are separated by a form feed so prompt compaction can tell them apart
+    return "\f".join(parts).strip()[:char_limit]
@@ -9,6 +9,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from database import SessionLocal, engine
 from models import Base, LeetCodeProfile, GitHubProfile, HackerRankProfile
+from leaderboard import rebuild_leaderboard
 from datetime import datetime
 
 # Create tables
@@ -343,6 +344,11 @@ def add_mock_data():
                 print(f"  ✅ Added HackerRank: {platforms['hackerrank']['hackerrank_username']}")
         
         db.commit()
+        
+        # Profiles were inserted directly, so recompute the rankings
+        rebuild_leaderboard(db)
+        print("\n  ✅ Rebuilt leaderboard")
+        
         print("\n" + "="*60)
         print("✅ Mock data population complete!")
         print("="*60)
@@ -0,0 +1,102 @@
+"""
+In-process read-through cache for the profile GET endpoints.
+
+Holds the serialized JSON response of each (platform, username) together
+with its ETag and Last-Modified validators, bounded by entry count (LRU) and
+age (TTL). profile_store and the scheduler invalidate entries right after
+every committed write, so the TTL only bounds staleness from writes made
+outside this process (e.g. populate_mock_data.py).
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+PROFILE_CACHE_MAX_ENTRIES = int(os.environ.get("PROFILE_CACHE_MAX_ENTRIES", "5000"))
+PROFILE_CACHE_TTL_SECONDS = float(os.environ.get("PROFILE_CACHE_TTL_SECONDS", "300"))
+
+
+class CachedResponse:
+    """Serialized response body with its HTTP validators"""
+    __slots__ = ('body', 'etag', 'last_modified')
+
+    def __init__(self, body, etag, last_modified):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class ProfileCache:
+    """Thread-safe LRU + TTL cache keyed by (platform, username)"""
+
+    def __init__(self, max_entries=PROFILE_CACHE_MAX_ENTRIES, ttl=PROFILE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, CachedResponse)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a fill that started before an
+        # invalidation may hold pre-write data and is discarded
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, platform, username):
+        key = (platform, username)
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, platform, username, response, generation):
+        """Store a response built from data read while the cache was at generation"""
+        if self.max_entries <= 0:
+            return
+        key = (platform, username)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, platform, usernames):
+        """Drop the cached responses of the given students on one platform"""
+        with self._lock:
+            self.generation += 1
+            for username in usernames:
+                if self._entries.pop((platform, username), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+profile_cache = ProfileCache()
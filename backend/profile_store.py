@@ -0,0 +1,270 @@
+"""
+Write path for scraped profile data.
+
+Maps each scraper's output to profile table columns in one place and writes
+rows with INSERT ... ON CONFLICT (username) DO UPDATE in batched
+transactions. Both the API endpoints and the background scheduler go
+through here.
+
+The raw scraped payload (full_data) is written to the compressed
+profile_payloads side table instead of the profile row, so profile reads
+never load it; use load_full_data when it is actually needed.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+import os
+
+from models import LeetCodeProfile, GitHubProfile, HackerRankProfile, ProfilePayload, LeaderboardEntry
+from refresh_queue import parse_timestamp
+from snapshots import record_snapshots, record_removal
+from profile_cache import profile_cache
+import leaderboard
+
+# Rows per INSERT ... ON CONFLICT statement / transaction
+UPSERT_BATCH_SIZE = int(os.environ.get("UPSERT_BATCH_SIZE", "200"))
+
+PLATFORM_MODELS = {
+    'leetcode': LeetCodeProfile,
+    'github': GitHubProfile,
+    'hackerrank': HackerRankProfile,
+}
+
+
+def leetcode_columns(scraped_data):
+    """Map LeetCodeScraper.scrape_profile output to LeetCodeProfile columns"""
+    profile = scraped_data['profile']
+    statistics = scraped_data['statistics']
+    contests = scraped_data.get('contests') or {}
+
+    return {
+        'leetcode_username': scraped_data['username'],
+        'profile_url': scraped_data['profile_url'],
+        'real_name': profile['real_name'],
+        'avatar': profile['avatar'],
+        'ranking': profile['ranking'],
+        'reputation': profile['reputation'],
+        'country': profile.get('country'),
+        'total_solved': statistics['problems_solved']['total'],
+        'easy_solved': statistics['problems_solved']['easy'],
+        'medium_solved': statistics['problems_solved']['medium'],
+        'hard_solved': statistics['problems_solved']['hard'],
+        'current_streak': statistics['current_streak'],
+        'max_streak': statistics['max_streak'],
+        'total_active_days': statistics['total_active_days'],
+        'contest_rating': contests.get('rating'),
+        'contest_ranking': str(contests.get('global_ranking', 'N/A')),
+        'contests_attended': contests.get('attended_contests', 0),
+        'full_data': scraped_data,
+        'last_active_at': parse_timestamp(scraped_data.get('last_active_at')),
+    }
+
+
+def github_columns(scraped_data):
+    """Map github_scraper.scrape_profile output to GitHubProfile columns"""
+    return {
+        'github_username': scraped_data['github_username'],
+        'profile_url': scraped_data['profile_url'],
+        'name': scraped_data.get('name'),
+        'bio': scraped_data.get('bio'),
+        'avatar_url': scraped_data.get('avatar_url'),
+        'company': scraped_data.get('company'),
+        'location': scraped_data.get('location'),
+        'email': scraped_data.get('email'),
+        'blog': scraped_data.get('blog'),
+        'twitter_username': scraped_data.get('twitter_username'),
+        'public_repos': scraped_data.get('public_repos', 0),
+        'public_gists': scraped_data.get('public_gists', 0),
+        'followers': scraped_data.get('followers', 0),
+        'following': scraped_data.get('following', 0),
+        'total_stars': scraped_data.get('total_stars', 0),
+        'total_forks': scraped_data.get('total_forks', 0),
+        'top_languages': scraped_data.get('top_languages', []),
+        'full_data': scraped_data.get('full_data'),
+        'last_active_at': parse_timestamp(scraped_data.get('last_active_at')),
+    }
+
+
+# HackerRank columns derived from the scores and badges endpoints
+HACKERRANK_SCORE_COLUMNS = (
+    'total_score', 'python_score', 'java_score', 'cpp_score',
+    'problem_solving_score', 'algorithms_score', 'data_structures_score',
+)
+HACKERRANK_BADGE_COLUMNS = (
+    'total_badges', 'python_stars', 'java_stars', 'problem_solving_stars', 'sql_stars',
+)
+
+
+def hackerrank_columns(scraped_data):
+    """
+    Map hackerrank_scraper.scrape_profile output to HackerRankProfile columns.
+    Columns from an endpoint that failed are left out so the stored values
+    are kept instead of being overwritten with zeros.
+    """
+    columns = {
+        'hackerrank_username': scraped_data['hackerrank_username'],
+        'profile_url': scraped_data['profile_url'],
+        'name': scraped_data.get('name'),
+        'country': scraped_data.get('country'),
+        'avatar': scraped_data.get('avatar'),
+        'school': scraped_data.get('school'),
+        'level': scraped_data.get('level', 0),
+        'total_score': scraped_data.get('total_score', 0),
+        'total_badges': scraped_data.get('total_badges', 0),
+        'python_score': scraped_data.get('python_score', 0),
+        'java_score': scraped_data.get('java_score', 0),
+        'cpp_score': scraped_data.get('cpp_score', 0),
+        'problem_solving_score': scraped_data.get('problem_solving_score', 0),
+        'algorithms_score': scraped_data.get('algorithms_score', 0),
+        'data_structures_score': scraped_data.get('data_structures_score', 0),
+        'python_stars': scraped_data.get('python_stars', 0),
+        'java_stars': scraped_data.get('java_stars', 0),
+        'problem_solving_stars': scraped_data.get('problem_solving_stars', 0),
+        'sql_stars': scraped_data.get('sql_stars', 0),
+        'full_data': scraped_data.get('full_data'),
+    }
+
+    full_data = scraped_data.get('full_data') or {}
+    failed = set(full_data.get('failed_endpoints') or ())
+    omitted = set()
+    # Empty scores fall back to badge points, which are unknown when badges failed
+    if 'scores' in failed or ('badges' in failed and not full_data.get('scores')):
+        omitted.update(HACKERRANK_SCORE_COLUMNS)
+    if 'badges' in failed:
+        omitted.update(HACKERRANK_BADGE_COLUMNS)
+    return {column: value for column, value in columns.items() if column not in omitted}
+
+
+COLUMN_MAPPERS = {
+    'leetcode': leetcode_columns,
+    'github': github_columns,
+    'hackerrank': hackerrank_columns,
+}
+
+
+def profile_row(platform, username, scraped_data):
+    """Build a complete row for one student's profile from scraped data"""
+    row = COLUMN_MAPPERS[platform](scraped_data)
+    row['username'] = username
+    row['last_updated'] = datetime.utcnow()
+    return row
+
+
+def _upsert_statement(db: Session, model, columns, keys=('username',)):
+    """INSERT ... ON CONFLICT (keys) DO UPDATE for the session's dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect == 'sqlite':
+        stmt = sqlite.insert(model)
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(model)
+    else:
+        return None
+
+    return stmt.on_conflict_do_update(
+        index_elements=[getattr(model, key) for key in keys],
+        set_={column: stmt.excluded[column] for column in columns if column not in keys},
+    )
+
+
+def _merge_rows(db: Session, model, rows, keys=('username',)):
+    """Fallback upsert for dialects without ON CONFLICT: merge row by row"""
+    for row in rows:
+        existing = db.query(model).filter_by(**{key: row[key] for key in keys}).first()
+        if existing is None:
+            db.add(model(**row))
+        else:
+            for column, value in row.items():
+                setattr(existing, column, value)
+
+
+def bulk_upsert(db: Session, platform, rows, batch_size=UPSERT_BATCH_SIZE):
+    """
+    Insert or update profile rows keyed by username, committing once per
+    batch_size rows, append changed metrics to the snapshot history,
+    refresh the students' leaderboard entries and drop their cached
+    profile responses.
+    All rows must come from profile_row for the same platform. Columns
+    missing from a row (e.g. from a failed endpoint) keep their stored value.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    for group in groups.values():
+        _upsert_rows(db, platform, group, batch_size)
+    return len(rows)
+
+
+def _upsert_rows(db: Session, platform, rows, batch_size):
+    """bulk_upsert for rows that all have the same columns"""
+    model = PLATFORM_MODELS[platform]
+    columns = [column for column in rows[0] if column != 'full_data']
+    stmt = _upsert_statement(db, model, columns)
+    payload_keys = ('platform', 'username')
+    payload_stmt = _upsert_statement(db, ProfilePayload, ('platform', 'username', 'data', 'updated_at'), payload_keys)
+    entry_columns = [
+        'username', 'batch',
+        *[entry_column for column, entry_column in leaderboard.PLATFORM_COLUMNS[platform].items() if column in columns],
+        'updated_at',
+    ]
+    entry_stmt = _upsert_statement(db, LeaderboardEntry, entry_columns)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        profiles = [{column: row[column] for column in columns} for row in batch]
+        payloads = [
+            {
+                'platform': platform,
+                'username': row['username'],
+                'data': row.get('full_data'),
+                'updated_at': row['last_updated'],
+            }
+            for row in batch
+        ]
+        try:
+            entries = leaderboard.entry_rows(db, platform, batch)
+            if stmt is not None:
+                db.execute(stmt, profiles)
+                db.execute(payload_stmt, payloads)
+                db.execute(entry_stmt, entries)
+            else:
+                _merge_rows(db, model, profiles)
+                _merge_rows(db, ProfilePayload, payloads, payload_keys)
+                _merge_rows(db, LeaderboardEntry, entries)
+            leaderboard.update_combined_scores(db, [row['username'] for row in batch])
+            # Metric history is written in the same transaction as the profiles
+            record_snapshots(db, platform, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        profile_cache.invalidate(platform, [row['username'] for row in batch])
+
+
+def upsert_profile(db: Session, platform, username, scraped_data):
+    """Write one student's scraped profile and return the stored row"""
+    bulk_upsert(db, platform, [profile_row(platform, username, scraped_data)])
+    model = PLATFORM_MODELS[platform]
+    return db.query(model).filter(model.username == username).populate_existing().first()
+
+
+def load_full_data(db: Session, platform, username):
+    """Raw scraped payload for one student's profile, or None"""
+    return db.query(ProfilePayload.data).filter(
+        ProfilePayload.platform == platform,
+        ProfilePayload.username == username,
+    ).scalar()
+
+
+def delete_profile(db: Session, platform, profile):
+    """Remove a student's profile row with its payload and leaderboard metrics, and end its history"""
+    db.query(ProfilePayload).filter(
+        ProfilePayload.platform == platform,
+        ProfilePayload.username == profile.username,
+    ).delete(synchronize_session=False)
+    username = profile.username
+    leaderboard.clear_platform(db, platform, username)
+    record_removal(db, platform, username)
+    db.delete(profile)
+    db.commit()
+    profile_cache.invalidate(platform, [username])
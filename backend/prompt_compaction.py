@@ -0,0 +1,208 @@
+"""
+Token-budgeted compaction of PDF text before it goes into a Gemini prompt.
+
+Deterministic and local: when the text is over budget, running headers,
+footers and page numbers (lines repeated at the edges of many pages) are
+dropped after their first occurrence, the text is split into sections at heading-like lines, and sections are
+ranked by the density of project-relevant keywords (abstract, results, tech
+stack, ...). The best sections are kept, in document order, until
+PDF_PROMPT_TOKEN_BUDGET is reached, so prompt size no longer grows with the
+length of the PDF.
+"""
+
+from collections import Counter
+import os
+import re
+
+PDF_PROMPT_TOKEN_BUDGET = int(os.environ.get("PDF_PROMPT_TOKEN_BUDGET", "6000"))
+
+# Rough token estimate for English text; no tokenizer is needed for a budget
+CHARS_PER_TOKEN = 4
+
+# A short line at the top or bottom of this many pages is a running header or footer
+REPEATED_LINE_MIN = 3
+REPEATED_LINE_MAX_CHARS = 120
+PAGE_EDGE_LINES = 3
+
+# extract_pdf_text separates pages with a form feed
+PAGE_SEPARATOR = "\f"
+
+# Headings that name the sections most useful for a LinkedIn post
+SECTION_KEYWORDS = {
+    "abstract": 5, "summary": 5, "overview": 4, "introduction": 3,
+    "result": 4, "outcome": 4, "conclusion": 4, "impact": 4, "achievement": 4,
+    "tech stack": 4, "technolog": 3, "architecture": 3, "implementation": 3,
+    "feature": 3, "objective": 3, "methodology": 2, "evaluation": 3,
+}
+
+# Body terms that mark content about what was built and what it achieved
+CONTENT_KEYWORDS = {
+    "accuracy": 2, "improv": 2, "result": 2, "achiev": 2, "reduc": 1, "increas": 1,
+    "python": 1, "java": 1, "react": 1, "node": 1, "django": 1, "flask": 1, "fastapi": 1,
+    "tensorflow": 1, "pytorch": 1, "machine learning": 2, "deep learning": 2, "model": 1,
+    "api": 1, "database": 1, "cloud": 1, "aws": 1, "azure": 1, "docker": 1,
+    "deploy": 1, "users": 1, "real-time": 1, "dataset": 1, "award": 2, "patent": 2,
+}
+
+# Sections that are rarely worth prompt space
+LOW_VALUE_HEADINGS = ("reference", "bibliograph", "acknowledg", "appendix", "table of contents", "index")
+
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_PAGE_REFERENCE = re.compile(r"\bpage\s*\d+(\s*(of|/)\s*\d+)?\b|\b\d+\s*(of|/)\s*\d+$", re.IGNORECASE)
+# "1. Intro", "2.3 Design", "IV. Results", "B) Setup"; bare numbers and letters are sentence starts
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)+\.?|\d+[.)]|[IVX]+[.)]|[A-Z][.)])\s+[A-Z]")
+_SMALL_WORDS = {"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "vs", "with"}
+_WORDS = re.compile(r"[a-z][a-z+#.-]*")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _edge_lines(page_lines):
+    """Indexes of the lines near the top and bottom of a page"""
+    count = len(page_lines)
+    return set(range(min(PAGE_EDGE_LINES, count))) | set(range(max(0, count - PAGE_EDGE_LINES), count))
+
+
+def remove_repeated_lines(pages):
+    """
+    Drop page numbers and running headers/footers: short lines that sit at
+    the edge of at least REPEATED_LINE_MIN different pages, compared with
+    page references ("Page 3 of 40") folded. Only the first copy is kept;
+    text in the body of a page is never removed.
+    """
+    def shape(line):
+        return _PAGE_REFERENCE.sub("page #", line.lower())
+
+    page_counts = Counter()
+    for page_lines in pages:
+        page_counts.update({
+            shape(page_lines[index]) for index in _edge_lines(page_lines)
+            if len(page_lines[index]) <= REPEATED_LINE_MAX_CHARS
+        })
+
+    seen = set()
+    kept = []
+    for page_lines in pages:
+        edges = _edge_lines(page_lines) if len(pages) > 1 else set()
+        for index, line in enumerate(page_lines):
+            if index in edges:
+                if _PAGE_NUMBER.match(line):
+                    continue
+                key = shape(line)
+                if page_counts[key] >= REPEATED_LINE_MIN:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+            kept.append(line)
+    return kept
+
+
+def _is_title(line: str) -> bool:
+    """All caps, or every word other than short connectives capitalized"""
+    words = [word for word in line.split() if word[0].isalpha()]
+    return bool(words) and (
+        line.isupper() or all(word[0].isupper() or word in _SMALL_WORDS for word in words)
+    )
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 80 or line.endswith((".", ",", ";")):
+        return False
+    if _NUMBERED_HEADING.match(line) and len(line.split()) <= 10:
+        return True
+    if not _is_title(line):
+        return False
+    lowered = line.lower()
+    if any(keyword in lowered for keyword in SECTION_KEYWORDS) and len(line.split()) <= 6:
+        return True
+    letters = [char for char in line if char.isalpha()]
+    return len(letters) >= 4 and all(char.isupper() for char in letters)
+
+
+def split_sections(lines, max_section_chars=2000):
+    """Group lines into (heading, body lines) sections; long runs without headings are chunked"""
+    sections = []
+    heading, body, size = "", [], 0
+    for line in lines:
+        is_heading = _is_heading(line)
+        if is_heading or size >= max_section_chars:
+            if heading or body:
+                sections.append((heading, body))
+            if is_heading:
+                heading, body, size = line, [], 0
+            else:
+                heading, body, size = "", [line], len(line)
+            continue
+        body.append(line)
+        size += len(line) + 1
+    if heading or body:
+        sections.append((heading, body))
+    return sections
+
+
+def score_section(heading: str, body_text: str) -> float:
+    """Heading relevance plus keyword hits per 100 words of body"""
+    lowered_heading = heading.lower()
+    if any(term in lowered_heading for term in LOW_VALUE_HEADINGS):
+        return -1.0
+    score = float(max((weight for keyword, weight in SECTION_KEYWORDS.items() if keyword in lowered_heading), default=0))
+
+    lowered = body_text.lower()
+    words = len(_WORDS.findall(lowered)) or 1
+    hits = sum(weight * lowered.count(keyword) for keyword, weight in CONTENT_KEYWORDS.items())
+    return score + min(hits * 100 / words, 10.0)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to max_chars, preferring to end at a sentence or line break"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip()
+
+
+def compact_text(text: str, token_budget: int = PDF_PROMPT_TOKEN_BUDGET) -> str:
+    """Text reduced to roughly token_budget tokens, keeping the most relevant sections"""
+    pages = [
+        [line for line in (line.strip() for line in page.splitlines()) if line]
+        for page in text.split(PAGE_SEPARATOR)
+    ]
+    lines = [line for page_lines in pages for line in page_lines]
+    if estimate_tokens("\n".join(lines)) <= token_budget:
+        return "\n".join(lines)
+    
+    lines = remove_repeated_lines(pages)
+    compacted = "\n".join(lines)
+    if estimate_tokens(compacted) <= token_budget:
+        return compacted
+
+    sections = []
+    for position, (heading, body) in enumerate(split_sections(lines)):
+        body_text = "\n".join(body)
+        section_text = f"{heading}\n{body_text}" if heading and body_text else heading or body_text
+        # The opening section holds the title (and often the abstract): always kept
+        score = float("inf") if position == 0 else score_section(heading, body_text)
+        sections.append((position, score, section_text))
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    selected = []
+    used = 0
+    for position, score, section_text in sorted(sections, key=lambda section: (-section[1], section[0])):
+        if score < 0:
+            continue
+        remaining = budget_chars - used
+        if remaining < 200:
+            break
+        if len(section_text) + 1 > remaining:
+            section_text = _truncate(section_text, remaining - 1)
+        selected.append((position, section_text))
+        used += len(section_text) + 1
+
+    if not selected:
+        return _truncate(compacted, budget_chars)
+    return "\n".join(section_text for _, section_text in sorted(selected))
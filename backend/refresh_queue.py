@@ -0,0 +1,109 @@
+"""
+Staleness-prioritized refresh queue for the background scheduler.
+
+Instead of re-scraping every profile on every run, each profile gets a
+refresh interval based on how recently the student was active upstream
+(LeetCode submissions, GitHub pushes). Every scheduler tick takes only the
+most overdue profiles, up to a budget, so load is spread evenly over time.
+"""
+
+from datetime import datetime, timedelta, timezone
+import heapq
+import os
+
+# Refresh intervals by recency of upstream activity
+ACTIVE_WINDOW = timedelta(days=7)
+RECENT_WINDOW = timedelta(days=30)
+ACTIVE_REFRESH = timedelta(minutes=int(os.environ.get("ACTIVE_REFRESH_MINUTES", "60")))
+RECENT_REFRESH = timedelta(minutes=int(os.environ.get("RECENT_REFRESH_MINUTES", "360")))
+DORMANT_REFRESH = timedelta(minutes=int(os.environ.get("DORMANT_REFRESH_MINUTES", "1440")))
+# Platforms without an activity signal (HackerRank) use this interval
+DEFAULT_REFRESH = timedelta(minutes=int(os.environ.get("DEFAULT_REFRESH_MINUTES", "360")))
+
+# Retry delay after a failed scrape, doubling per consecutive failure
+FAILURE_BACKOFF = timedelta(minutes=15)
+MAX_FAILURE_BACKOFF = timedelta(hours=24)
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp from scraped data into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def refresh_interval(last_active_at, now):
+    """How long a profile may go without being refreshed"""
+    if last_active_at is None:
+        return DEFAULT_REFRESH
+    idle = now - last_active_at
+    if idle <= ACTIVE_WINDOW:
+        return ACTIVE_REFRESH
+    if idle <= RECENT_WINDOW:
+        return RECENT_REFRESH
+    return DORMANT_REFRESH
+
+
+class RefreshQueue:
+    """Picks the most overdue profiles of one platform for each scheduler tick"""
+
+    def __init__(self, model):
+        self.model = model
+        # profile id -> (consecutive failures, not retried before)
+        self._failures = {}
+
+    def next_batch(self, db, budget, now=None):
+        """
+        Return up to budget (id, username, profile_url) tuples that are due,
+        most overdue first. Overdueness is time since the last refresh
+        divided by the profile's refresh interval.
+        """
+        now = now or datetime.utcnow()
+        if budget <= 0:
+            return []
+
+        model = self.model
+        # Nothing refreshed within the shortest interval can be due; this
+        # range filter is served by the last_updated index
+        min_interval = min(ACTIVE_REFRESH, RECENT_REFRESH, DORMANT_REFRESH, DEFAULT_REFRESH)
+        rows = db.query(
+            model.id, model.username, model.profile_url, model.last_updated, model.last_active_at
+        ).filter(
+            (model.last_updated == None) | (model.last_updated <= now - min_interval)  # noqa: E711
+        ).all()
+
+        due = []
+        for profile_id, username, profile_url, last_updated, last_active_at in rows:
+            failure = self._failures.get(profile_id)
+            if failure and failure[1] > now:
+                continue
+
+            if last_updated is None:
+                overdue = float('inf')
+            else:
+                interval = refresh_interval(last_active_at, now)
+                overdue = (now - last_updated) / interval
+                if overdue < 1:
+                    continue
+            due.append((overdue, profile_id, username, profile_url))
+
+        return [
+            (profile_id, username, profile_url)
+            for _, profile_id, username, profile_url in heapq.nlargest(budget, due, key=lambda item: item[0])
+        ]
+
+    def record_success(self, profile_id):
+        self._failures.pop(profile_id, None)
+
+    def record_failure(self, profile_id, now=None):
+        """Back off a profile whose scrape failed so it does not crowd out the queue"""
+        now = now or datetime.utcnow()
+        count = self._failures.get(profile_id, (0, now))[0] + 1
+        delay = min(FAILURE_BACKOFF * (2 ** (count - 1)), MAX_FAILURE_BACKOFF)
+        self._failures[profile_id] = (count, now + delay)
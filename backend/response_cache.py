@@ -0,0 +1,291 @@
+"""
+Content-addressed cache for Gemini generations.
+
+Results are keyed by a SHA-256 of the model name and the normalized prompt,
+so the same project text (or the same PDF) is answered without another
+upstream call. Entries are bounded by count (LRU) and age (TTL); when
+SUGGESTION_CACHE_PATH is set they are also written to a SQLite file so they
+survive restarts. Concurrent requests for the same key share a single
+upstream call (single-flight), whether it is made through get_or_create()
+or streamed by the caller (claim/settle/follow), and hit rate and upstream
+latency saved are reported by stats().
+"""
+
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+SUGGESTION_CACHE_MAX_ENTRIES = int(os.environ.get("SUGGESTION_CACHE_MAX_ENTRIES", "1000"))
+SUGGESTION_CACHE_TTL_SECONDS = float(os.environ.get("SUGGESTION_CACHE_TTL_SECONDS", "86400"))
+# SQLite file for persistent entries; empty keeps the cache in memory only
+SUGGESTION_CACHE_PATH = os.environ.get("SUGGESTION_CACHE_PATH", "")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Unicode-normalize and collapse whitespace so formatting-only differences share a key"""
+    return " ".join(unicodedata.normalize("NFC", prompt).split())
+
+
+def cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU + TTL cache of JSON-serializable results with single-flight fills"""
+
+    def __init__(self, max_entries=SUGGESTION_CACHE_MAX_ENTRIES, ttl=SUGGESTION_CACHE_TTL_SECONDS, path=SUGGESTION_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path or None
+        # key -> (expires_at, JSON text, upstream latency in seconds); expiry
+        # uses wall-clock time so persisted entries stay valid across restarts
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> asyncio.Future of the JSON text
+        self._db = self._open_db(self.path) if self.path and max_entries > 0 else None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+        self.upstream_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def _open_db(path):
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, latency REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_expires_at ON response_cache (expires_at)")
+        db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+        db.commit()
+        return db
+
+    def _memory_get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item
+
+    def _memory_set(self, key, item):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = item
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_get(self, key):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, value, latency FROM response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def _disk_set(self, key, item):
+        """Write one entry and drop expired ones and the oldest beyond max_entries"""
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, latency, expires_at) VALUES (?, ?, ?, ?)",
+                (key, item[1], item[2], item[0]),
+            )
+            self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def _record_hit(self, item):
+        with self._lock:
+            self.hits += 1
+            self.saved_seconds += item[2]
+
+    async def lookup(self, model, prompt):
+        """Cached result for (model, prompt) from memory or disk, or None; fill a miss through claim()"""
+        key = cache_key(model, prompt)
+        item = self._memory_get(key)
+        if item is None and self._db is not None:
+            item = await run_in_threadpool(self._disk_get, key)
+            if item is not None:
+                self._memory_set(key, item)
+                with self._lock:
+                    self.disk_hits += 1
+        if item is None:
+            return None
+        self._record_hit(item)
+        return json.loads(item[1])
+
+    def _new_inflight(self, key):
+        future = asyncio.get_running_loop().create_future()
+        # Mark a failure as retrieved even when no one else was waiting
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = future
+        return future
+
+    def claim(self, model, prompt):
+        """
+        Single-flight for a fill made outside get_or_create, e.g. a streamed
+        response. Returns (future, leader): the leader must settle() the
+        future when its call ends, everyone else awaits follow(future).
+        """
+        key = cache_key(model, prompt)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            with self._lock:
+                self.coalesced += 1
+            return pending, False
+        with self._lock:
+            self.misses += 1
+        return self._new_inflight(key), True
+
+    async def settle(self, model, prompt, future, value=None, latency=0.0, error=None):
+        """
+        End a claimed fill: store value and hand it to the followers, or
+        raise error in them. With neither (the leader went away) followers
+        are released to retry.
+        """
+        key = cache_key(model, prompt)
+        try:
+            if error is not None:
+                with self._lock:
+                    self.errors += 1
+                future.set_exception(error)
+            elif value is not None:
+                await self.store(model, prompt, value, latency)
+                future.set_result(json.dumps(value))
+        finally:
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def follow(self, future):
+        """Result of another request's in-flight fill, or None if that request went away"""
+        try:
+            return json.loads(await asyncio.shield(future))
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return None
+            raise
+
+    async def store(self, model, prompt, value, latency):
+        """Store a result generated outside get_or_create, e.g. a streamed response"""
+        key = cache_key(model, prompt)
+        item = (time.time() + self.ttl, json.dumps(value), latency)
+        with self._lock:
+            self.upstream_seconds += latency
+        self._memory_set(key, item)
+        if self._db is not None:
+            await run_in_threadpool(self._disk_set, key, item)
+
+    async def get_or_create(self, model, prompt, create):
+        """
+        Cached result for (model, prompt), otherwise the result of
+        await create(). Only successful results are stored; if create()
+        raises, every request waiting on that call gets the exception.
+        Each caller receives its own copy of the result.
+        """
+        key = cache_key(model, prompt)
+        item = self._memory_get(key)
+        if item is not None:
+            self._record_hit(item)
+            return json.loads(item[1])
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            with self._lock:
+                self.coalesced += 1
+            value = await self.follow(pending)
+            if value is None:
+                # The request making the upstream call went away; retry
+                return await self.get_or_create(model, prompt, create)
+            return value
+
+        future = self._new_inflight(key)
+        try:
+            item = await run_in_threadpool(self._disk_get, key) if self._db is not None else None
+            if item is not None:
+                self._memory_set(key, item)
+                self._record_hit(item)
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                started = time.perf_counter()
+                value = await create()
+                latency = time.perf_counter() - started
+                item = (time.time() + self.ttl, json.dumps(value), latency)
+                with self._lock:
+                    self.upstream_seconds += latency
+                self._memory_set(key, item)
+                if self._db is not None:
+                    await run_in_threadpool(self._disk_set, key, item)
+            future.set_result(item[1])
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            future.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        return json.loads(item[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            served = self.hits + self.coalesced
+            lookups = served + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'coalesced': self.coalesced,
+                'misses': self.misses,
+                'hit_rate': round(served / lookups, 4) if lookups else None,
+                'errors': self.errors,
+                'evictions': self.evictions,
+                'upstream_seconds': round(self.upstream_seconds, 3),
+                'mean_upstream_seconds': round(self.upstream_seconds / self.misses, 3) if self.misses else None,
+                'saved_seconds': round(self.saved_seconds, 3),
+            }
+
+
+suggestion_cache = ResponseCache()
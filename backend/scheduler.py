@@ -1,208 +1,287 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
+from concurrent.futures import CancelledError, ThreadPoolExecutor, as_completed
 from datetime import datetime
 import logging
+import os
 
 from database import SessionLocal
 from models import LeetCodeProfile, GitHubProfile, HackerRankProfile
-from scrapers.leetcode_scraper import LeetCodeScraper
-from scrapers import github_scraper, hackerrank_scraper
+from refresh_queue import RefreshQueue
+import profile_store
+from profile_cache import profile_cache
+from scrapers.leetcode_scraper import LeetCodeScraper, BATCH_SIZE as LEETCODE_BATCH_SIZE
+from scrapers import github_scraper, hackerrank_scraper, http_client, rate_limit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 leetcode_scraper = LeetCodeScraper()
 
+# Number of profiles scraped in parallel per platform
+REFRESH_CONCURRENCY = {
+    'leetcode': int(os.environ.get("LEETCODE_REFRESH_CONCURRENCY", "8")),
+    'github': int(os.environ.get("GITHUB_REFRESH_CONCURRENCY", "8")),
+    'hackerrank': int(os.environ.get("HACKERRANK_REFRESH_CONCURRENCY", "8")),
+}
 
-def update_all_leetcode_profiles():
-    """Update all LeetCode profiles in the database"""
-    db = SessionLocal()
+# Number of scraped profiles written back per transaction
+REFRESH_BATCH_SIZE = int(os.environ.get("REFRESH_BATCH_SIZE", "50"))
+
+# How often each platform refresh job runs, and the most profiles one run may refresh
+REFRESH_TICK_SECONDS = int(os.environ.get("REFRESH_TICK_SECONDS", "300"))
+REFRESH_TICK_BUDGET = {
+    'leetcode': int(os.environ.get("LEETCODE_TICK_BUDGET", "500")),
+    'github': int(os.environ.get("GITHUB_TICK_BUDGET", "500")),
+    'hackerrank': int(os.environ.get("HACKERRANK_TICK_BUDGET", "500")),
+}
+
+# Upstream host and approximate requests per scrape task, used to fit each
+# run into the host's rate-limit budget for one tick
+PLATFORM_HOSTS = {
+    'leetcode': ('leetcode.com', 1),
+    'github': ('api.github.com', 2),
+    'hackerrank': ('www.hackerrank.com', 3),
+}
+
+# Per-platform queues ordering profiles by staleness and activity
+refresh_queues = {
+    'leetcode': RefreshQueue(LeetCodeProfile),
+    'github': RefreshQueue(GitHubProfile),
+    'hackerrank': RefreshQueue(HackerRankProfile),
+}
+
+
+def _scrape_one(scrape, profile_url):
+    """
+    Run a scraper in a worker thread, returning (data, error) instead of
+    raising; RateLimitExceeded still propagates
+    """
     try:
-        profiles = db.query(LeetCodeProfile).all()
-        logger.info(f"Starting auto-update for {len(profiles)} LeetCode profiles")
-        
-        for profile in profiles:
-            try:
-                logger.info(f"Updating LeetCode profile for {profile.username}")
-                
-                # Scrape latest data
-                scraped_data = leetcode_scraper.scrape_profile(profile.profile_url)
-                
-                if "error" not in scraped_data:
-                    # Update profile
-                    profile.real_name = scraped_data['profile']['real_name']
-                    profile.avatar = scraped_data['profile']['avatar']
-                    profile.ranking = scraped_data['profile']['ranking']
-                    profile.reputation = scraped_data['profile']['reputation']
-                    profile.total_solved = scraped_data['statistics']['problems_solved']['total']
-                    profile.easy_solved = scraped_data['statistics']['problems_solved']['easy']
-                    profile.medium_solved = scraped_data['statistics']['problems_solved']['medium']
-                    profile.hard_solved = scraped_data['statistics']['problems_solved']['hard']
-                    profile.current_streak = scraped_data['statistics']['current_streak']
-                    profile.max_streak = scraped_data['statistics']['max_streak']
-                    profile.total_active_days = scraped_data['statistics']['total_active_days']
-                    
-                    if scraped_data.get('contests'):
-                        profile.contest_rating = scraped_data['contests'].get('rating')
-                        profile.contest_ranking = str(scraped_data['contests'].get('global_ranking', 'N/A'))
-                        profile.contests_attended = scraped_data['contests'].get('attended_contests', 0)
-                    
-                    profile.full_data = scraped_data
-                    profile.last_updated = datetime.utcnow()
-                    
-                    db.commit()
-                    logger.info(f"Successfully updated LeetCode profile for {profile.username}")
-                else:
-                    logger.error(f"Error updating LeetCode {profile.username}: {scraped_data['error']}")
-            
-            except Exception as e:
-                logger.error(f"Exception updating LeetCode {profile.username}: {str(e)}")
-                continue
-        
-        logger.info("LeetCode auto-update completed")
-    
+        scraped_data = scrape(profile_url)
+    except rate_limit.RateLimitExceeded:
+        raise
     except Exception as e:
-        logger.error(f"Error in LeetCode auto-update job: {str(e)}")
-    finally:
-        db.close()
+        return None, str(e)
+    
+    if "error" in scraped_data:
+        return None, scraped_data['error']
+    
+    return scraped_data, None
 
 
-def update_all_github_profiles():
-    """Update all GitHub profiles in the database"""
-    db = SessionLocal()
+def _scrape_chunk(scrape, scrape_batch, chunk):
+    """
+    Scrape a chunk of (profile_id, username, profile_url) targets.
+    Uses the platform's batch scraper when it has one, otherwise scrapes
+    each profile in turn. Returns (profile_id, username, data, error) tuples;
+    raises RateLimitExceeded when the host's rate-limit budget is exhausted.
+    """
+    if scrape_batch is None:
+        return [
+            (profile_id, username) + _scrape_one(scrape, profile_url)
+            for profile_id, username, profile_url in chunk
+        ]
+    
     try:
-        profiles = db.query(GitHubProfile).all()
-        logger.info(f"Starting auto-update for {len(profiles)} GitHub profiles")
-        
-        for profile in profiles:
-            try:
-                logger.info(f"Updating GitHub profile for {profile.username}")
-                
-                # Scrape latest data
-                scraped_data = github_scraper.scrape_profile(profile.profile_url)
-                
-                if "error" not in scraped_data:
-                    # Update profile
-                    profile.name = scraped_data.get('name')
-                    profile.bio = scraped_data.get('bio')
-                    profile.avatar_url = scraped_data.get('avatar_url')
-                    profile.company = scraped_data.get('company')
-                    profile.location = scraped_data.get('location')
-                    profile.email = scraped_data.get('email')
-                    profile.blog = scraped_data.get('blog')
-                    profile.twitter_username = scraped_data.get('twitter_username')
-                    profile.public_repos = scraped_data.get('public_repos', 0)
-                    profile.public_gists = scraped_data.get('public_gists', 0)
-                    profile.followers = scraped_data.get('followers', 0)
-                    profile.following = scraped_data.get('following', 0)
-                    profile.total_stars = scraped_data.get('total_stars', 0)
-                    profile.total_forks = scraped_data.get('total_forks', 0)
-                    profile.top_languages = scraped_data.get('top_languages', [])
-                    profile.full_data = scraped_data
-                    profile.last_updated = datetime.utcnow()
-                    
-                    db.commit()
-                    logger.info(f"Successfully updated GitHub profile for {profile.username}")
-                else:
-                    logger.error(f"Error updating GitHub {profile.username}: {scraped_data['error']}")
-            
-            except Exception as e:
-                logger.error(f"Exception updating GitHub {profile.username}: {str(e)}")
-                continue
-        
-        logger.info("GitHub auto-update completed")
+        scraped_by_url = scrape_batch([profile_url for _, _, profile_url in chunk])
+    except rate_limit.RateLimitExceeded:
+        raise
+    except Exception as e:
+        return [(profile_id, username, None, str(e)) for profile_id, username, _ in chunk]
     
+    results = []
+    for profile_id, username, profile_url in chunk:
+        scraped_data = scraped_by_url.get(profile_url) or {"error": "No data returned"}
+        if "error" in scraped_data:
+            results.append((profile_id, username, None, scraped_data['error']))
+        else:
+            results.append((profile_id, username, scraped_data, None))
+    return results
+
+
+def _write_batch(db: Session, platform, rows):
+    """Upsert a batch of scraped rows in a single transaction"""
+    try:
+        return profile_store.bulk_upsert(db, platform, rows)
     except Exception as e:
-        logger.error(f"Error in GitHub auto-update job: {str(e)}")
-    finally:
-        db.close()
+        logger.error(f"Error writing batch of {len(rows)} {platform} rows: {str(e)}")
+        return 0
 
 
-def update_all_hackerrank_profiles():
-    """Update all HackerRank profiles in the database"""
+def _touch_profiles(db: Session, platform, model, unchanged):
+    """Mark unchanged profiles as freshly checked without rewriting their data"""
+    profile_ids = [profile_id for profile_id, _ in unchanged]
+    try:
+        db.query(model).filter(model.id.in_(profile_ids)).update(
+            {model.last_updated: datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error touching {len(profile_ids)} {model.__tablename__} rows: {str(e)}")
+        return
+    # last_updated is part of the profile response
+    profile_cache.invalidate(platform, [username for _, username in unchanged])
+
+
+def _tick_budget(platform, chunk_size):
+    """
+    Most profiles one run may refresh: the platform's tick budget, capped
+    by what its rate-limit budget allows over one tick.
+    """
+    host, requests_per_task = PLATFORM_HOSTS[platform]
+    requests_allowed = rate_limit.get_bucket(host).budget(REFRESH_TICK_SECONDS)
+    rate_limited = (requests_allowed // requests_per_task) * chunk_size
+    
+    if rate_limited < REFRESH_TICK_BUDGET[platform]:
+        logger.info(f"{platform} rate limit allows ~{requests_allowed} requests this tick")
+    return min(REFRESH_TICK_BUDGET[platform], rate_limited)
+
+
+def refresh_profiles(platform, model, scrape, scrape_batch=None, chunk_size=1):
+    """
+    Re-scrape the most overdue profiles of one platform on a bounded worker pool.
+    Profiles come from the platform's RefreshQueue, limited to this tick's
+    budget. Scraping happens in worker threads, chunk_size profiles per task
+    when a batch scraper is given; all database writes stay on the calling
+    thread and are upserted in batches of REFRESH_BATCH_SIZE. Requests are
+    paced by the per-host token buckets in scrapers.rate_limit; once the
+    host's budget is exhausted the rest of the run is left for the next
+    tick without counting those profiles as failed.
+    """
     db = SessionLocal()
+    started = datetime.utcnow()
+    queue = refresh_queues[platform]
     try:
-        profiles = db.query(HackerRankProfile).all()
-        logger.info(f"Starting auto-update for {len(profiles)} HackerRank profiles")
+        chunk_size = max(1, chunk_size)
+        targets = queue.next_batch(db, _tick_budget(platform, chunk_size), now=started)
+        if not targets:
+            return
         
-        for profile in profiles:
-            try:
-                logger.info(f"Updating HackerRank profile for {profile.username}")
-                
-                # Scrape latest data
-                scraped_data = hackerrank_scraper.scrape_profile(profile.profile_url)
+        concurrency = max(1, REFRESH_CONCURRENCY[platform])
+        logger.info(f"Starting auto-update for {len(targets)} {platform} profiles (concurrency={concurrency})")
+        
+        updated = 0
+        failed = 0
+        deferred = 0
+        budget_exhausted = False
+        pending = []
+        unchanged = []
+        
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"{platform}-refresh") as pool:
+            futures = {
+                pool.submit(_scrape_chunk, scrape, scrape_batch, targets[start:start + chunk_size]): start
+                for start in range(0, len(targets), chunk_size)
+            }
+            
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except (rate_limit.RateLimitExceeded, CancelledError) as e:
+                    # Not the profiles' fault: leave them due for the next tick
+                    start = futures[future]
+                    deferred += len(targets[start:start + chunk_size])
+                    if not budget_exhausted:
+                        budget_exhausted = True
+                        logger.warning(f"{platform} rate-limit budget exhausted, deferring the rest of this run: {e}")
+                        for other in futures:
+                            other.cancel()
+                    continue
                 
-                if "error" not in scraped_data:
-                    # Update profile
-                    profile.name = scraped_data.get('name')
-                    profile.country = scraped_data.get('country')
-                    profile.avatar = scraped_data.get('avatar')
-                    profile.school = scraped_data.get('school')
-                    profile.level = scraped_data.get('level', 0)
-                    profile.total_score = scraped_data.get('total_score', 0)
-                    profile.total_badges = scraped_data.get('total_badges', 0)
-                    profile.python_score = scraped_data.get('python_score', 0)
-                    profile.java_score = scraped_data.get('java_score', 0)
-                    profile.problem_solving_score = scraped_data.get('problem_solving_score', 0)
-                    profile.python_stars = scraped_data.get('python_stars', 0)
-                    profile.java_stars = scraped_data.get('java_stars', 0)
-                    profile.problem_solving_stars = scraped_data.get('problem_solving_stars', 0)
-                    profile.sql_stars = scraped_data.get('sql_stars', 0)
-                    profile.full_data = scraped_data
-                    profile.last_updated = datetime.utcnow()
+                for profile_id, username, scraped_data, error in results:
+                    if error:
+                        failed += 1
+                        queue.record_failure(profile_id)
+                        logger.error(f"Error updating {platform} {username}: {error}")
+                        continue
                     
-                    db.commit()
-                    logger.info(f"Successfully updated HackerRank profile for {profile.username}")
-                else:
-                    logger.error(f"Error updating HackerRank {profile.username}: {scraped_data['error']}")
-            
-            except Exception as e:
-                logger.error(f"Exception updating HackerRank {profile.username}: {str(e)}")
-                continue
+                    queue.record_success(profile_id)
+                    
+                    # Upstream confirmed nothing changed (e.g. GitHub 304): skip the write
+                    if scraped_data.get('not_modified'):
+                        unchanged.append((profile_id, username))
+                        continue
+                    
+                    pending.append(profile_store.profile_row(platform, username, scraped_data))
+                    if len(pending) >= REFRESH_BATCH_SIZE:
+                        updated += _write_batch(db, platform, pending)
+                        pending = []
         
-        logger.info("HackerRank auto-update completed")
+        if pending:
+            updated += _write_batch(db, platform, pending)
+        if unchanged:
+            _touch_profiles(db, platform, model, unchanged)
+        
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        logger.info(
+            f"{platform} auto-update completed: {updated} updated, {len(unchanged)} unchanged, "
+            f"{failed} failed, {deferred} deferred in {elapsed:.1f}s"
+        )
+        logger.info(f"Scraper connection pool stats: {http_client.connection_stats()}")
     
     except Exception as e:
-        logger.error(f"Error in HackerRank auto-update job: {str(e)}")
+        logger.error(f"Error in {platform} auto-update job: {str(e)}")
     finally:
         db.close()
 
 
+def update_all_leetcode_profiles():
+    """Update the LeetCode profiles that are due for a refresh"""
+    refresh_profiles(
+        'leetcode', LeetCodeProfile, leetcode_scraper.scrape_profile,
+        scrape_batch=leetcode_scraper.scrape_profiles, chunk_size=LEETCODE_BATCH_SIZE
+    )
+
+
+def update_all_github_profiles():
+    """Update the GitHub profiles that are due for a refresh"""
+    refresh_profiles('github', GitHubProfile, github_scraper.scrape_profile)
+    github_scraper.validator_cache.save()
+
+
+def update_all_hackerrank_profiles():
+    """Update the HackerRank profiles that are due for a refresh"""
+    refresh_profiles('hackerrank', HackerRankProfile, hackerrank_scraper.scrape_profile)
+
+
 def start_scheduler():
     """Start the background scheduler"""
-    scheduler = BackgroundScheduler()
+    # A platform refresh that runs past its interval is never started twice;
+    # missed ticks collapse into a single run once the previous one finishes.
+    scheduler = BackgroundScheduler(job_defaults={'max_instances': 1, 'coalesce': True})
     
-    # Schedule LeetCode updates every 1 hour
+    # Check for due LeetCode profiles every tick
     scheduler.add_job(
         update_all_leetcode_profiles,
         'interval',
-        hours=1,
+        seconds=REFRESH_TICK_SECONDS,
         id='update_leetcode_profiles',
         name='Update all LeetCode profiles',
         replace_existing=True
     )
     
-    # Schedule GitHub updates every 1 hour
+    # Check for due GitHub profiles every tick
     scheduler.add_job(
         update_all_github_profiles,
         'interval',
-        hours=1,
+        seconds=REFRESH_TICK_SECONDS,
         id='update_github_profiles',
         name='Update all GitHub profiles',
         replace_existing=True
     )
     
-    # Schedule HackerRank updates every 1 hour
+    # Check for due HackerRank profiles every tick
     scheduler.add_job(
         update_all_hackerrank_profiles,
         'interval',
-        hours=1,
+        seconds=REFRESH_TICK_SECONDS,
         id='update_hackerrank_profiles',
         name='Update all HackerRank profiles',
         replace_existing=True
     )
     
     scheduler.start()
-    logger.info("Scheduler started - all profiles will be updated every 1 hour")
+    logger.info(f"Scheduler started - due profiles will be refreshed every {REFRESH_TICK_SECONDS} seconds")
     
     return scheduler
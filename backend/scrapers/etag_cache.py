@@ -0,0 +1,115 @@
+"""
+Persistent HTTP validator cache.
+
+Stores the ETag / Last-Modified validators of previously fetched URLs
+together with the payload derived from that response, so a later
+conditional request answered with 304 Not Modified can reuse the payload
+without downloading or re-processing the body. The least recently used
+entries are dropped beyond max_entries.
+"""
+
+from collections import OrderedDict
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Most URLs kept in a cache
+MAX_ENTRIES = int(os.environ.get("VALIDATOR_CACHE_MAX_ENTRIES", "20000"))
+
+
+class ValidatorCache:
+    def __init__(self, path, save_interval=30.0, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.save_interval = save_interval
+        self.max_entries = max_entries
+        self._entries = None
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+        # Serializes writers of the cache file
+        self._save_lock = threading.Lock()
+
+    def _load(self):
+        """Load entries from disk on first use (oldest first, as saved)"""
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = OrderedDict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self._entries = OrderedDict()
+        self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._dirty = True
+
+    def get(self, url):
+        """Return {'etag', 'last_modified', 'payload'} for url, or None"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def set(self, url, etag, last_modified, payload):
+        """Remember the validators and derived payload for url"""
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._load()
+            self._entries[url] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'payload': payload,
+            }
+            self._entries.move_to_end(url)
+            self._evict()
+            self._dirty = True
+
+    def conditional_headers(self, url):
+        """Build If-None-Match / If-Modified-Since headers for a cached url"""
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def save(self):
+        """Write the cache to disk atomically if it changed"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+                snapshot = list(self._entries.items())
+                self._dirty = False
+                self._last_save = time.monotonic()
+
+            tmp_path = None
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                with tempfile.NamedTemporaryFile(
+                    'w', encoding='utf-8', dir=directory, prefix='.etag-cache-', suffix='.tmp', delete=False
+                ) as f:
+                    tmp_path = f.name
+                    json.dump(OrderedDict(snapshot), f)
+                os.replace(tmp_path, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error saving validator cache: {e}")
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                with self._lock:
+                    self._dirty = True
+
+    def save_if_due(self):
+        """Save at most once every save_interval seconds"""
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
@@ -1,7 +1,27 @@
 import requests
+from scrapers import http_client, rate_limit
+from scrapers.etag_cache import ValidatorCache
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import math
+import os
 import re
+import threading
 from datetime import datetime
 
+# ETag / Last-Modified validators for GitHub API URLs, persisted across restarts.
+# 304 responses to conditional requests do not count against the rate limit.
+validator_cache = ValidatorCache(os.environ.get("GITHUB_ETAG_CACHE_PATH", "./github_etag_cache.json"))
+
+# Repository pagination: pages fetched in parallel once the page count is
+# known (1 = follow Link rel="next" one page at a time), and a safety cap
+REPOS_PER_PAGE = 100
+PAGE_CONCURRENCY = int(os.environ.get("GITHUB_PAGE_CONCURRENCY", "4"))
+MAX_REPO_PAGES = int(os.environ.get("GITHUB_MAX_REPO_PAGES", "50"))
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
 def extract_username(url_or_username):
     """Extract GitHub username from URL or return username as-is"""
     if not url_or_username:
@@ -24,10 +44,166 @@ def extract_username(url_or_username):
     
     return url_or_username.strip()
 
-def scrape_profile(url_or_username):
+def _summarize_repos(repos_data):
+    """Reduce a page of repositories to star, fork and language counts"""
+    total_stars = 0
+    total_forks = 0
+    languages = {}
+    last_pushed_at = None
+    
+    for repo in repos_data:
+        total_stars += repo.get('stargazers_count', 0)
+        total_forks += repo.get('forks_count', 0)
+        lang = repo.get('language')
+        if lang:
+            languages[lang] = languages.get(lang, 0) + 1
+        pushed_at = repo.get('pushed_at')
+        if pushed_at and (last_pushed_at is None or pushed_at > last_pushed_at):
+            last_pushed_at = pushed_at
+    
+    return {
+        'total_stars': total_stars,
+        'total_forks': total_forks,
+        'languages': languages,
+        'last_pushed_at': last_pushed_at,
+    }
+
+
+def _merge_summaries(total, page):
+    """Fold one page summary into the running totals"""
+    total['total_stars'] += page['total_stars']
+    total['total_forks'] += page['total_forks']
+    for lang, count in page['languages'].items():
+        total['languages'][lang] = total['languages'].get(lang, 0) + count
+    pushed_at = page.get('last_pushed_at')
+    if pushed_at and (total['last_pushed_at'] is None or pushed_at > total['last_pushed_at']):
+        total['last_pushed_at'] = pushed_at
+
+
+def _summarize_repos_page(response):
+    """Summarize one page of /repos, keeping the Link pagination info"""
+    summary = _summarize_repos(response.json())
+    
+    next_link = response.links.get('next')
+    last_link = response.links.get('last')
+    summary['next_url'] = next_link['url'] if next_link else None
+    summary['last_page'] = None
+    if last_link:
+        page = parse_qs(urlparse(last_link['url']).query).get('page')
+        if page and page[0].isdigit():
+            summary['last_page'] = int(page[0])
+    
+    return summary
+
+
+def _get_page_pool():
+    """Shared pool for concurrent page fetches, bounded across all profiles"""
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                _page_pool = ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY, thread_name_prefix="github-pages")
+    return _page_pool
+
+
+def _repos_page_url(username, page):
+    return f"https://api.github.com/users/{username}/repos?per_page={REPOS_PER_PAGE}&page={page}"
+
+
+def _fetch_repo_summary(username, headers, max_wait=None, public_repos=None):
+    """
+    Aggregate stars, forks and languages over every page of a user's repos.
+    Each page is reduced to counts as soon as it arrives, so only one page
+    of repository JSON is held per in-flight request.
+    public_repos (from the user record) is used to check the page count of
+    a cached first page. Returns (summary, modified).
+    """
+    total = _summarize_repos([])
+    first_page_url = _repos_page_url(username, 1)
+    
+    status, first_page, modified = _conditional_get(
+        first_page_url, headers, summarize=_summarize_repos_page, max_wait=max_wait
+    )
+    if status != 200:
+        return total, modified
+    
+    if not modified and public_repos is not None:
+        # A 304 on page 1 only says page 1 is unchanged: repos added or
+        # removed elsewhere can change the page count behind its cached links
+        expected_pages = max(1, math.ceil(public_repos / REPOS_PER_PAGE))
+        if (first_page.get('last_page') or 1) != expected_pages:
+            status, first_page, modified = _conditional_get(
+                first_page_url, headers, summarize=_summarize_repos_page, max_wait=max_wait, revalidate=False
+            )
+            if status != 200:
+                return total, modified
+    _merge_summaries(total, first_page)
+    
+    last_page = min(first_page.get('last_page') or 1, MAX_REPO_PAGES)
+    
+    if PAGE_CONCURRENCY > 1 and last_page > 1:
+        # Page count is known from the first response: fetch the rest in parallel
+        urls = [_repos_page_url(username, page) for page in range(2, last_page + 1)]
+        results = _get_page_pool().map(
+            lambda url: _conditional_get(url, headers, summarize=_summarize_repos_page, max_wait=max_wait), urls
+        )
+        for status, page_summary, page_modified in results:
+            modified = modified or page_modified
+            if status == 200:
+                _merge_summaries(total, page_summary)
+    else:
+        # Follow Link rel="next" one page at a time
+        next_url = first_page.get('next_url')
+        pages = 1
+        while next_url and pages < MAX_REPO_PAGES:
+            status, page_summary, page_modified = _conditional_get(
+                next_url, headers, summarize=_summarize_repos_page, max_wait=max_wait
+            )
+            modified = modified or page_modified
+            if status != 200:
+                break
+            _merge_summaries(total, page_summary)
+            next_url = page_summary.get('next_url')
+            pages += 1
+    
+    return total, modified
+
+
+def _conditional_get(url, headers, summarize=None, max_wait=None, revalidate=True):
+    """
+    GET a GitHub API URL, revalidating against the validator cache
+    (revalidate=False fetches unconditionally and refreshes the cache).
+    summarize, if given, reduces the response to the payload that is cached.
+    Returns (status_code, payload, modified); on 304 the cached payload is
+    returned with status 200 and modified=False.
+    """
+    request_headers = dict(headers)
+    if revalidate:
+        request_headers.update(validator_cache.conditional_headers(url))
+    
+    response = http_client.get(url, headers=request_headers, timeout=10, max_wait=max_wait)
+    
+    if response.status_code == 304:
+        cached = validator_cache.get(url)
+        if cached is not None:
+            return 200, cached['payload'], False
+        # Validators without a payload: fetch unconditionally
+        response = http_client.get(url, headers=headers, timeout=10, max_wait=max_wait)
+    
+    if response.status_code != 200:
+        return response.status_code, None, True
+    
+    payload = summarize(response) if summarize else response.json()
+    
+    validator_cache.set(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), payload)
+    return 200, payload, True
+
+
+def scrape_profile(url_or_username, max_wait=None):
     """
     Scrape GitHub profile using GitHub API (public data)
     Returns a dictionary with profile information
+    max_wait bounds rate-limit waits (see http_client.request)
     """
     username = extract_username(url_or_username)
     
@@ -36,27 +212,30 @@ def scrape_profile(url_or_username):
     
     # GitHub API endpoints
     user_url = f"https://api.github.com/users/{username}"
-    repos_url = f"https://api.github.com/users/{username}/repos?per_page=100"
     
     headers = {
         'Accept': 'application/vnd.github.v3+json',
         'User-Agent': 'Mozilla/5.0'
     }
+    # Authenticated requests get 5000/hour instead of 60/hour
+    if rate_limit.GITHUB_TOKEN:
+        headers['Authorization'] = f"Bearer {rate_limit.GITHUB_TOKEN}"
     
     try:
         # Fetch user data
-        user_response = requests.get(user_url, headers=headers, timeout=10)
+        user_status, user_data, user_modified = _conditional_get(user_url, headers, max_wait=max_wait)
         
-        if user_response.status_code == 404:
+        if user_status == 404:
             raise ValueError(f"GitHub user '{username}' not found")
-        elif user_response.status_code != 200:
-            raise Exception(f"GitHub API error: {user_response.status_code}")
+        elif user_status != 200:
+            raise Exception(f"GitHub API error: {user_status}")
         
-        user_data = user_response.json()
+        # Fetch all repository pages, keeping only their aggregate counts
+        repo_summary, repos_modified = _fetch_repo_summary(
+            username, headers, max_wait, public_repos=user_data.get('public_repos')
+        )
         
-        # Fetch repositories
-        repos_response = requests.get(repos_url, headers=headers, timeout=10)
-        repos_data = repos_response.json() if repos_response.status_code == 200 else []
+        validator_cache.save_if_due()
         
         # Calculate stats
         total_repos = user_data.get('public_repos', 0)
@@ -64,17 +243,9 @@ def scrape_profile(url_or_username):
         followers = user_data.get('followers', 0)
         following = user_data.get('following', 0)
         
-        # Calculate stars, forks, and languages from repos
-        total_stars = 0
-        total_forks = 0
-        languages = {}
-        
-        for repo in repos_data:
-            total_stars += repo.get('stargazers_count', 0)
-            total_forks += repo.get('forks_count', 0)
-            lang = repo.get('language')
-            if lang:
-                languages[lang] = languages.get(lang, 0) + 1
+        total_stars = repo_summary['total_stars']
+        total_forks = repo_summary['total_forks']
+        languages = repo_summary['languages']
         
         # Get top 5 languages
         top_languages = sorted(languages.items(), key=lambda x: x[1], reverse=True)[:5]
@@ -98,11 +269,17 @@ def scrape_profile(url_or_username):
             'total_stars': total_stars,
             'total_forks': total_forks,
             'top_languages': top_languages_list,
-            'full_data': user_data
+            'full_data': user_data,
+            # Latest push to any public repo, used to prioritize refreshes
+            'last_active_at': repo_summary['last_pushed_at'],
+            # True when GitHub confirmed nothing changed since the last fetch
+            'not_modified': not user_modified and not repos_modified
         }
         
         return profile_data
         
+    except rate_limit.RateLimitExceeded:
+        raise
     except requests.exceptions.Timeout:
         raise Exception("GitHub API request timed out")
     except requests.exceptions.RequestException as e:
@@ -1,7 +1,52 @@
 import requests
+from scrapers import http_client, rate_limit
+from concurrent.futures import ThreadPoolExecutor
+import os
 import re
+import threading
 from bs4 import BeautifulSoup
 
+# Shared pool used to issue the profile, scores and badges calls concurrently
+FANOUT_WORKERS = int(os.environ.get("HACKERRANK_FANOUT_WORKERS", "24"))
+
+_fanout_pool = None
+_fanout_pool_lock = threading.Lock()
+
+
+def _get_fanout_pool():
+    global _fanout_pool
+    if _fanout_pool is None:
+        with _fanout_pool_lock:
+            if _fanout_pool is None:
+                _fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="hackerrank-fanout")
+    return _fanout_pool
+
+
+def _get_json(url, headers, max_wait=None):
+    """Fetch one HackerRank REST endpoint, returning (status_code, json or None)"""
+    response = http_client.get(url, headers=headers, timeout=10, max_wait=max_wait)
+    if response.status_code != 200:
+        return response.status_code, None
+    return 200, response.json()
+
+
+def _optional_result(future, name, failed_endpoints):
+    """Result of a non-essential endpoint, or [] (recorded as failed) on error"""
+    try:
+        status, data = future.result()
+    except rate_limit.RateLimitExceeded:
+        raise
+    except Exception as e:
+        print(f"HackerRank {name} request failed: {e}")
+        failed_endpoints.append(name)
+        return []
+    
+    if status != 200:
+        failed_endpoints.append(name)
+        return []
+    return data
+
+
 def extract_username(url_or_username):
     """Extract HackerRank username from URL or return username as-is"""
     if not url_or_username:
@@ -37,10 +82,11 @@ def extract_username(url_or_username):
     
     return url_or_username.strip()
 
-def scrape_profile(url_or_username):
+def scrape_profile(url_or_username, max_wait=None):
     """
     Scrape HackerRank profile using HackerRank API
     Returns a dictionary with profile information
+    max_wait bounds rate-limit waits (see http_client.request)
     """
     username = extract_username(url_or_username)
     
@@ -61,24 +107,26 @@ def scrape_profile(url_or_username):
     }
     
     try:
-        # Fetch basic profile data
-        profile_response = requests.get(profile_url, headers=headers, timeout=10)
+        # The three endpoints are independent: issue them concurrently
+        pool = _get_fanout_pool()
+        profile_future = pool.submit(_get_json, profile_url, headers, max_wait)
+        scores_future = pool.submit(_get_json, api_url, headers, max_wait)
+        badges_future = pool.submit(_get_json, badges_url, headers, max_wait)
+        
+        # Basic profile data is required
+        profile_status, profile_data = profile_future.result()
         
-        if profile_response.status_code == 404:
+        if profile_status == 404:
             raise ValueError(f"HackerRank user '{username}' not found")
-        elif profile_response.status_code != 200:
-            raise Exception(f"HackerRank API error: {profile_response.status_code}")
+        elif profile_status != 200:
+            raise Exception(f"HackerRank API error: {profile_status}")
         
-        profile_data = profile_response.json()
         model = profile_data.get('model', {})
         
-        # Fetch scores
-        scores_response = requests.get(api_url, headers=headers, timeout=10)
-        scores_data = scores_response.json() if scores_response.status_code == 200 else []
-        
-        # Fetch badges
-        badges_response = requests.get(badges_url, headers=headers, timeout=10)
-        badges_data = badges_response.json() if badges_response.status_code == 200 else []
+        # Scores and badges are optional; a failure yields partial results
+        failed_endpoints = []
+        scores_data = _optional_result(scores_future, 'scores', failed_endpoints)
+        badges_data = _optional_result(badges_future, 'badges', failed_endpoints)
         
         # Extract badges first
         # badges_data is already a list of badge models
@@ -145,12 +193,15 @@ def scrape_profile(url_or_username):
             'full_data': {
                 'profile': model,
                 'scores': scores,
-                'badges': badges_list
+                'badges': badges_list,
+                'failed_endpoints': failed_endpoints
             }
         }
         
         return result
         
+    except rate_limit.RateLimitExceeded:
+        raise
     except requests.exceptions.Timeout:
         raise Exception("HackerRank API request timed out")
     except requests.exceptions.RequestException as e:
@@ -0,0 +1,138 @@
+"""
+Shared HTTP transport for the profile scrapers.
+
+All scrapers go through one requests.Session so TCP/TLS connections to
+leetcode.com, api.github.com and hackerrank.com are pooled per host and
+kept alive between calls instead of being re-established for every request.
+Every request is also paced by the per-host token bucket in rate_limit.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scrapers import rate_limit
+
+# Number of per-host connection pools to keep, and connections kept alive per host
+POOL_CONNECTIONS = int(os.environ.get("SCRAPER_POOL_CONNECTIONS", "10"))
+POOL_MAXSIZE = int(os.environ.get("SCRAPER_POOL_MAXSIZE", "32"))
+
+# Default timeout (seconds) for scraper requests
+DEFAULT_TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "10"))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    """Create a session whose adapters keep up to POOL_MAXSIZE connections per host"""
+    session = requests.Session()
+    # pool_block keeps a saturated pool from opening throwaway connections
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide scraper session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def request(method, url, max_wait=None, **kwargs):
+    """
+    Send a request over the shared pooled session. Waits for a rate-limit
+    token for the host first, and retries 429/5xx responses with backoff.
+    max_wait bounds the total time spent waiting for tokens and retries
+    (otherwise each token wait is capped at rate_limit.MAX_WAIT_SECONDS);
+    RateLimitExceeded is raised when the host cannot be used in time.
+    """
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    host = urlparse(url).hostname
+    bucket = rate_limit.get_bucket(host)
+    deadline = time.monotonic() + max_wait if max_wait is not None else None
+
+    attempt = 0
+    while True:
+        wait = rate_limit.MAX_WAIT_SECONDS if deadline is None else max(0.0, deadline - time.monotonic())
+        if not bucket.acquire(timeout=wait):
+            raise rate_limit.RateLimitExceeded(
+                f"Rate limit budget exhausted for {host}", retry_after=bucket.wait_seconds()
+            )
+
+        response = get_session().request(method, url, **kwargs)
+        bucket.update_from_headers(response.headers)
+
+        if response.status_code == 304:
+            # Conditional hits do not count against upstream quotas
+            bucket.refund()
+
+        if attempt >= rate_limit.MAX_RETRIES or not rate_limit.should_retry(response):
+            return response
+
+        delay = rate_limit.retry_delay(response, attempt)
+        throttled = response.status_code in (403, 429)
+        if throttled:
+            bucket.block_for(delay)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            # The caller cannot wait for the retry
+            if throttled:
+                raise rate_limit.RateLimitExceeded(f"{host} is rate limiting requests", retry_after=delay)
+            return response
+        if not throttled:
+            time.sleep(delay)
+        attempt += 1
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def connection_stats():
+    """
+    Per-host connection counters from the underlying urllib3 pools.
+    'reused' is the number of requests served over an already-open connection.
+    """
+    stats = {}
+    if _session is None:
+        return stats
+
+    seen = set()
+    for adapter in _session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}"
+            entry = stats.setdefault(host, {'requests': 0, 'connections_opened': 0, 'reused': 0})
+            entry['requests'] += pool.num_requests
+            entry['connections_opened'] += pool.num_connections
+            entry['reused'] = max(0, entry['requests'] - entry['connections_opened'])
+
+    return stats
+
+
+def close():
+    """Close all pooled connections (used on shutdown)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
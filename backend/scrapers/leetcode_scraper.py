@@ -2,20 +2,56 @@
 LeetCode Profile Scraper Module
 """
 
-import requests
+from scrapers import http_client, rate_limit
 import json
+import os
 import re
 from datetime import datetime, timedelta
 
 
+# Field selections shared by the single, combined and batched GraphQL documents
+MATCHED_USER_FIELDS = """
+                username
+                profile {
+                    realName
+                    userAvatar
+                    ranking
+                    reputation
+                    countryName
+                }
+                submitStats {
+                    acSubmissionNum {
+                        difficulty
+                        count
+                    }
+                }
+                userCalendar {
+                    streak
+                    totalActiveDays
+                    submissionCalendar
+                }
+"""
+
+CONTEST_RANKING_FIELDS = """
+                attendedContestsCount
+                rating
+                globalRanking
+"""
+
+# Maximum number of users fetched in one aliased GraphQL document
+BATCH_SIZE = int(os.environ.get("LEETCODE_BATCH_SIZE", "20"))
+
+
 class LeetCodeScraper:
-    def __init__(self):
+    def __init__(self, single_request=True):
         self.base_url = "https://leetcode.com"
         self.graphql_url = "https://leetcode.com/graphql"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Content-Type': 'application/json',
         }
+        # Fetch profile and contest data in one GraphQL round trip instead of two
+        self.single_request = single_request
     
     def extract_username(self, profile_url):
         """Extract username from LeetCode profile URL"""
@@ -31,157 +67,248 @@ class LeetCodeScraper:
         
         raise ValueError("Invalid LeetCode profile URL")
     
-    def get_user_profile(self, username):
+    def get_user_profile(self, username, max_wait=None):
         """Fetch user profile data using GraphQL API"""
         query = """
         query getUserProfile($username: String!) {
-            matchedUser(username: $username) {
-                username
-                profile {
-                    realName
-                    userAvatar
-                    ranking
-                    reputation
-                    countryName
-                }
-                submitStats {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                    }
-                }
-                userCalendar {
-                    streak
-                    totalActiveDays
-                    submissionCalendar
-                }
-            }
+            matchedUser(username: $username) {%s            }
         }
-        """
+        """ % MATCHED_USER_FIELDS
         
         variables = {"username": username}
         payload = {"query": query, "variables": variables}
         
         try:
-            response = requests.post(self.graphql_url, json=payload, headers=self.headers, timeout=10)
+            response = http_client.post(self.graphql_url, json=payload, headers=self.headers, timeout=10, max_wait=max_wait)
             response.raise_for_status()
             return response.json()
+        except rate_limit.RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching profile: {e}")
             return None
     
-    def get_contest_info(self, username):
+    def get_contest_info(self, username, max_wait=None):
         """Fetch user contest information"""
         query = """
         query userContestRankingInfo($username: String!) {
-            userContestRanking(username: $username) {
-                attendedContestsCount
-                rating
-                globalRanking
-            }
+            userContestRanking(username: $username) {%s            }
         }
-        """
+        """ % CONTEST_RANKING_FIELDS
         
         variables = {"username": username}
         payload = {"query": query, "variables": variables}
         
         try:
-            response = requests.post(self.graphql_url, json=payload, headers=self.headers, timeout=10)
+            response = http_client.post(self.graphql_url, json=payload, headers=self.headers, timeout=10, max_wait=max_wait)
             response.raise_for_status()
             return response.json()
+        except rate_limit.RateLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error fetching contest data: {e}")
             return None
     
-    def scrape_profile(self, profile_url):
-        """Main method to scrape LeetCode profile"""
+    def get_profile_and_contest(self, username, max_wait=None):
+        """Fetch profile and contest information in a single GraphQL request"""
+        query = """
+        query userProfileWithContest($username: String!) {
+            matchedUser(username: $username) {%s            }
+            userContestRanking(username: $username) {%s            }
+        }
+        """ % (MATCHED_USER_FIELDS, CONTEST_RANKING_FIELDS)
+        
+        variables = {"username": username}
+        payload = {"query": query, "variables": variables}
+        
         try:
-            username = self.extract_username(profile_url)
-            profile_data = self.get_user_profile(username)
-            contest_data = self.get_contest_info(username)
-            
-            if not profile_data or 'data' not in profile_data:
-                return {"error": "Failed to fetch profile data"}
-            
-            data = profile_data.get('data', {})
-            matched_user = data.get('matchedUser')
-            
-            if not matched_user:
-                return {"error": f"User '{username}' not found"}
-            
-            profile = matched_user.get('profile', {})
-            submit_stats = matched_user.get('submitStats', {})
-            calendar = matched_user.get('userCalendar', {})
+            response = http_client.post(self.graphql_url, json=payload, headers=self.headers, timeout=10, max_wait=max_wait)
+            response.raise_for_status()
+            return response.json()
+        except rate_limit.RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching profile: {e}")
+            return None
+    
+    def get_user_profiles_batch(self, usernames, max_wait=None):
+        """
+        Fetch profile and contest information for several users in one
+        GraphQL document, using field aliases u<i> / c<i> per username
+        """
+        variable_defs = ", ".join(f"$u{i}: String!" for i in range(len(usernames)))
+        selections = "".join(
+            f"""
+            u{i}: matchedUser(username: $u{i}) {{{MATCHED_USER_FIELDS}            }}
+            c{i}: userContestRanking(username: $u{i}) {{{CONTEST_RANKING_FIELDS}            }}"""
+            for i in range(len(usernames))
+        )
+        query = f"""
+        query batchUserProfiles({variable_defs}) {{{selections}
+        }}
+        """
+        
+        variables = {f"u{i}": username for i, username in enumerate(usernames)}
+        payload = {"query": query, "variables": variables}
+        
+        try:
+            response = http_client.post(self.graphql_url, json=payload, headers=self.headers, timeout=20, max_wait=max_wait)
+            response.raise_for_status()
+            return response.json()
+        except rate_limit.RateLimitExceeded:
+            raise
+        except Exception as e:
+            print(f"Error fetching batch of {len(usernames)} profiles: {e}")
+            return None
+    
+    def parse_profile(self, username, profile_url, matched_user, contest_ranking):
+        """Build the structured profile dict from raw GraphQL user and contest nodes"""
+        if not matched_user:
+            return {"error": f"User '{username}' not found"}
+        
+        profile = matched_user.get('profile', {})
+        submit_stats = matched_user.get('submitStats', {})
+        calendar = matched_user.get('userCalendar', {})
+        
+        # Process submission stats
+        ac_submissions = submit_stats.get('acSubmissionNum', [])
+        problems_solved = {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0}
+        
+        for item in ac_submissions:
+            difficulty = item.get('difficulty', '').lower()
+            count = item.get('count', 0)
+            if difficulty in ['easy', 'medium', 'hard']:
+                problems_solved[difficulty] = count
+            elif difficulty == 'all':
+                problems_solved['total'] = count
+        
+        # Calculate max streak from calendar
+        submission_calendar_raw = calendar.get('submissionCalendar', '{}')
+        try:
+            submission_calendar = json.loads(submission_calendar_raw) if submission_calendar_raw else {}
+        except:
+            submission_calendar = {}
+        
+        max_streak = 0
+        if submission_calendar:
+            sorted_dates = sorted(submission_calendar.keys(), key=lambda x: int(x))
+            temp_streak = 0
+            prev_date = None
             
-            # Process submission stats
-            ac_submissions = submit_stats.get('acSubmissionNum', [])
-            problems_solved = {'easy': 0, 'medium': 0, 'hard': 0, 'total': 0}
+            for date_str in sorted_dates:
+                date = datetime.fromtimestamp(int(date_str))
+                if prev_date and (date - prev_date).days == 1:
+                    temp_streak += 1
+                else:
+                    max_streak = max(max_streak, temp_streak)
+                    temp_streak = 1
+                prev_date = date
             
-            for item in ac_submissions:
-                difficulty = item.get('difficulty', '').lower()
-                count = item.get('count', 0)
-                if difficulty in ['easy', 'medium', 'hard']:
-                    problems_solved[difficulty] = count
-                elif difficulty == 'all':
-                    problems_solved['total'] = count
+            max_streak = max(max_streak, temp_streak)
+        
+        # Most recent day with a submission, used to prioritize refreshes
+        last_active_at = None
+        if submission_calendar:
+            last_active_at = datetime.utcfromtimestamp(max(int(ts) for ts in submission_calendar)).isoformat()
+        
+        # Extract contest information
+        contest_info = {}
+        if contest_ranking:
+            contest_info = {
+                'attended_contests': contest_ranking.get('attendedContestsCount', 0),
+                'rating': round(contest_ranking.get('rating', 0), 2),
+                'global_ranking': contest_ranking.get('globalRanking', 'N/A')
+            }
+        
+        # Compile structured data
+        structured_data = {
+            'username': matched_user.get('username'),
+            'profile_url': profile_url,
+            'profile': {
+                'real_name': profile.get('realName', 'N/A'),
+                'avatar': profile.get('userAvatar', ''),
+                'ranking': profile.get('ranking', 0),
+                'reputation': profile.get('reputation', 0),
+                'country': profile.get('countryName', 'N/A')
+            },
+            'statistics': {
+                'problems_solved': problems_solved,
+                'total_active_days': calendar.get('totalActiveDays', 0),
+                'current_streak': calendar.get('streak', 0),
+                'max_streak': max_streak
+            },
+            'contests': contest_info,
+            'last_active_at': last_active_at,
+            'scraped_at': datetime.now().isoformat()
+        }
+        
+        return structured_data
+    
+    def scrape_profile(self, profile_url, max_wait=None):
+        """
+        Main method to scrape LeetCode profile. max_wait bounds rate-limit
+        waits (see http_client.request); RateLimitExceeded is raised, not
+        returned as an error.
+        """
+        try:
+            username = self.extract_username(profile_url)
             
-            # Calculate max streak from calendar
-            submission_calendar_raw = calendar.get('submissionCalendar', '{}')
-            try:
-                submission_calendar = json.loads(submission_calendar_raw) if submission_calendar_raw else {}
-            except:
-                submission_calendar = {}
+            if self.single_request:
+                profile_data = self.get_profile_and_contest(username, max_wait)
+                contest_data = profile_data
+            else:
+                profile_data = self.get_user_profile(username, max_wait)
+                contest_data = self.get_contest_info(username, max_wait)
             
-            max_streak = 0
-            if submission_calendar:
-                sorted_dates = sorted(submission_calendar.keys(), key=lambda x: int(x))
-                temp_streak = 0
-                prev_date = None
-                
-                for date_str in sorted_dates:
-                    date = datetime.fromtimestamp(int(date_str))
-                    if prev_date and (date - prev_date).days == 1:
-                        temp_streak += 1
-                    else:
-                        max_streak = max(max_streak, temp_streak)
-                        temp_streak = 1
-                    prev_date = date
-                
-                max_streak = max(max_streak, temp_streak)
+            if not profile_data or not profile_data.get('data'):
+                return {"error": "Failed to fetch profile data"}
             
-            # Extract contest information
-            contest_info = {}
-            if contest_data and 'data' in contest_data:
+            matched_user = profile_data['data'].get('matchedUser')
+            contest_ranking = None
+            if contest_data and contest_data.get('data'):
                 contest_ranking = contest_data['data'].get('userContestRanking')
-                if contest_ranking:
-                    contest_info = {
-                        'attended_contests': contest_ranking.get('attendedContestsCount', 0),
-                        'rating': round(contest_ranking.get('rating', 0), 2),
-                        'global_ranking': contest_ranking.get('globalRanking', 'N/A')
-                    }
             
-            # Compile structured data
-            structured_data = {
-                'username': matched_user.get('username'),
-                'profile_url': profile_url,
-                'profile': {
-                    'real_name': profile.get('realName', 'N/A'),
-                    'avatar': profile.get('userAvatar', ''),
-                    'ranking': profile.get('ranking', 0),
-                    'reputation': profile.get('reputation', 0),
-                    'country': profile.get('countryName', 'N/A')
-                },
-                'statistics': {
-                    'problems_solved': problems_solved,
-                    'total_active_days': calendar.get('totalActiveDays', 0),
-                    'current_streak': calendar.get('streak', 0),
-                    'max_streak': max_streak
-                },
-                'contests': contest_info,
-                'scraped_at': datetime.now().isoformat()
-            }
-            
-            return structured_data
+            return self.parse_profile(username, profile_url, matched_user, contest_ranking)
         
+        except rate_limit.RateLimitExceeded:
+            raise
         except Exception as e:
             return {"error": str(e)}
+    
+    def scrape_profiles(self, profile_urls, batch_size=None, max_wait=None):
+        """
+        Scrape many LeetCode profiles with one GraphQL request per chunk
+        of batch_size users. Returns a dict mapping each profile URL to its
+        structured data, or to {"error": ...} if that profile failed.
+        RateLimitExceeded is raised, as in scrape_profile.
+        """
+        batch_size = max(1, batch_size or BATCH_SIZE)
+        results = {}
+        
+        usernames = {}
+        for profile_url in profile_urls:
+            try:
+                usernames[profile_url] = self.extract_username(profile_url)
+            except Exception as e:
+                results[profile_url] = {"error": str(e)}
+        
+        pending = list(usernames.items())
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            response = self.get_user_profiles_batch([username for _, username in chunk], max_wait)
+            
+            if not response or not response.get('data'):
+                for profile_url, _ in chunk:
+                    results[profile_url] = {"error": "Failed to fetch profile data"}
+                continue
+            
+            data = response['data']
+            for i, (profile_url, username) in enumerate(chunk):
+                try:
+                    results[profile_url] = self.parse_profile(
+                        username, profile_url, data.get(f"u{i}"), data.get(f"c{i}")
+                    )
+                except Exception as e:
+                    results[profile_url] = {"error": str(e)}
+        
+        return results
@@ -0,0 +1,184 @@
+"""
+Per-host rate limiting for the profile scrapers.
+
+Each upstream host gets a token bucket. Buckets start from configured
+defaults and then adapt to the X-RateLimit-* / Retry-After headers the
+upstream sends back: the refill rate is re-derived so the remaining quota
+is spread evenly until the reset time, and an exhausted quota blocks the
+host until it resets.
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
+
+# (requests per window, window in seconds, burst size) per upstream host
+DEFAULT_LIMITS = {
+    'api.github.com': (
+        int(os.environ.get("GITHUB_RATE_LIMIT", "5000" if GITHUB_TOKEN else "60")), 3600,
+        int(os.environ.get("GITHUB_RATE_BURST", "10")),
+    ),
+    'leetcode.com': (
+        int(os.environ.get("LEETCODE_RATE_LIMIT", "60")), 60,
+        int(os.environ.get("LEETCODE_RATE_BURST", "10")),
+    ),
+    'www.hackerrank.com': (
+        int(os.environ.get("HACKERRANK_RATE_LIMIT", "120")), 60,
+        int(os.environ.get("HACKERRANK_RATE_BURST", "15")),
+    ),
+}
+FALLBACK_LIMIT = (600, 60, 20)
+
+# Longest a request waits for a token before giving up
+MAX_WAIT_SECONDS = float(os.environ.get("SCRAPER_MAX_RATE_WAIT", "600"))
+# Budget for requests made while an API client waits (connect/update):
+# waiting for tokens and retry backoff together stay within it
+INTERACTIVE_MAX_WAIT_SECONDS = float(os.environ.get("SCRAPER_INTERACTIVE_MAX_WAIT", "5"))
+
+# Retries on 429/5xx, with jittered exponential backoff
+MAX_RETRIES = int(os.environ.get("SCRAPER_MAX_RETRIES", "3"))
+BACKOFF_BASE_SECONDS = float(os.environ.get("SCRAPER_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.environ.get("SCRAPER_BACKOFF_MAX", "60"))
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """Raised when no request token became available within the wait budget"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        # Seconds until the host is expected to accept requests again
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, limit, window_seconds, burst):
+        self.capacity = max(1, min(burst, limit))
+        self.rate = limit / window_seconds
+        self.tokens = float(self.capacity)
+        self.blocked_until = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, timeout=MAX_WAIT_SECONDS):
+        """Take one token, waiting up to timeout seconds; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate if self.rate > 0 else timeout)
+                if now + wait > deadline:
+                    # No token before our deadline: fail fast instead of sleeping
+                    return False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining))
+
+    def wait_seconds(self):
+        """Seconds until the next token is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            blocked = max(0.0, self.blocked_until - now)
+            if self.tokens >= 1:
+                return blocked
+            return max(blocked, (1 - self.tokens) / self.rate if self.rate > 0 else MAX_WAIT_SECONDS)
+
+    def refund(self):
+        """Give back a token for a request the upstream did not count"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def block_for(self, seconds):
+        """Stop issuing requests to this host for the given number of seconds"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """Adapt to X-RateLimit-Remaining / X-RateLimit-Reset sent by the upstream"""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or not remaining.isdigit():
+            return
+
+        remaining = int(remaining)
+        seconds_to_reset = None
+        if reset and reset.isdigit():
+            seconds_to_reset = max(0.0, int(reset) - time.time())
+
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, float(remaining))
+            if seconds_to_reset:
+                if remaining == 0:
+                    self.blocked_until = max(self.blocked_until, now + seconds_to_reset)
+                else:
+                    # Pace the remaining quota evenly over the rest of the window
+                    self.rate = remaining / seconds_to_reset
+
+    def budget(self, horizon_seconds):
+        """Approximate number of requests that can be made in the next horizon_seconds"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            usable = max(0.0, horizon_seconds - max(0.0, self.blocked_until - now))
+            # Banked tokens are part of the same quota, so don't add them on top
+            return int(max(self.tokens, usable * self.rate))
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host):
+    """Return the token bucket for an upstream host"""
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(*DEFAULT_LIMITS.get(host, FALLBACK_LIMIT))
+                _buckets[host] = bucket
+    return bucket
+
+
+def retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying a throttled or failed response:
+    Retry-After when the upstream sends it, otherwise full-jitter
+    exponential backoff.
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        try:
+            delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            return min(max(0.0, delay), BACKOFF_MAX_SECONDS)
+        except (TypeError, ValueError):
+            pass
+
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def should_retry(response):
+    """429 and 5xx are retried; so is GitHub's 403 with an exhausted quota"""
+    if response.status_code == 429 or response.status_code >= 500:
+        return True
+    return response.status_code == 403 and response.headers.get('X-RateLimit-Remaining') == '0'
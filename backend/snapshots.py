@@ -0,0 +1,253 @@
+"""
+Time-series history of profile metrics.
+
+Every profile write appends the numeric metrics that changed since the
+student's previous snapshot, so an unchanged refresh writes nothing.
+Series queries carry each student's last value forward, which lets
+change-only points answer questions such as "solved problems per week for
+the cohort over 6 months" without a row per student per refresh. A
+disconnect writes a REMOVED_METRIC tombstone that ends the carry-forward.
+"""
+
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import math
+import os
+
+from models import ProfileMetricSnapshot
+
+# Numeric profile columns tracked per platform
+SNAPSHOT_METRICS = {
+    'leetcode': [
+        'total_solved', 'easy_solved', 'medium_solved', 'hard_solved',
+        'ranking', 'contest_rating', 'contests_attended', 'total_active_days',
+    ],
+    'github': ['public_repos', 'followers', 'total_stars', 'total_forks'],
+    'hackerrank': ['level', 'total_score', 'total_badges'],
+}
+
+# Minimum relative change before a new point is written. LeetCode's global
+# ranking shifts on nearly every refresh as other users solve problems
+CHANGE_THRESHOLDS = {
+    ('leetcode', 'ranking'): 0.01,
+}
+
+# Pseudo-metric written when a student disconnects a platform; series drop
+# the student from that point until they have values again
+REMOVED_METRIC = '__removed__'
+
+BUCKET_SIZES = {
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30),
+}
+
+# Most buckets one series may span
+MAX_BUCKETS = int(os.environ.get("HISTORY_MAX_BUCKETS", "400"))
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+_IN_CHUNK = 500
+
+
+def bucket_count(start, end, bucket):
+    """Number of buckets metric_series returns for the range"""
+    return math.ceil((end - start) / BUCKET_SIZES[bucket])
+
+
+def _username_chunks(usernames):
+    """usernames in _IN_CHUNK slices, or a single None (no filter) when not given"""
+    if not usernames:
+        return [None]
+    usernames = list(dict.fromkeys(usernames))
+    return [usernames[start:start + _IN_CHUNK] for start in range(0, len(usernames), _IN_CHUNK)]
+
+
+def _latest_values(db: Session, platform, usernames, before=None):
+    """
+    Most recent value of every tracked metric for the given students,
+    optionally only counting snapshots taken before a point in time.
+    Returns {(username, metric): (value, captured_at)}; REMOVED_METRIC
+    entries mark the student's latest disconnect.
+    """
+    latest = {}
+    snapshot = ProfileMetricSnapshot
+
+    for start in range(0, len(usernames), _IN_CHUNK):
+        chunk = usernames[start:start + _IN_CHUNK]
+        filters = [snapshot.platform == platform, snapshot.username.in_(chunk)]
+        if before is not None:
+            filters.append(snapshot.captured_at < before)
+
+        newest = (
+            db.query(
+                snapshot.username,
+                snapshot.metric,
+                func.max(snapshot.captured_at).label('captured_at'),
+            )
+            .filter(*filters)
+            .group_by(snapshot.username, snapshot.metric)
+            .subquery()
+        )
+        rows = (
+            db.query(snapshot.username, snapshot.metric, snapshot.value, snapshot.captured_at)
+            .join(newest, and_(
+                snapshot.username == newest.c.username,
+                snapshot.metric == newest.c.metric,
+                snapshot.captured_at == newest.c.captured_at,
+            ))
+            .filter(snapshot.platform == platform)
+        )
+        for username, metric, value, captured_at in rows:
+            latest[(username, metric)] = (value, captured_at)
+
+    return latest
+
+
+def record_snapshots(db: Session, platform, rows, captured_at=None):
+    """
+    Append a snapshot for each tracked metric whose value differs from the
+    student's latest snapshot. rows are profile_store rows (column dicts).
+    Does not commit; callers write snapshots in the same transaction as the
+    profile rows. Returns the number of points written.
+    """
+    metrics = SNAPSHOT_METRICS.get(platform)
+    if not metrics or not rows:
+        return 0
+
+    captured_at = captured_at or datetime.utcnow()
+    latest = _latest_values(db, platform, [row['username'] for row in rows])
+
+    points = []
+    for row in rows:
+        removed = latest.get((row['username'], REMOVED_METRIC))
+        for metric in metrics:
+            value = row.get(metric)
+            if value is None:
+                continue
+            value = float(value)
+            previous = latest.get((row['username'], metric))
+            # Values from before a disconnect do not count as unchanged
+            if previous is not None and removed is not None and removed[1] >= previous[1]:
+                previous = None
+            if previous is not None:
+                threshold = CHANGE_THRESHOLDS.get((platform, metric), 0)
+                if abs(value - previous[0]) <= threshold * abs(previous[0]):
+                    continue
+            points.append({
+                'platform': platform,
+                'username': row['username'],
+                'metric': metric,
+                'value': value,
+                'captured_at': captured_at,
+            })
+
+    if points:
+        db.bulk_insert_mappings(ProfileMetricSnapshot, points)
+    return len(points)
+
+
+def record_removal(db: Session, platform, username, captured_at=None):
+    """Write a disconnect tombstone for one student. Does not commit"""
+    if platform not in SNAPSHOT_METRICS:
+        return
+    db.add(ProfileMetricSnapshot(
+        platform=platform,
+        username=username,
+        metric=REMOVED_METRIC,
+        value=0.0,
+        captured_at=captured_at or datetime.utcnow(),
+    ))
+
+
+def metric_series(db: Session, platform, metric, start, end, bucket='week', agg='sum', usernames=None):
+    """
+    Downsampled cohort series for one metric between start and end.
+
+    Each bucket reports the cohort's value at the end of the bucket, where
+    each student contributes their latest value so far. agg is 'sum', 'avg'
+    or 'count' (students with a value). Runs in O(points + buckets); raises
+    ValueError for ranges of more than MAX_BUCKETS buckets.
+    """
+    if bucket_count(start, end, bucket) > MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets")
+
+    step = BUCKET_SIZES[bucket]
+    snapshot = ProfileMetricSnapshot
+    chunks = _username_chunks(usernames)
+
+    def newest_before(metric_name):
+        """{username: (value, captured_at)} of the latest metric_name snapshot before start"""
+        latest = {}
+        for chunk in chunks:
+            query = (
+                db.query(snapshot.username, func.max(snapshot.captured_at).label('captured_at'))
+                .filter(snapshot.platform == platform, snapshot.metric == metric_name, snapshot.captured_at < start)
+            )
+            if chunk is not None:
+                query = query.filter(snapshot.username.in_(chunk))
+            newest = query.group_by(snapshot.username).subquery()
+            rows = (
+                db.query(snapshot.username, snapshot.value, snapshot.captured_at)
+                .join(newest, and_(
+                    snapshot.username == newest.c.username,
+                    snapshot.captured_at == newest.c.captured_at,
+                ))
+                .filter(snapshot.platform == platform, snapshot.metric == metric_name)
+            )
+            latest.update((username, (value, captured_at)) for username, value, captured_at in rows)
+        return latest
+
+    # Values in effect at the start of the range, minus students who
+    # disconnected after their last value
+    removed = newest_before(REMOVED_METRIC)
+    current = {
+        username: value
+        for username, (value, captured_at) in newest_before(metric).items()
+        if username not in removed or removed[username][1] < captured_at
+    }
+    total = sum(current.values())
+
+    # Changes and disconnects inside the range, in time order
+    points = []
+    for chunk in chunks:
+        points_query = (
+            db.query(snapshot.username, snapshot.value, snapshot.captured_at, snapshot.metric, snapshot.id)
+            .filter(
+                snapshot.platform == platform,
+                snapshot.metric.in_([metric, REMOVED_METRIC]),
+                snapshot.captured_at >= start,
+                snapshot.captured_at < end,
+            )
+        )
+        if chunk is not None:
+            points_query = points_query.filter(snapshot.username.in_(chunk))
+        points.extend(points_query.order_by(snapshot.captured_at, snapshot.id))
+    if len(chunks) > 1:
+        points.sort(key=lambda point: (point[2], point[4]))
+
+    series = []
+    index = 0
+    bucket_start = start
+    while bucket_start < end:
+        bucket_end = min(bucket_start + step, end)
+        while index < len(points) and points[index][2] < bucket_end:
+            username, value, _, point_metric, _ = points[index]
+            if point_metric == REMOVED_METRIC:
+                total -= current.pop(username, 0.0)
+            else:
+                total += value - current.get(username, 0.0)
+                current[username] = value
+            index += 1
+
+        if agg == 'count':
+            value = len(current)
+        elif agg == 'avg':
+            value = round(total / len(current), 2) if current else None
+        else:
+            value = total
+
+        series.append({'bucket_start': bucket_start.isoformat(), 'value': value})
+        bucket_start = bucket_end
+
+    return series
@@ -6,7 +6,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from database import SessionLocal
-from models import LeetCodeProfile, GitHubProfile, HackerRankProfile
+from models import LeaderboardEntry
 
 def view_database_status():
     """Display current database status for all students"""
@@ -16,41 +16,36 @@ def view_database_status():
     print("📊 CURRENT DATABASE STATUS")
     print("="*70)
     
-    for i in range(1, 11):
-        username = f"student{i}"
+    # One query for all students, from the precomputed leaderboard
+    usernames = [f"student{i}" for i in range(1, 11)]
+    entries = {
+        entry.username: entry
+        for entry in db.query(LeaderboardEntry).filter(LeaderboardEntry.username.in_(usernames))
+    }
+    
+    for i, username in enumerate(usernames, start=1):
+        entry = entries.get(username)
         print(f"\n{'🎯' if i == 1 else '📝'} {username.upper()}")
         print("-" * 70)
         
         # Check LeetCode
-        leetcode = db.query(LeetCodeProfile).filter(
-            LeetCodeProfile.username == username
-        ).first()
-        
-        if leetcode:
-            print(f"  ✅ LeetCode: {leetcode.leetcode_username}")
-            print(f"     • Problems: {leetcode.total_solved} | Rating: {leetcode.contest_rating or 'N/A'}")
+        if entry and entry.leetcode_username:
+            print(f"  ✅ LeetCode: {entry.leetcode_username}")
+            print(f"     • Problems: {entry.leetcode_total_solved} | Rating: {entry.leetcode_contest_rating or 'N/A'}")
         else:
             print("  ❌ LeetCode: Not Connected")
         
         # Check GitHub
-        github = db.query(GitHubProfile).filter(
-            GitHubProfile.username == username
-        ).first()
-        
-        if github:
-            print(f"  ✅ GitHub: {github.github_username}")
-            print(f"     • Repos: {github.public_repos} | Stars: {github.total_stars}")
+        if entry and entry.github_username:
+            print(f"  ✅ GitHub: {entry.github_username}")
+            print(f"     • Repos: {entry.github_public_repos} | Stars: {entry.github_total_stars}")
         else:
             print("  ❌ GitHub: Not Connected")
         
         # Check HackerRank
-        hackerrank = db.query(HackerRankProfile).filter(
-            HackerRankProfile.username == username
-        ).first()
-        
-        if hackerrank:
-            print(f"  ✅ HackerRank: {hackerrank.hackerrank_username}")
-            print(f"     • Level: {hackerrank.level} | Score: {hackerrank.total_score:.1f}")
+        if entry and entry.hackerrank_username:
+            print(f"  ✅ HackerRank: {entry.hackerrank_username}")
+            print(f"     • Level: {entry.hackerrank_level} | Score: {entry.hackerrank_total_score:.1f}")
         else:
             print("  ❌ HackerRank: Not Connected")
     
@@ -18,6 +18,35 @@ interface AISuggestions {
   postingStrategy: string
 }
 
+const EMPTY_SUGGESTIONS: AISuggestions = {
+  caption: '',
+  hashtags: [],
+  taggingSuggestions: { companies: [], ministries: [], influencers: [] },
+  reachTips: [],
+  mediaRecommendations: { images: [], videos: [] },
+  postingStrategy: '',
+}
+
+// Merge one streamed field (snake_case from the API) into the camelCase suggestions
+const applySuggestionField = (suggestions: AISuggestions, field: string, value: any): AISuggestions => {
+  switch (field) {
+    case 'caption':
+      return { ...suggestions, caption: value }
+    case 'hashtags':
+      return { ...suggestions, hashtags: value }
+    case 'tagging_suggestions':
+      return { ...suggestions, taggingSuggestions: { ...EMPTY_SUGGESTIONS.taggingSuggestions, ...value } }
+    case 'reach_tips':
+      return { ...suggestions, reachTips: value }
+    case 'media_recommendations':
+      return { ...suggestions, mediaRecommendations: { ...EMPTY_SUGGESTIONS.mediaRecommendations, ...value } }
+    case 'posting_strategy':
+      return { ...suggestions, postingStrategy: value }
+    default:
+      return suggestions
+  }
+}
+
 function ContentUpload() {
   const navigate = useNavigate()
   const [uploadMethod, setUploadMethod] = useState<'text' | 'pdf'>('text')
@@ -64,8 +93,8 @@ function ContentUpload() {
       let response;
       
       if (uploadMethod === 'text') {
-        // Call text-based API
-        response = await fetch('http://localhost:8000/api/ai/generate-linkedin-suggestions', {
+        // Call text-based streaming API
+        response = await fetch('http://localhost:8000/api/ai/generate-linkedin-suggestions/stream', {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
@@ -76,37 +105,66 @@ function ContentUpload() {
           }),
         })
       } else {
-        // Call PDF-based API
+        // Call PDF-based streaming API
         const formData = new FormData()
         if (projectPDF) {
           formData.append('file', projectPDF)
         }
         
-        response = await fetch('http://localhost:8000/api/ai/generate-linkedin-suggestions-from-pdf', {
+        response = await fetch('http://localhost:8000/api/ai/generate-linkedin-suggestions-from-pdf/stream', {
           method: 'POST',
           body: formData,
         })
       }
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         const errorData = await response.json()
         throw new Error(errorData.detail || 'Failed to generate AI suggestions')
       }
 
-      const data = await response.json()
-      
-      // Convert snake_case to camelCase for frontend
-      const suggestions: AISuggestions = {
-        caption: data.caption,
-        hashtags: data.hashtags,
-        taggingSuggestions: data.tagging_suggestions,
-        reachTips: data.reach_tips,
-        mediaRecommendations: data.media_recommendations,
-        postingStrategy: data.posting_strategy,
+      // Server-Sent Events: each field is shown as soon as it has been generated
+      let suggestions: AISuggestions = { ...EMPTY_SUGGESTIONS }
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      let finished = false
+
+      while (!finished) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+
+        let boundary = buffer.indexOf('\n\n')
+        while (boundary >= 0) {
+          const message = buffer.slice(0, boundary)
+          buffer = buffer.slice(boundary + 2)
+          boundary = buffer.indexOf('\n\n')
+
+          const event = message.match(/^event: (.*)$/m)?.[1]
+          const data = message.match(/^data: (.*)$/m)?.[1]
+          if (!event || !data) continue
+
+          const payload = JSON.parse(data)
+          if (event === 'field') {
+            suggestions = applySuggestionField(suggestions, payload.field, payload.value)
+            setAiSuggestions(suggestions)
+            setShowAISuggestions(true)
+          } else if (event === 'done') {
+            suggestions = Object.entries(payload).reduce(
+              (result, [field, value]) => applySuggestionField(result, field, value),
+              suggestions
+            )
+            setAiSuggestions(suggestions)
+            setShowAISuggestions(true)
+            finished = true
+          } else if (event === 'error') {
+            throw new Error(payload.detail || 'Failed to generate AI suggestions')
+          }
+        }
       }
 
-      setAiSuggestions(suggestions)
-      setShowAISuggestions(true)
+      if (!finished) {
+        throw new Error('AI suggestion stream ended unexpectedly. Please try again.')
+      }
     } catch (error) {
       console.error('AI generation error:', error)
       alert(error instanceof Error ? error.message : 'Failed to generate AI suggestions. Please try again.')